@@ -1,5 +1,5 @@
-from django.contrib import admin
-from .models import TimeSlot, Appointment
+from django.contrib import admin, messages
+from .models import TimeSlot, Appointment, ArchivedAppointment
 
 
 @admin.register(TimeSlot)
@@ -47,18 +47,39 @@ class AppointmentAdmin(admin.ModelAdmin):
     actions = ['mark_confirmed', 'mark_cancelled', 'mark_completed']
     
     def mark_confirmed(self, request, queryset):
-        updated = queryset.filter(status='pending').update(status='confirmed')
-        self.message_user(request, f"{updated} appointments confirmed.")
+        self.apply_transition(request, queryset, Appointment.Status.CONFIRMED, "confirmed")
     mark_confirmed.short_description = "Mark selected appointments as confirmed"
     
     def mark_cancelled(self, request, queryset):
-        for appointment in queryset:
-            appointment.status = 'cancelled'
-            appointment.save()
-        self.message_user(request, f"{queryset.count()} appointments cancelled.")
+        self.apply_transition(request, queryset, Appointment.Status.CANCELLED, "cancelled")
     mark_cancelled.short_description = "Mark selected appointments as cancelled"
     
     def mark_completed(self, request, queryset):
-        updated = queryset.filter(status='confirmed').update(status='completed')
-        self.message_user(request, f"{updated} appointments marked as completed.")
-    mark_completed.short_description = "Mark selected appointments as completed"
\ No newline at end of file
+        self.apply_transition(request, queryset, Appointment.Status.COMPLETED, "marked as completed")
+    mark_completed.short_description = "Mark selected appointments as completed"
+    
+    def apply_transition(self, request, queryset, status, verb):
+        selected = queryset.count()
+        updated = queryset.transition(status)
+        self.message_user(request, f"{len(updated)} appointments {verb}.")
+        skipped = selected - len(updated)
+        if skipped:
+            self.message_user(
+                request,
+                f"{skipped} appointments skipped: their status (or, for cancelling, start time) does not allow this change.",
+                messages.WARNING
+            )
+
+
+@admin.register(ArchivedAppointment)
+class ArchivedAppointmentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'doctor', 'patient', 'date', 'start_time', 'status', 'archived_at')
+    list_filter = ('status', 'date')
+    search_fields = ('doctor__username', 'patient__username')
+    list_select_related = ('doctor', 'patient')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
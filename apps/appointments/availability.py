@@ -0,0 +1,142 @@
+"""
+Maintenance of ``DoctorAvailability``, the per-doctor summary behind
+``AvailableDoctorsView``.
+
+Booking, cancelling and creating or deleting open slots adjust a doctor's
+row by the slots involved (``add_open_slots``/``remove_open_slots``) instead
+of recounting them; only booking the soonest slot looks up the next one,
+with a single index probe. Status changes that open or close no slot leave
+the row alone. Editing a slot's times, and deleting appointments, recompute
+the doctor's row from their own slots (``refresh_doctor_availability``).
+
+Time passing makes rows stale: the open-slot count is exact as long as
+``next_available_at`` is still in the future. ``refresh_stale_availability``
+fixes the rows whose soonest slot has started; the ``refresh_availability``
+command and the schedule maintenance run it, so reads never take row locks.
+"""
+from datetime import datetime
+
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import TimeSlot, DoctorAvailability
+
+
+def future_open_slots(doctor_id, now=None):
+    now = timezone.localtime(now)
+    return TimeSlot.objects.filter(doctor_id=doctor_id, is_available=True).filter(
+        Q(date__gt=now.date()) | Q(date=now.date(), start_time__gt=now.time())
+    )
+
+
+def next_open_slot_start(doctor_id, now=None):
+    first = future_open_slots(doctor_id, now).order_by('date', 'start_time').values_list(
+        'date', 'start_time'
+    ).first()
+    return timezone.make_aware(datetime.combine(*first)) if first is not None else None
+
+
+def refresh_doctor_availability(doctor_id, now=None):
+    with transaction.atomic():
+        # Lock the row first, so concurrent refreshes for the same doctor run
+        # one after another and the last one counts every committed change.
+        list(DoctorAvailability.objects.select_for_update().filter(doctor_id=doctor_id).values_list('pk'))
+        
+        next_available_at = next_open_slot_start(doctor_id, now)
+        if next_available_at is None:
+            DoctorAvailability.objects.filter(doctor_id=doctor_id).delete()
+            return None
+        
+        availability, _ = DoctorAvailability.objects.update_or_create(
+            doctor_id=doctor_id,
+            defaults={
+                'next_available_at': next_available_at,
+                'open_slots': future_open_slots(doctor_id, now).count(),
+            }
+        )
+        return availability
+
+
+def add_open_slots(doctor_id, starts, now=None):
+    """
+    Account for newly created open slots starting at ``starts`` without
+    rescanning the doctor's timeslots.
+    """
+    now = now or timezone.now()
+    starts = [start for start in starts if start > now]
+    if not starts:
+        return
+    
+    with transaction.atomic():
+        availability = DoctorAvailability.objects.select_for_update().filter(doctor_id=doctor_id).first()
+        
+        if availability is None:
+            # No row means no open future slots, so the new ones are all of them.
+            try:
+                with transaction.atomic():
+                    DoctorAvailability.objects.create(
+                        doctor_id=doctor_id, next_available_at=min(starts), open_slots=len(starts)
+                    )
+                return
+            except IntegrityError:
+                # A concurrent writer created the row first
+                pass
+        elif availability.next_available_at > now:
+            availability.next_available_at = min(availability.next_available_at, *starts)
+            availability.open_slots += len(starts)
+            availability.save(update_fields=['next_available_at', 'open_slots', 'updated_at'])
+            return
+        
+        refresh_doctor_availability(doctor_id, now)
+
+
+def remove_open_slots(doctor_id, starts, now=None):
+    """
+    Account for open slots starting at ``starts`` that were booked or
+    deleted, without rescanning the doctor's timeslots.
+    """
+    now = now or timezone.now()
+    starts = [start for start in starts if start > now]
+    if not starts:
+        return
+    
+    with transaction.atomic():
+        availability = DoctorAvailability.objects.select_for_update().filter(doctor_id=doctor_id).first()
+        if availability is None:
+            # Nothing was counted for this doctor
+            return
+        if availability.next_available_at <= now or availability.open_slots <= len(starts):
+            refresh_doctor_availability(doctor_id, now)
+            return
+        
+        availability.open_slots -= len(starts)
+        if min(starts) <= availability.next_available_at:
+            # The soonest slot went; the slots are already updated, so the
+            # next one is simply the soonest open slot left
+            availability.next_available_at = next_open_slot_start(doctor_id, now)
+            if availability.next_available_at is None:
+                availability.delete()
+                return
+        availability.save(update_fields=['next_available_at', 'open_slots', 'updated_at'])
+
+
+def refresh_stale_availability(now=None):
+    """Refresh every doctor whose soonest open slot is no longer in the future."""
+    now = now or timezone.now()
+    stale = list(
+        DoctorAvailability.objects.filter(next_available_at__lte=now).values_list('doctor_id', flat=True)
+    )
+    for doctor_id in stale:
+        refresh_doctor_availability(doctor_id, now)
+    return len(stale)
+
+
+def rebuild_availability():
+    """Recompute the summary for every doctor that has timeslots."""
+    now = timezone.now()
+    doctor_ids = set(TimeSlot.objects.values_list('doctor_id', flat=True).distinct())
+    doctor_ids |= set(DoctorAvailability.objects.values_list('doctor_id', flat=True))
+    for doctor_id in doctor_ids:
+        refresh_doctor_availability(doctor_id, now)
+    return len(doctor_ids)
@@ -0,0 +1,68 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+TIMESLOTS_VERSION_KEY = 'doctor_timeslots:version:{doctor_id}'
+TIMESLOTS_RESPONSE_KEY = 'doctor_timeslots:{scope}:{doctor_id}:v{version}:{day}:{query}'
+
+
+def get_timeslots_version(doctor_id):
+    key = TIMESLOTS_VERSION_KEY.format(doctor_id=doctor_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed with the current time so a counter that was evicted never
+        # comes back at a value that older cached responses still use.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _incr_timeslots_version(doctor_id):
+    key = TIMESLOTS_VERSION_KEY.format(doctor_id=doctor_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        get_timeslots_version(doctor_id)
+
+
+def bump_timeslots_version(doctor_id):
+    """
+    Invalidate every cached timeslot listing of ``doctor_id``.
+
+    The counter is bumped right away and again once the surrounding
+    transaction commits, so a reader that cached pre-commit rows under the
+    first bump is invalidated by the second.
+    """
+    _incr_timeslots_version(doctor_id)
+    transaction.on_commit(lambda: _incr_timeslots_version(doctor_id))
+
+
+def timeslots_response_key(doctor_id, version, day, query_params, scope='available'):
+    query = '&'.join(
+        f'{name}={value}'
+        for name, values in sorted(query_params.lists())
+        for value in values
+    )
+    return TIMESLOTS_RESPONSE_KEY.format(
+        scope=scope,
+        doctor_id=doctor_id,
+        version=version,
+        day=day.isoformat(),
+        query=hashlib.md5(query.encode()).hexdigest()
+    )
+
+
+def get_cached_response(key):
+    """Return ``(etag, body)`` for a cached response, or ``None``."""
+    return cache.get(key)
+
+
+def set_cached_response(key, body, timeout=None):
+    """Cache ``body`` for ``timeout`` seconds (default ``TIMESLOTS_CACHE_TIMEOUT``); returns its ETag."""
+    etag = '"%s"' % hashlib.md5(body).hexdigest()
+    cache.set(key, (etag, body), timeout=timeout or settings.TIMESLOTS_CACHE_TIMEOUT)
+    return etag
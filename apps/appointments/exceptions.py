@@ -0,0 +1,14 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class BookingConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This timeslot has just been booked by someone else."
+    default_code = 'conflict'
+
+
+class SlotHeld(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This timeslot is being held by another patient. Try again shortly."
+    default_code = 'slot_held'
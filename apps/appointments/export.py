@@ -0,0 +1,101 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only used for non-streamed bodies such as error responses
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(ndjson_line(row) for row in rows).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only used for non-streamed bodies such as error responses
+        rows = data if isinstance(data, list) else [data]
+        if not rows:
+            return b''
+        columns = list(rows[0].keys())
+        writer = csv.writer(_Echo())
+        lines = [writer.writerow(csv_row(columns))]
+        lines.extend(writer.writerow(csv_row([row.get(c) for c in columns])) for row in rows)
+        return ''.join(lines).encode(self.charset)
+
+
+# Spreadsheet apps evaluate cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_row(values):
+    """Quote text cells a spreadsheet would run as formulas with a leading ``'``."""
+    return [
+        "'" + value if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) else value
+        for value in values
+    ]
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_line(row):
+    return json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+class ExportMixin:
+    """
+    Stream a list view as NDJSON or CSV (``?format=ndjson`` / ``?format=csv``).
+
+    Rows come straight from a ``values_list()`` projection over a server-side
+    cursor, so memory stays flat however many rows are exported. The view's
+    filters still apply; pagination does not.
+    """
+    # (column name, ORM lookup) pairs
+    export_fields = ()
+    export_chunk_size = 2000
+    export_filename = 'export'
+
+    def get_renderers(self):
+        return super().get_renderers() + [NDJSONRenderer(), CSVRenderer()]
+
+    def list(self, request, *args, **kwargs):
+        export_format = request.accepted_renderer.format
+        if export_format not in ('ndjson', 'csv'):
+            return super().list(request, *args, **kwargs)
+
+        columns = [column for column, _ in self.export_fields]
+        rows = self.filter_queryset(self.get_queryset()).values_list(
+            *[lookup for _, lookup in self.export_fields]
+        ).iterator(chunk_size=self.export_chunk_size)
+
+        if export_format == 'ndjson':
+            content = (ndjson_line(dict(zip(columns, row))) for row in rows)
+        else:
+            content = self._csv_lines(columns, rows)
+
+        response = StreamingHttpResponse(content, content_type=request.accepted_renderer.media_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="{self.export_filename}.{export_format}"'
+        )
+        return response
+
+    def _csv_lines(self, columns, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(csv_row(columns))
+        for row in rows:
+            yield writer.writerow(csv_row(row))
@@ -0,0 +1,147 @@
+"""
+Short-lived holds on timeslots.
+
+A patient can hold an open slot for ``SLOT_HOLD_SECONDS`` while filling in
+the booking form. While the hold lasts, the slot is left out of
+``DoctorAvailableTimeSlotsView`` and other patients' booking attempts are
+rejected before touching the database, so a freshly released slot no
+longer draws a crowd of full bookings that all but one lose.
+
+Holds live in the cache, one key per slot whose value names the holder:
+
+- ``cache.add()`` places a hold only if the slot has none, which is
+  atomic on every backend (``SET NX`` on Redis), and the key's timeout
+  is the hold's expiry, so nothing has to clean up after patients who
+  walk away;
+- a renewal first extends the key with ``cache.touch()`` and only then
+  checks it is still the patient's own, so a hold another patient placed
+  after the old one expired is never overwritten;
+- each patient holds at most one slot; holding another releases the
+  previous one.
+
+Like the timeslot response cache, holds need a shared cache backend when
+several workers serve the API. Holds are advisory: booking a slot nobody
+holds works exactly as before.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import bump_timeslots_version
+
+HOLD_KEY = 'timeslot_hold:{timeslot_id}'
+PATIENT_HOLD_KEY = 'timeslot_hold:patient:{patient_id}'
+
+# Rounds of add/touch before giving up on a slot whose hold keeps changing
+CLAIM_ATTEMPTS = 3
+
+
+class Hold:
+    def __init__(self, timeslot_id, doctor_id, patient_id, expires_at):
+        self.timeslot_id = timeslot_id
+        self.doctor_id = doctor_id
+        self.patient_id = patient_id
+        # Unix time
+        self.expires_at = expires_at
+
+    @property
+    def expires_in(self):
+        return max(0, round(self.expires_at - time.time()))
+
+    def as_cache_value(self):
+        return (self.timeslot_id, self.doctor_id, self.patient_id, self.expires_at)
+
+
+def _key(timeslot_id):
+    return HOLD_KEY.format(timeslot_id=timeslot_id)
+
+
+def _patient_key(patient_id):
+    return PATIENT_HOLD_KEY.format(patient_id=patient_id)
+
+
+def get_hold(timeslot_id):
+    value = cache.get(_key(timeslot_id))
+    return Hold(*value) if value is not None else None
+
+
+def held_by_others(timeslot_id, patient_id):
+    """Return the slot's hold if someone other than ``patient_id`` has it."""
+    hold = get_hold(timeslot_id)
+    if hold is not None and hold.patient_id != patient_id:
+        return hold
+    return None
+
+
+def holds_for(timeslot_ids):
+    """Map each held slot among ``timeslot_ids`` to its hold, in one cache round trip."""
+    keys = {_key(timeslot_id): timeslot_id for timeslot_id in timeslot_ids}
+    return {
+        keys[key]: Hold(*value)
+        for key, value in cache.get_many(list(keys)).items()
+    }
+
+
+def place_hold(timeslot, patient_id, seconds=None):
+    """
+    Hold ``timeslot`` for ``patient_id``, or renew the patient's own hold.
+
+    Returns the ``Hold``, or ``None`` if another patient holds the slot.
+    The caller checks the slot is open and in the future.
+    """
+    seconds = seconds or settings.SLOT_HOLD_SECONDS
+    hold = Hold(timeslot.pk, timeslot.doctor_id, patient_id, time.time() + seconds)
+    if not _claim(hold, seconds):
+        return None
+
+    previous = cache.get(_patient_key(patient_id))
+    cache.set(_patient_key(patient_id), (timeslot.pk, timeslot.doctor_id), timeout=seconds)
+    if previous is not None and previous[0] != timeslot.pk:
+        release_hold(previous[0], patient_id)
+
+    # Cached listings drop the slot right away
+    bump_timeslots_version(timeslot.doctor_id)
+    return hold
+
+
+def _claim(hold, seconds):
+    key = _key(hold.timeslot_id)
+    for _ in range(CLAIM_ATTEMPTS):
+        if cache.add(key, hold.as_cache_value(), timeout=seconds):
+            return True
+
+        current = get_hold(hold.timeslot_id)
+        if current is None:
+            # Expired or released in between: race for it with add() again
+            continue
+        if current.patient_id != hold.patient_id:
+            return False
+
+        # Renewal. Between the read above and touch() the hold may have
+        # expired and been taken, so re-read after extending it.
+        if not cache.touch(key, seconds):
+            continue
+        current = get_hold(hold.timeslot_id)
+        if current is None or current.patient_id != hold.patient_id:
+            return False
+        # Only the holder removes the key before the new timeout, so storing
+        # the new expiry cannot replace anybody else's hold
+        cache.set(key, hold.as_cache_value(), timeout=seconds)
+        return True
+    return False
+
+
+def release_hold(timeslot_id, patient_id):
+    """Release ``patient_id``'s hold on the slot; returns whether there was one."""
+    hold = get_hold(timeslot_id)
+    if hold is None or hold.patient_id != patient_id:
+        return False
+
+    cache.delete(_key(timeslot_id))
+    patient_key = _patient_key(patient_id)
+    current = cache.get(patient_key)
+    if current is not None and current[0] == timeslot_id:
+        cache.delete(patient_key)
+    bump_timeslots_version(hold.doctor_id)
+    return True
@@ -0,0 +1,204 @@
+"""
+Expiry and archival of past schedule rows.
+
+- Unbooked timeslots older than ``TIMESLOT_RETENTION_DAYS`` are deleted.
+  Slots still referenced by a (cancelled) appointment are kept until that
+  appointment is archived.
+- Completed and cancelled appointments older than
+  ``APPOINTMENT_ARCHIVE_MONTHS`` are copied to ``ArchivedAppointment`` and
+  deleted together with their timeslots.
+
+Work is done ``MAINTENANCE_BATCH_SIZE`` rows per short transaction, with an
+optional pause in between, so it can run next to live traffic without
+holding locks for long. Only past rows are touched, and those can no longer
+be booked or change status. Deletes are single statements that skip the
+per-row model signals and cascades (``_delete_rows``), so after each batch
+the doctors it touched get their timeslot cache version bumped and their
+``DoctorAvailability`` refreshed once. The last step refreshes the rows
+whose soonest slot has started since, which keeps that work out of the read
+path.
+
+``run_maintenance()`` is what the ``expire_schedule`` command runs;
+``start_maintenance_runner()`` repeats it in a background thread every
+``MAINTENANCE_INTERVAL`` seconds.
+"""
+import calendar
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .availability import refresh_doctor_availability, refresh_stale_availability
+from .cache import bump_timeslots_version
+from .models import Appointment, ArchivedAppointment, TimeSlot
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_LOCK_KEY = 'schedule_maintenance:lock'
+
+ARCHIVED_STATUSES = (Appointment.Status.COMPLETED, Appointment.Status.CANCELLED)
+
+
+def months_before(day, months):
+    month = day.month - 1 - months
+    year, month = day.year + month // 12, month % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def expired_timeslots(before):
+    return TimeSlot.objects.filter(date__lt=before, is_available=True, appointment__isnull=True)
+
+
+def archivable_appointments(before):
+    return Appointment.objects.filter(status__in=ARCHIVED_STATUSES, timeslot__date__lt=before)
+
+
+def expire_timeslots(before, batch_size=None, pause=0):
+    """Delete unbooked timeslots dated before ``before``."""
+    batch_size = batch_size or settings.MAINTENANCE_BATCH_SIZE
+
+    def delete_batch():
+        rows = list(expired_timeslots(before).order_by('date').values_list('pk', 'doctor_id')[:batch_size])
+        if not rows:
+            return 0, ()
+        with transaction.atomic():
+            # Re-checked in the DELETE in case a slot was booked meanwhile
+            deleted = _delete_rows(expired_timeslots(before).filter(pk__in=[pk for pk, _ in rows]))
+        return deleted, {doctor_id for _, doctor_id in rows}
+
+    return _run_batches(delete_batch, batch_size, pause)
+
+
+def archive_appointments(before, batch_size=None, pause=0):
+    """Move finished appointments dated before ``before`` to the archive."""
+    batch_size = batch_size or settings.MAINTENANCE_BATCH_SIZE
+
+    def archive_batch():
+        with transaction.atomic():
+            rows = list(
+                archivable_appointments(before).order_by().values(
+                    *ArchivedAppointment.SOURCE_FIELDS
+                )[:batch_size]
+            )
+            if not rows:
+                return 0, ()
+            # ignore_conflicts makes a batch safe to redo after a crash
+            ArchivedAppointment.objects.bulk_create(
+                [ArchivedAppointment.from_row(row) for row in rows], ignore_conflicts=True
+            )
+            # Appointments first: their slots are then no longer referenced
+            moved = _delete_rows(Appointment.objects.filter(pk__in=[row['id'] for row in rows]))
+            _delete_rows(TimeSlot.objects.filter(pk__in=[row['timeslot_id'] for row in rows]))
+        return moved, {row['doctor_id'] for row in rows}
+
+    return _run_batches(archive_batch, batch_size, pause)
+
+
+def _delete_rows(queryset):
+    """
+    Delete ``queryset`` with one ``DELETE``, bypassing Django's collector:
+    no cascades and no pre/post_delete signals, which would refresh caches
+    and availability row by row. Callers make sure nothing references the
+    rows; ``_run_batches`` does the refreshing once per batch.
+    """
+    return queryset._raw_delete(queryset.db)
+
+
+def _run_batches(run_batch, batch_size, pause):
+    rows = batches = 0
+    started = time.perf_counter()
+    while True:
+        count, doctor_ids = run_batch()
+        if not count:
+            break
+        rows += count
+        batches += 1
+        # What the skipped post_delete handlers would have done
+        for doctor_id in doctor_ids:
+            bump_timeslots_version(doctor_id)
+            refresh_doctor_availability(doctor_id)
+        if count < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return _report(rows, batches, started)
+
+
+def refresh_availability():
+    """Refresh the ``DoctorAvailability`` rows made stale by time passing."""
+    started = time.perf_counter()
+    rows = refresh_stale_availability()
+    return _report(rows, 1 if rows else 0, started)
+
+
+def _report(rows, batches, started):
+    seconds = time.perf_counter() - started
+    return {
+        'rows': rows,
+        'batches': batches,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds, 1) if rows and seconds else 0.0,
+    }
+
+
+def run_maintenance(today=None, slot_days=None, archive_months=None, batch_size=None, pause=0):
+    today = today or timezone.localdate()
+    if slot_days is None:
+        slot_days = settings.TIMESLOT_RETENTION_DAYS
+    if archive_months is None:
+        archive_months = settings.APPOINTMENT_ARCHIVE_MONTHS
+    return {
+        'expired_timeslots': expire_timeslots(today - timedelta(days=slot_days), batch_size, pause),
+        'archived_appointments': archive_appointments(months_before(today, archive_months), batch_size, pause),
+        'stale_availability': refresh_availability(),
+    }
+
+
+class MaintenanceRunner(threading.Thread):
+    """
+    Runs ``run_maintenance()`` every ``interval`` seconds. Every web worker
+    may start one; a cache lock held for the interval lets only one of
+    them do the work each time.
+    """
+
+    def __init__(self, interval):
+        super().__init__(name='schedule-maintenance', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            if not cache.add(MAINTENANCE_LOCK_KEY, True, timeout=self.interval):
+                continue
+            try:
+                results = run_maintenance(pause=settings.MAINTENANCE_BATCH_PAUSE)
+                logger.info('Schedule maintenance: %s', results)
+            except Exception:
+                logger.exception('Schedule maintenance failed')
+            finally:
+                # This thread's own connections; nothing else closes them
+                connections.close_all()
+
+    def stop(self):
+        self.stopped.set()
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def start_maintenance_runner():
+    """Start this process's runner if ``MAINTENANCE_INTERVAL`` is set; idempotent."""
+    global _runner
+    if settings.MAINTENANCE_INTERVAL <= 0:
+        return None
+    with _runner_lock:
+        if _runner is None:
+            _runner = MaintenanceRunner(settings.MAINTENANCE_INTERVAL)
+            _runner.start()
+    return _runner
@@ -0,0 +1,384 @@
+import json
+import math
+import statistics
+import subprocess
+import time
+from collections import Counter
+from datetime import time as dt_time, timedelta
+from importlib import import_module
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.appointments.models import TimeSlot, Appointment
+from apps.appointments.seed import SEED_PASSWORD, seed
+from apps.users.models import User
+from apps.users.tokens import ClinicRefreshToken
+
+
+BENCHMARKED_URLCONFS = ('apps.appointments.urls', 'apps.users.urls', 'apps.doctors.urls')
+
+# Appointments per appointment_bulk_status request
+BULK_SIZE = 10
+
+
+class Endpoint:
+    """
+    One benchmarked request.
+
+    ``kwargs`` and ``data`` are callables ``(context, i)`` so write endpoints
+    can be handed a fresh row (or username, or token) on every iteration.
+    """
+
+    def __init__(self, name, method='get', role=None, kwargs=None, data=None, label=None, fresh_auth=False):
+        self.name = name
+        self.method = method
+        self.role = role
+        self.kwargs = kwargs
+        self.data = data
+        self.label = label or name
+        # Mint a new token before every request (for endpoints that revoke it)
+        self.fresh_auth = fresh_auth
+
+
+ENDPOINTS = [
+    # apps.appointments.urls
+    Endpoint('timeslot_create', 'post', 'doctor', data=lambda c, i: {
+        'doctor': c.doctor.pk,
+        'date': c.free_day(800 + i).isoformat(),
+        'start_time': '10:00', 'end_time': '10:30',
+    }),
+    Endpoint('timeslot_bulk_create', 'post', 'doctor', data=lambda c, i: {
+        'date_from': c.free_day(10000 + 7 * i).isoformat(),
+        'date_to': c.free_day(10000 + 7 * i + 6).isoformat(),
+        'weekdays': [0, 1, 2, 3, 4],
+        'start_time': '09:00', 'end_time': '17:00', 'slot_minutes': 30,
+    }),
+    Endpoint('my_timeslots', role='doctor'),
+    Endpoint('doctor_calendar', role='doctor'),
+    Endpoint('doctor_calendar', role='doctor', label='doctor_calendar[month]', data=lambda c, i: {'span': 'month'}),
+    Endpoint('timeslot_detail', role='doctor', kwargs=lambda c, i: {'pk': c.doctor_timeslot.pk}),
+    Endpoint('doctor_timeslots', role='patient', kwargs=lambda c, i: {'doctor_id': c.doctor.pk}),
+    Endpoint('timeslot_search', role='patient', data=lambda c, i: {
+        'specialization': c.doctor.doctor_profile.specialization,
+    }),
+    Endpoint('timeslot_search', role='patient', label='timeslot_search[window]', data=lambda c, i: {
+        'date_from': (c.today + timedelta(days=3)).isoformat(),
+        'date_to': (c.today + timedelta(days=10)).isoformat(),
+        'max_fee': c.doctor.doctor_profile.consultation_fee,
+        'page_size': 50,
+    }),
+    Endpoint('timeslot_hold', 'post', 'patient', kwargs=lambda c, i: {'pk': c.pool('holdable')[i].pk}),
+    Endpoint('appointment_create', 'post', 'patient', data=lambda c, i: {
+        'timeslot': c.pool('bookable')[i].pk,
+    }),
+    Endpoint('my_appointments', role='patient', label='my_appointments[patient]'),
+    Endpoint('my_appointments', role='doctor', label='my_appointments[doctor]'),
+    Endpoint('today_appointments', role='doctor'),
+    Endpoint('appointment_detail', role='patient', kwargs=lambda c, i: {'pk': c.patient_appointment.pk}),
+    Endpoint('appointment_status_update', 'patch', 'doctor',
+             kwargs=lambda c, i: {'pk': c.pool('pending')[i].pk},
+             data=lambda c, i: {'status': 'confirmed'}),
+    Endpoint('appointment_bulk_status', 'post', 'doctor',
+             data=lambda c, i: {
+                 'status': 'confirmed',
+                 'ids': [a.pk for a in c.pool('bulk')[i * BULK_SIZE:(i + 1) * BULK_SIZE]],
+             }),
+    Endpoint('appointment_cancel', 'delete', 'patient',
+             kwargs=lambda c, i: {'pk': c.pool('cancellable')[i].pk}),
+    Endpoint('available_doctors', role='patient'),
+    Endpoint('doctor_timeslots_async', role='patient', kwargs=lambda c, i: {'doctor_id': c.doctor.pk}),
+    Endpoint('my_appointments_async', role='patient', label='my_appointments_async[patient]'),
+    Endpoint('my_appointments_async', role='doctor', label='my_appointments_async[doctor]'),
+    Endpoint('today_appointments_async', role='doctor'),
+    Endpoint('available_doctors_async', role='patient'),
+    Endpoint('all_appointments', role='admin'),
+    Endpoint('all_timeslots', role='admin'),
+
+    # apps.users.urls
+    Endpoint('register', 'post', data=lambda c, i: {
+        'username': f'bench_register_{i}', 'email': f'bench_register_{i}@example.com',
+        'password': SEED_PASSWORD, 'password2': SEED_PASSWORD, 'role': 'patient',
+        'date_of_birth': '1990-01-01', 'patient_gender': 'male',
+    }),
+    Endpoint('login', 'post', data=lambda c, i: {
+        'username': c.patient.username, 'password': SEED_PASSWORD,
+    }),
+    Endpoint('login_async', 'post', data=lambda c, i: {
+        'username': c.patient.username, 'password': SEED_PASSWORD,
+    }),
+    Endpoint('token_refresh', 'post', data=lambda c, i: {'refresh': c.pool('refresh')[i]}),
+    Endpoint('logout', 'post', 'patient', data=lambda c, i: {'refresh': c.pool('refresh')[i]}),
+    Endpoint('logout_all', 'post', 'revoker', fresh_auth=True),
+    Endpoint('user_profile', role='patient'),
+    Endpoint('doctor_profile', role='doctor'),
+    Endpoint('patient_profile', role='patient'),
+    Endpoint('doctor_list', role='patient'),
+    Endpoint('doctor_list', role='patient', label='doctor_list[search]',
+             data=lambda c, i: {'search': 'cardio seed_doctor_1'}),
+    Endpoint('doctor_detail', role='patient', kwargs=lambda c, i: {'pk': c.doctor.doctor_profile.pk}),
+    Endpoint('user_list', role='admin'),
+    Endpoint('user_detail', role='admin', kwargs=lambda c, i: {'pk': c.patient.pk}),
+
+    # apps.doctors.urls
+    Endpoint('doctors_profile', role='doctor'),
+    Endpoint('doctors_timeslots', role='doctor'),
+    Endpoint('doctors_timeslot_create', 'post', 'doctor', data=lambda c, i: {
+        'date': c.free_day(900 + i).isoformat(),
+        'start_time': '11:00', 'end_time': '11:30',
+    }),
+]
+
+
+class BenchmarkContext:
+    """Seeded users plus per-endpoint pools of fresh rows for write requests."""
+
+    def __init__(self, users, size):
+        self.admin = users['admin']
+        self.doctor = users['doctor']
+        self.patient = users['patient']
+        # Separate user for logout_all, so revoking does not log out the patient
+        self.revoker = User.objects.create_user(
+            username='bench_revoker', password=SEED_PASSWORD, role=User.Role.PATIENT
+        )
+        self.size = size
+        self.today = timezone.now().date()
+        self._pools = {}
+
+        self.doctor_timeslot = TimeSlot.objects.filter(doctor=self.doctor).first()
+        self.patient_appointment = Appointment.objects.filter(patient=self.patient).first()
+        if self.patient_appointment is None:
+            self.patient_appointment = self._book(self.pool_slots(1, 1500), 'pending')[0]
+
+    def free_day(self, offset):
+        # Far beyond the seeded range, so created slots never overlap it.
+        return self.today + timedelta(days=offset)
+
+    def auth_header(self, role):
+        if role is None:
+            return {}
+        user = getattr(self, role)
+        user.refresh_from_db(fields=['token_version'])
+        return {'HTTP_AUTHORIZATION': f'Bearer {ClinicRefreshToken.for_user(user).access_token}'}
+
+    def pool(self, name):
+        if name not in self._pools:
+            self._pools[name] = getattr(self, f'_make_{name}')()
+        return self._pools[name]
+
+    def pool_slots(self, count, offset):
+        return TimeSlot.objects.bulk_create([
+            TimeSlot(
+                doctor=self.doctor,
+                date=self.free_day(offset + i // 16),
+                start_time=dt_time(8 + (i % 16) // 2, 30 * (i % 2)),
+                end_time=dt_time(8 + (i % 16) // 2, 30 * (i % 2) + 29),
+            )
+            for i in range(count)
+        ])
+
+    def _book(self, slots, status):
+        TimeSlot.objects.filter(pk__in=[slot.pk for slot in slots]).update(is_available=False)
+        return Appointment.objects.bulk_create([
+            Appointment(doctor=self.doctor, patient=self.patient, timeslot=slot, status=status)
+            for slot in slots
+        ])
+
+    def _make_bookable(self):
+        return self.pool_slots(self.size, 2000)
+
+    def _make_holdable(self):
+        return self.pool_slots(self.size, 6000)
+
+    def _make_pending(self):
+        return self._book(self.pool_slots(self.size, 3000), Appointment.Status.PENDING)
+
+    def _make_bulk(self):
+        return self._book(self.pool_slots(self.size * BULK_SIZE, 5000), Appointment.Status.PENDING)
+
+    def _make_cancellable(self):
+        return self._book(self.pool_slots(self.size, 4000), Appointment.Status.PENDING)
+
+    def _make_refresh(self):
+        return [str(ClinicRefreshToken.for_user(self.patient)) for _ in range(self.size)]
+
+
+def percentile(values, q):
+    # Nearest-rank percentile
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database with realistic volumes, time every '
+        'endpoint of the appointments, users and doctors APIs and write a JSON report '
+        '(p50/p99 latency and query counts) that can be diffed between commits.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=500)
+        parser.add_argument('--patients', type=int, default=5000)
+        parser.add_argument('--slots', type=int, default=200000)
+        parser.add_argument('--appointments', type=int, default=100000)
+        parser.add_argument('--requests', type=int, default=30, help='Measured requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per endpoint.')
+        parser.add_argument('--only', action='append', default=[], help='Only run this endpoint (repeatable).')
+        parser.add_argument('--output', default='benchmark.json', help='Where to write the JSON report.')
+        parser.add_argument('--compare', help='Baseline report; exit non-zero on regressions.')
+        parser.add_argument(
+            '--max-slowdown', type=float, default=25.0,
+            help='Allowed p50 slowdown against the baseline, in percent.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1.')
+
+        unknown = set(options['only']) - {endpoint.label for endpoint in ENDPOINTS}
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+        uncovered = sorted(url_names() - {endpoint.name for endpoint in ENDPOINTS})
+        for name in uncovered:
+            self.stderr.write(self.style.WARNING(f'No benchmark defined for URL {name!r}.'))
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            report = self.run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+        report['uncovered'] = uncovered
+
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if options['compare']:
+            self.compare(options['compare'], report, options['max_slowdown'])
+
+    def run(self, options):
+        started = time.perf_counter()
+        users = seed(
+            doctors=options['doctors'], patients=options['patients'],
+            slots=options['slots'], appointments=options['appointments']
+        )
+        seed_seconds = time.perf_counter() - started
+        self.stdout.write(f'Seeded in {seed_seconds:.1f}s')
+
+        iterations = options['warmup'] + options['requests']
+        context = BenchmarkContext(users, iterations)
+        client = APIClient()
+        # Record server errors as 500s instead of aborting the whole run.
+        client.raise_request_exception = False
+
+        results = {}
+        for endpoint in ENDPOINTS:
+            if options['only'] and endpoint.label not in options['only']:
+                continue
+            results[endpoint.label] = self.measure(client, context, endpoint, options)
+            row = results[endpoint.label]
+            self.stdout.write(
+                f"{endpoint.label:<32} {row['status']:<10} p50 {row['p50_ms']:>8.2f}ms  "
+                f"p99 {row['p99_ms']:>8.2f}ms  queries {row['queries']}"
+            )
+
+        return {
+            'meta': {
+                'commit': git_commit(),
+                'database': connection.vendor,
+                'generated_at': timezone.now().isoformat(),
+                'requests': options['requests'],
+                'seed_seconds': round(seed_seconds, 2),
+                'volumes': {
+                    'doctors': options['doctors'],
+                    'patients': options['patients'],
+                    'slots': options['slots'],
+                    'appointments': options['appointments'],
+                },
+            },
+            'endpoints': results,
+        }
+
+    def measure(self, client, context, endpoint, options):
+        headers = context.auth_header(endpoint.role)
+        timings, queries, sizes, statuses = [], [], [], Counter()
+
+        for i in range(options['warmup'] + options['requests']):
+            path = reverse(endpoint.name, kwargs=endpoint.kwargs(context, i) if endpoint.kwargs else None)
+            data = endpoint.data(context, i) if endpoint.data else None
+            request = getattr(client, endpoint.method)
+            if endpoint.fresh_auth:
+                headers = context.auth_header(endpoint.role)
+
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = request(path, data, format='json' if endpoint.method != 'get' else None, **headers)
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+                elapsed = (time.perf_counter() - started) * 1000
+
+            if i < options['warmup']:
+                continue
+            timings.append(elapsed)
+            queries.append(len(captured))
+            sizes.append(len(body))
+            statuses[response.status_code] += 1
+
+        return {
+            'method': endpoint.method.upper(),
+            'role': endpoint.role,
+            'status': ','.join(str(code) for code in sorted(statuses)),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'queries': max(queries),
+            'min_queries': min(queries),
+            'bytes': int(statistics.median(sizes)),
+        }
+
+    def compare(self, path, report, max_slowdown):
+        with open(path) as f:
+            baseline = json.load(f)['endpoints']
+
+        regressions = []
+        for label, current in sorted(report['endpoints'].items()):
+            before = baseline.get(label)
+            if before is None:
+                continue
+            if current['queries'] > before['queries']:
+                regressions.append(f"{label}: queries {before['queries']} -> {current['queries']}")
+            if current['p50_ms'] > before['p50_ms'] * (1 + max_slowdown / 100):
+                regressions.append(f"{label}: p50 {before['p50_ms']:.2f}ms -> {current['p50_ms']:.2f}ms")
+
+        if regressions:
+            raise CommandError('Regressions against %s:\n  %s' % (path, '\n  '.join(regressions)))
+        self.stdout.write(self.style.SUCCESS(f'No regressions against {path}'))
+
+
+def url_names():
+    return {
+        pattern.name
+        for urlconf in BENCHMARKED_URLCONFS
+        for pattern in import_module(urlconf).urlpatterns
+        if pattern.name
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
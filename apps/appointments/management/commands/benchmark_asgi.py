@@ -0,0 +1,200 @@
+import asyncio
+import io
+import json
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.appointments.seed import seed
+from apps.users.tokens import ClinicRefreshToken
+from .benchmark_api import git_commit, percentile
+
+
+# (sync URL name, async URL name, role, URL kwargs)
+LOAD_ENDPOINTS = [
+    ('doctor_timeslots', 'doctor_timeslots_async', 'patient', lambda users: {'doctor_id': users['doctor'].pk}),
+    ('my_appointments', 'my_appointments_async', 'patient', None),
+    ('today_appointments', 'today_appointments_async', 'doctor', None),
+    ('available_doctors', 'available_doctors_async', 'patient', None),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the read-heavy appointment endpoints at high concurrency: '
+        'the sync views behind the WSGI handler (one thread per in-flight '
+        'request, as a threaded WSGI server runs them) against their async '
+        'variants behind the ASGI handler. Reports requests/sec and tail '
+        'latency per endpoint on a throwaway seeded test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=200)
+        parser.add_argument('--patients', type=int, default=1000)
+        parser.add_argument('--slots', type=int, default=20000)
+        parser.add_argument('--appointments', type=int, default=5000)
+        parser.add_argument('--concurrency', type=int, default=64, help='Requests in flight at once.')
+        parser.add_argument('--requests', type=int, default=1000, help='Measured requests per endpoint and mode.')
+        parser.add_argument('--output', default='benchmark-asgi.json', help='Where to write the JSON report.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be at least 1.')
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            report = self.run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def run(self, options):
+        users = seed(
+            doctors=options['doctors'], patients=options['patients'],
+            slots=options['slots'], appointments=options['appointments']
+        )
+        tokens = {
+            role: str(ClinicRefreshToken.for_user(user).access_token)
+            for role, user in users.items()
+        }
+        wsgi, asgi = WSGIHandler(), ASGIHandler()
+        concurrency, count = options['concurrency'], options['requests']
+
+        results = {}
+        for sync_name, async_name, role, kwargs in LOAD_ENDPOINTS:
+            kwargs = kwargs(users) if kwargs else None
+            token = tokens[role]
+            runs = {
+                'wsgi': self.run_wsgi(wsgi, reverse(sync_name, kwargs=kwargs), token, concurrency, count),
+                'asgi': asyncio.run(
+                    self.run_asgi(asgi, reverse(async_name, kwargs=kwargs), token, concurrency, count)
+                ),
+            }
+            results[sync_name] = runs
+            for mode, row in runs.items():
+                self.stdout.write(
+                    f"{sync_name:<20} {mode:<5} {row['requests_per_second']:>9.1f} req/s  "
+                    f"p50 {row['p50_ms']:>8.2f}ms  p99 {row['p99_ms']:>8.2f}ms  errors {row['errors']}"
+                )
+
+        return {
+            'meta': {
+                'commit': git_commit(),
+                'database': connection.vendor,
+                'generated_at': timezone.now().isoformat(),
+                'concurrency': concurrency,
+                'requests': count,
+                'volumes': {
+                    'doctors': options['doctors'],
+                    'patients': options['patients'],
+                    'slots': options['slots'],
+                    'appointments': options['appointments'],
+                },
+            },
+            'endpoints': results,
+        }
+
+    def run_wsgi(self, handler, path, token, concurrency, count):
+        def call(_):
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'SERVER_NAME': 'testserver',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'testserver',
+                'HTTP_AUTHORIZATION': f'Bearer {token}',
+                'wsgi.input': io.BytesIO(b''),
+                'wsgi.errors': sys.stderr,
+                'wsgi.url_scheme': 'http',
+            }
+            statuses = []
+            started = time.perf_counter()
+            body = b''.join(handler(environ, lambda status, headers: statuses.append(int(status[:3]))))
+            elapsed = (time.perf_counter() - started) * 1000
+            return elapsed, statuses[0], len(body)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            # Warm up caches and connections in every worker thread
+            list(pool.map(call, range(concurrency)))
+            started = time.perf_counter()
+            samples = list(pool.map(call, range(count)))
+            wall = time.perf_counter() - started
+        return summarize(samples, wall)
+
+    async def run_asgi(self, handler, path, token, concurrency, count):
+        semaphore = asyncio.Semaphore(concurrency)
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+            'server': ('testserver', 80),
+            'client': ('127.0.0.1', 0),
+        }
+
+        async def call(_):
+            async with semaphore:
+                received = False
+                statuses, chunks = [], []
+
+                async def receive():
+                    nonlocal received
+                    if not received:
+                        received = True
+                        return {'type': 'http.request', 'body': b'', 'more_body': False}
+                    # The client never disconnects; Django cancels this wait
+                    await asyncio.Event().wait()
+
+                async def send(message):
+                    if message['type'] == 'http.response.start':
+                        statuses.append(message['status'])
+                    elif message['type'] == 'http.response.body':
+                        chunks.append(message.get('body', b''))
+
+                started = time.perf_counter()
+                await handler(dict(scope), receive, send)
+                elapsed = (time.perf_counter() - started) * 1000
+                return elapsed, statuses[0], len(b''.join(chunks))
+
+        await asyncio.gather(*(call(i) for i in range(concurrency)))
+        started = time.perf_counter()
+        samples = await asyncio.gather(*(call(i) for i in range(count)))
+        wall = time.perf_counter() - started
+        return summarize(samples, wall)
+
+
+def summarize(samples, wall):
+    timings = [elapsed for elapsed, _, _ in samples]
+    return {
+        'requests_per_second': round(len(samples) / wall, 2),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'errors': sum(1 for _, status, _ in samples if status >= 400),
+        'bytes': int(statistics.median(size for _, _, size in samples)),
+    }
@@ -0,0 +1,165 @@
+import copy
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from datetime import time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.utils import timezone
+
+from apps.appointments.models import Appointment, SlotUnavailable, TimeSlot
+from apps.users.models import User
+from .benchmark_api import git_commit, percentile
+
+
+def run_contention(slots, patients, workers):
+    """
+    Have every patient try to book every slot, ``workers`` threads at a time.
+
+    Attempts are handed out slot by slot, so concurrent threads mostly race
+    for the same slot: one claim wins and the rest must come back as clean
+    conflicts. Returns outcome counts and wall-clock throughput.
+    """
+    attempts = iter([(slot, patient) for slot in slots for patient in patients])
+    lock = threading.Lock()
+    barrier = threading.Barrier(workers)
+    timings, outcomes = [], Counter()
+
+    def book():
+        try:
+            barrier.wait()
+            while True:
+                with lock:
+                    attempt = next(attempts, None)
+                if attempt is None:
+                    return
+                slot, patient = attempt
+                started = time.perf_counter()
+                try:
+                    # book() marks the instance it is given as taken
+                    Appointment.objects.book(copy.copy(slot), patient)
+                    outcome = 'booked'
+                except SlotUnavailable:
+                    outcome = 'conflict'
+                except Exception as exc:
+                    outcome = type(exc).__name__
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    timings.append(elapsed)
+                    outcomes[outcome] += 1
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=book) for _ in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - started
+
+    return {
+        'workers': workers,
+        'attempts': len(timings),
+        'outcomes': dict(outcomes),
+        'seconds': round(seconds, 3),
+        'attempts_per_second': round(len(timings) / seconds, 1),
+        'bookings_per_second': round(outcomes['booked'] / seconds, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Race many bookers for the same timeslots in a throwaway test database and '
+        'report booking throughput, conflicts and latency for each thread count.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, action='append',
+                            help='Concurrent bookers (repeatable; default 1, 4, 16, 32).')
+        parser.add_argument('--slots', type=int, default=200, help='Slots booked per run.')
+        parser.add_argument('--contenders', type=int, default=8, help='Patients racing for each slot.')
+        parser.add_argument('--output', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        sweep = options['workers'] or [1, 4, 16, 32]
+        if min(sweep) < 1 or options['slots'] < 1 or options['contenders'] < 1:
+            raise CommandError('--workers, --slots and --contenders must be positive.')
+        if connection.vendor == 'sqlite':
+            self.stderr.write(self.style.WARNING(
+                'SQLite serialises writers: numbers above one worker measure lock waits, not PostgreSQL.'
+            ))
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            runs = self.run(sweep, options['slots'], options['contenders'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'workers':>7} {'attempts/s':>11} {'bookings/s':>11} {'p50 ms':>8} {'p99 ms':>8}  outcomes"
+        )
+        for run in runs:
+            self.stdout.write(
+                f"{run['workers']:>7} {run['attempts_per_second']:>11.1f} {run['bookings_per_second']:>11.1f} "
+                f"{run['p50_ms']:>8.2f} {run['p99_ms']:>8.2f}  "
+                + ', '.join(f'{name}={count}' for name, count in sorted(run['outcomes'].items()))
+            )
+
+        if options['output']:
+            report = {
+                'meta': {
+                    'commit': git_commit(),
+                    'database': connection.vendor,
+                    'generated_at': timezone.now().isoformat(),
+                    'slots': options['slots'],
+                    'contenders': options['contenders'],
+                },
+                'runs': runs,
+            }
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def run(self, sweep, slot_count, contenders):
+        doctor = User.objects.create_user(username='race_doctor', role=User.Role.DOCTOR)
+        patients = User.objects.bulk_create([
+            User(username=f'race_patient_{i}', role=User.Role.PATIENT) for i in range(contenders)
+        ])
+        today = timezone.localdate()
+
+        runs = []
+        for index, workers in enumerate(sweep):
+            # Fresh, non-overlapping slots for every run
+            first_day = today + timedelta(days=1 + index * (slot_count // 16 + 1))
+            slots = TimeSlot.objects.bulk_create([
+                TimeSlot(
+                    doctor=doctor,
+                    date=first_day + timedelta(days=i // 16),
+                    start_time=dt_time(8 + (i % 16) // 2, 30 * (i % 2)),
+                    end_time=dt_time(8 + (i % 16) // 2, 30 * (i % 2) + 29),
+                )
+                for i in range(slot_count)
+            ])
+            for slot in slots:
+                slot.doctor = doctor
+            runs.append(run_contention(slots, patients, workers))
+
+            booked = Appointment.objects.filter(timeslot__in=slots).count()
+            if booked != slot_count:
+                self.stderr.write(self.style.ERROR(
+                    f'{workers} workers: {booked} of {slot_count} slots booked.'
+                ))
+        return runs
@@ -0,0 +1,114 @@
+import json
+import statistics
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.appointments.seed import seed
+from apps.appointments.serializers import AppointmentSerializer
+from apps.appointments.views import AllAppointmentsView
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+
+
+# name -> (renderer, parser)
+CODECS = {
+    'stdlib': (JSONRenderer(), JSONParser()),
+    'orjson': (ORJSONRenderer(), ORJSONParser()),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database, build AllAppointmentsView payloads of '
+        'increasing size and compare render and parse time of the stdlib and '
+        'orjson JSON classes. Fails if the two render different bytes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, action='append', dest='sizes', metavar='ROWS',
+                            help='Appointments per payload (repeatable; default 100, 1000 and 10000).')
+        parser.add_argument('--rounds', type=int, default=7, help='Measurements per codec (median is reported).')
+        parser.add_argument('--doctors', type=int, default=50)
+        parser.add_argument('--patients', type=int, default=500)
+        parser.add_argument('--slots', type=int, default=20000)
+        parser.add_argument('--output', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        options['sizes'] = sorted(set(options['sizes'] or [100, 1000, 10000]))
+        if options['sizes'][0] < 1 or options['rounds'] < 1:
+            raise CommandError('--size and --rounds must be positive.')
+        if options['sizes'][-1] > options['slots']:
+            raise CommandError('--slots must be at least the largest --size.')
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = self.run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'rows':>6} {'KiB':>8} {'codec':<7} {'render ms':>10} {'render MB/s':>12} "
+            f"{'parse ms':>9} {'parse MB/s':>11}"
+        )
+        for size, result in results.items():
+            for name in CODECS:
+                row = result[name]
+                self.stdout.write(
+                    f"{size:>6} {result['bytes'] / 1024:>8.0f} {name:<7} {row['render_ms']:>10.2f} "
+                    f"{row['render_mb_per_second']:>12.1f} {row['parse_ms']:>9.2f} {row['parse_mb_per_second']:>11.1f}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'rounds': options['rounds'], 'payloads': results}, f, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def run(self, options):
+        largest = options['sizes'][-1]
+        seed(
+            doctors=options['doctors'], patients=options['patients'],
+            slots=options['slots'], appointments=largest
+        )
+        # The admin listing's own queryset and model serializer, so dates,
+        # times, datetimes and nested dicts are all in the payload
+        context = {'request': Request(APIRequestFactory().get('/'))}
+        appointments = AppointmentSerializer(
+            AllAppointmentsView.queryset.all()[:largest], many=True, context=context
+        ).data
+
+        results = {}
+        for size in options['sizes']:
+            payload = {'next': None, 'previous': None, 'results': appointments[:size]}
+            bodies = {name: renderer.render(payload) for name, (renderer, _) in CODECS.items()}
+            if bodies['stdlib'] != bodies['orjson']:
+                raise CommandError(f'{size} rows: orjson renders different output.')
+
+            body = bodies['stdlib']
+            results[size] = {'bytes': len(body)}
+            for name, (renderer, parser) in CODECS.items():
+                render_seconds = self.median(options['rounds'], lambda: renderer.render(payload))
+                parse_seconds = self.median(options['rounds'], lambda: parser.parse(BytesIO(body)))
+                results[size][name] = {
+                    'render_ms': round(render_seconds * 1000, 3),
+                    'render_mb_per_second': round(len(body) / render_seconds / 1e6, 1),
+                    'parse_ms': round(parse_seconds * 1000, 3),
+                    'parse_mb_per_second': round(len(body) / parse_seconds / 1e6, 1),
+                }
+        return results
+
+    def median(self, rounds, func):
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
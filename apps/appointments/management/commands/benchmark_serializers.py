@@ -0,0 +1,139 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.appointments.models import Appointment, TimeSlot
+from apps.appointments.seed import seed
+from apps.appointments.serializers import (
+    AppointmentRowSerializer, AppointmentSerializer, AvailableTimeSlotRowSerializer, AvailableTimeSlotSerializer,
+)
+from core.renderers import ORJSONRenderer
+
+
+# name -> (queryset the list view serves, model serializer, row serializer)
+CASES = {
+    'appointments': (
+        lambda: Appointment.objects.with_related().order_by('-created_at', 'id'),
+        AppointmentSerializer, AppointmentRowSerializer,
+    ),
+    'available_timeslots': (
+        lambda: TimeSlot.objects.filter(is_available=True).select_related(
+            'doctor', 'doctor__doctor_profile'
+        ).order_by('date', 'start_time', 'id'),
+        AvailableTimeSlotSerializer, AvailableTimeSlotRowSerializer,
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database and compare rows/sec of the model '
+        'serializers and their values()-based row twins on the same list, '
+        'serializing only and fetching + serializing + rendering. Fails if '
+        'the two render different bytes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Rows per serialized list.')
+        parser.add_argument('--rounds', type=int, default=7, help='Measurements per path (median is reported).')
+        parser.add_argument('--doctors', type=int, default=50)
+        parser.add_argument('--patients', type=int, default=500)
+        parser.add_argument('--slots', type=int, default=20000)
+        parser.add_argument('--appointments', type=int, default=10000)
+        parser.add_argument('--output', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['rounds'] < 1:
+            raise CommandError('--rows and --rounds must be positive.')
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = self.run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(
+            f"{'list':<20} {'path':<7} {'serialize rows/s':>17} {'end-to-end rows/s':>18} {'speedup':>8}"
+        )
+        for name, result in results.items():
+            for path in ('model', 'rows'):
+                row = result[path]
+                speedup = f"{result['speedup']:.1f}x" if path == 'rows' else ''
+                self.stdout.write(
+                    f"{name:<20} {path:<7} {row['serialize_rows_per_second']:>17,.0f} "
+                    f"{row['end_to_end_rows_per_second']:>18,.0f} {speedup:>8}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'rows': options['rows'], 'rounds': options['rounds'], 'lists': results},
+                          f, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def run(self, options):
+        seed(
+            doctors=options['doctors'], patients=options['patients'],
+            slots=options['slots'], appointments=options['appointments']
+        )
+        # can_cancel is only computed when the serializer has a request
+        context = {'request': Request(APIRequestFactory().get('/'))}
+        renderer = ORJSONRenderer()
+        rows, rounds = options['rows'], options['rounds']
+
+        results = {}
+        for name, (queryset, serializer_class, row_serializer_class) in CASES.items():
+            def model_path():
+                return serializer_class(list(queryset()[:rows]), many=True, context=context).data
+
+            def row_path():
+                page = list(queryset().values(*row_serializer_class.fields)[:rows])
+                return row_serializer_class(page, many=True, context=context).data
+
+            if renderer.render(model_path()) != renderer.render(row_path()):
+                raise CommandError(f'{name}: the row serializer renders different output.')
+
+            instances = list(queryset()[:rows])
+            values = list(queryset().values(*row_serializer_class.fields)[:rows])
+            count = len(instances)
+            if not count:
+                raise CommandError(f'{name}: the seeded data has no rows.')
+
+            results[name] = {
+                'model': self.measure(
+                    count, rounds,
+                    lambda: serializer_class(instances, many=True, context=context).data,
+                    lambda: renderer.render(model_path()),
+                ),
+                'rows': self.measure(
+                    count, rounds,
+                    lambda: row_serializer_class(values, many=True, context=context).data,
+                    lambda: renderer.render(row_path()),
+                ),
+            }
+            results[name]['speedup'] = round(
+                results[name]['rows']['serialize_rows_per_second']
+                / results[name]['model']['serialize_rows_per_second'], 2
+            )
+        return results
+
+    def measure(self, count, rounds, serialize, end_to_end):
+        def rate(func):
+            timings = []
+            for _ in range(rounds):
+                started = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - started)
+            return round(count / statistics.median(timings), 1)
+
+        return {
+            'rows': count,
+            'serialize_rows_per_second': rate(serialize),
+            'end_to_end_rows_per_second': rate(end_to_end),
+        }
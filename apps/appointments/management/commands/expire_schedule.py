@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.appointments.maintenance import run_maintenance
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired unbooked timeslots, move old completed/cancelled '
+        'appointments to the archive table, in small batches that are safe to '
+        'run next to live traffic, and refresh stale doctor availability. '
+        'Reports rows/sec for each step.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slot-days', type=int, default=settings.TIMESLOT_RETENTION_DAYS,
+                            help='Keep unbooked slots from the last N days.')
+        parser.add_argument('--archive-months', type=int, default=settings.APPOINTMENT_ARCHIVE_MONTHS,
+                            help='Archive finished appointments older than N months.')
+        parser.add_argument('--batch-size', type=int, default=settings.MAINTENANCE_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=settings.MAINTENANCE_BATCH_PAUSE,
+                            help='Seconds to sleep between batches.')
+        parser.add_argument('--loop', type=int, metavar='SECONDS',
+                            help='Keep running, every SECONDS seconds, instead of once.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['slot_days'] < 0 or options['archive_months'] < 0:
+            raise CommandError('--batch-size must be positive and the retention periods non-negative.')
+
+        while True:
+            results = run_maintenance(
+                slot_days=options['slot_days'],
+                archive_months=options['archive_months'],
+                batch_size=options['batch_size'],
+                pause=options['pause'],
+            )
+            for step, result in results.items():
+                self.stdout.write(
+                    f"{step:<22} {result['rows']:>8} rows in {result['batches']:>4} batch(es)  "
+                    f"{result['seconds']:>8.2f}s  {result['rows_per_second']:>9.1f} rows/s"
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
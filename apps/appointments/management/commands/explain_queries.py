@@ -0,0 +1,147 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.appointments.availability import future_open_slots
+from apps.appointments.maintenance import archivable_appointments, expired_timeslots, months_before
+from apps.appointments.models import Appointment
+from apps.appointments.seed import seed
+from .benchmark_api import ENDPOINTS, BenchmarkContext
+
+
+# Read endpoints (labels from benchmark_api.ENDPOINTS) whose every SELECT
+# must be served by an index
+HOT_ENDPOINTS = [
+    'doctor_timeslots',
+    'timeslot_search',
+    'timeslot_search[window]',
+    'my_timeslots',
+    'doctor_calendar',
+    'my_appointments[patient]',
+    'my_appointments[doctor]',
+    'today_appointments',
+    'available_doctors',
+    'all_appointments',
+    'all_timeslots',
+    'doctor_list[search]',
+]
+
+# Querysets run outside a request: name -> callable(context)
+HOT_QUERYSETS = {
+    'future_open_slots': lambda c: future_open_slots(c.doctor.pk).order_by('date', 'start_time')[:1],
+    'end_of_day_transition': lambda c: Appointment.objects.filter(
+        doctor=c.doctor, timeslot__date=c.today, status=Appointment.Status.CONFIRMED
+    ).values_list('id', 'doctor_id', 'timeslot_id'),
+    'expired_timeslots': lambda c: expired_timeslots(c.today).order_by('date').values_list('pk', 'doctor_id')[:500],
+    # What deleting a user cascades to; the foreign keys have no index of their own
+    'doctor_appointments': lambda c: Appointment.objects.filter(doctor=c.doctor).values_list('id'),
+    'patient_appointments': lambda c: Appointment.objects.filter(patient=c.patient).values_list('id'),
+    'archivable_appointments': lambda c: archivable_appointments(
+        months_before(c.today, 6)
+    ).order_by().values_list('pk', 'timeslot_id')[:500],
+}
+
+# Plan lines that read a whole table, per backend
+SEQ_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)(?!\w| USING)'),
+}
+EXPLAIN_PREFIXES = {
+    'postgresql': 'EXPLAIN ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database, run EXPLAIN for every SELECT the hot '
+        'read endpoints issue and for the registered background querysets, and '
+        'fail if any plan falls back to a sequential scan.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=200)
+        parser.add_argument('--patients', type=int, default=2000)
+        parser.add_argument('--slots', type=int, default=50000)
+        parser.add_argument('--appointments', type=int, default=20000)
+        parser.add_argument('--allow', action='append', default=[], metavar='TABLE',
+                            help='Tolerate sequential scans on this table (repeatable).')
+        parser.add_argument('--plans', action='store_true', help='Print every plan, not only failing ones.')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SEQ_SCAN_PATTERNS:
+            raise CommandError(f'EXPLAIN checks are not implemented for {connection.vendor}.')
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            failures = self.run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        if failures:
+            raise CommandError(f"Sequential scans in: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('Every hot query is served by an index.'))
+
+    def run(self, options):
+        users = seed(
+            doctors=options['doctors'], patients=options['patients'],
+            slots=options['slots'], appointments=options['appointments']
+        )
+        context = BenchmarkContext(users, 1)
+        with connection.cursor() as cursor:
+            # Fresh statistics, so plans reflect the seeded volumes
+            cursor.execute('ANALYZE')
+
+        failures = []
+        for name, statements in self.hot_statements(context):
+            for i, sql in enumerate(statements):
+                label = name if len(statements) == 1 else f'{name}#{i + 1}'
+                plan = self.explain(sql)
+                scans = sorted(set(SEQ_SCAN_PATTERNS[connection.vendor].findall(plan)) - set(options['allow']))
+                if scans:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f"{label:<36} SEQ SCAN on {', '.join(scans)}"))
+                else:
+                    self.stdout.write(f'{label:<36} ok')
+                if scans or options['plans']:
+                    self.stdout.write(f'    {sql}')
+                    self.stdout.write('    ' + plan.replace('\n', '\n    '))
+        return failures
+
+    def hot_statements(self, context):
+        endpoints = {endpoint.label: endpoint for endpoint in ENDPOINTS}
+        client = APIClient()
+        for label in HOT_ENDPOINTS:
+            endpoint = endpoints[label]
+            path = reverse(endpoint.name, kwargs=endpoint.kwargs(context, 0) if endpoint.kwargs else None)
+            data = endpoint.data(context, 0) if endpoint.data else None
+            with CaptureQueriesContext(connection) as captured:
+                response = client.get(path, data, **context.auth_header(endpoint.role))
+            if response.status_code != 200:
+                raise CommandError(f'{label} answered {response.status_code}.')
+            yield label, [
+                query['sql'] for query in captured.captured_queries
+                if query['sql'].lstrip().upper().startswith('SELECT')
+            ]
+
+        for name, build in HOT_QUERYSETS.items():
+            yield name, [self.sql_for(build(context))]
+
+    def sql_for(self, queryset):
+        with CaptureQueriesContext(connection) as captured:
+            list(queryset)
+        return captured.captured_queries[-1]['sql']
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(EXPLAIN_PREFIXES[connection.vendor] + sql)
+            rows = cursor.fetchall()
+        return '\n'.join(str(row[-1]) for row in rows)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.appointments.availability import rebuild_availability, refresh_stale_availability
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresh DoctorAvailability rows whose soonest slot has already started '
+        '(expire_schedule and the maintenance runner do this too); --all rebuilds every row.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Recompute every doctor, not just stale rows.')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            count = rebuild_availability()
+        else:
+            count = refresh_stale_availability()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed availability for {count} doctor(s).'))
@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.metrics import collect, reset_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Dump the per-URL-name request histograms published by '
+        'RequestMetricsMiddleware. Needs a shared cache backend to see workers '
+        'other than this process.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print the raw histograms as JSON.')
+        parser.add_argument('--reset', action='store_true', help='Clear all published histograms afterwards.')
+
+    def handle(self, *args, **options):
+        metrics = collect()
+
+        if options['json']:
+            self.stdout.write(json.dumps(metrics, indent=2, sort_keys=True))
+        elif not metrics['endpoints']:
+            self.stdout.write('No request metrics published yet.')
+        else:
+            self.stdout.write(
+                f"{'endpoint':<32} {'count':>7} {'p50 ms':>8} {'p99 ms':>8} "
+                f"{'db p50':>8} {'ser p50':>8} {'q p99':>6} {'max KiB':>8}"
+            )
+            by_time = sorted(
+                metrics['endpoints'].items(),
+                key=lambda item: item[1]['total_ms']['sum'],
+                reverse=True
+            )
+            for name, histograms in by_time:
+                self.stdout.write(
+                    f"{name:<32} {histograms['total_ms']['count']:>7} "
+                    f"{_fmt(histograms['total_ms']['p50']):>8} {_fmt(histograms['total_ms']['p99']):>8} "
+                    f"{_fmt(histograms['db_ms']['p50']):>8} {_fmt(histograms['serializer_ms']['p50']):>8} "
+                    f"{_fmt(histograms['queries']['p99']):>6} {histograms['bytes']['max'] / 1024:>8.1f}"
+                )
+            self.stdout.write(f"Merged from {metrics['processes']} process(es); percentiles are bucket upper bounds.")
+
+        if options['reset']:
+            reset_all()
+            self.stdout.write(self.style.SUCCESS('Request metrics cleared.'))
+
+
+def _fmt(value):
+    return '-' if value is None else f'{value:g}'
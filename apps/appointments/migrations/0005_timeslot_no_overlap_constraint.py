@@ -0,0 +1,40 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:02
+
+from django.db import migrations
+
+
+CONSTRAINT_NAME = 'appointments_timeslot_no_overlap'
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    # Only PostgreSQL supports range exclusion constraints; other backends
+    # rely on the indexed overlap query in TimeSlot.clean().
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        f'ALTER TABLE appointments_timeslot ADD CONSTRAINT {CONSTRAINT_NAME} '
+        f'EXCLUDE USING gist ('
+        f'doctor_id WITH =, '
+        f"tsrange(date + start_time, date + end_time, '[)') WITH &&"
+        f')'
+    )
+
+
+def remove_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'ALTER TABLE appointments_timeslot DROP CONSTRAINT IF EXISTS {CONSTRAINT_NAME}'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_alter_appointment_options_appointment_notes_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_exclusion_constraint, remove_exclusion_constraint),
+    ]
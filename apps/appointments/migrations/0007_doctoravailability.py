@@ -0,0 +1,56 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:57
+
+from datetime import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_availability(apps, schema_editor):
+    # One ordered pass over the open future slots; the first row seen for a
+    # doctor is their soonest slot.
+    TimeSlot = apps.get_model('appointments', 'TimeSlot')
+    DoctorAvailability = apps.get_model('appointments', 'DoctorAvailability')
+    now = timezone.localtime()
+    
+    summaries = {}
+    slots = TimeSlot.objects.filter(is_available=True).filter(
+        models.Q(date__gt=now.date()) | models.Q(date=now.date(), start_time__gt=now.time())
+    ).order_by('doctor_id', 'date', 'start_time').values_list('doctor_id', 'date', 'start_time')
+    for doctor_id, day, start_time in slots.iterator(chunk_size=5000):
+        if doctor_id not in summaries:
+            summaries[doctor_id] = DoctorAvailability(
+                doctor_id=doctor_id,
+                next_available_at=timezone.make_aware(datetime.combine(day, start_time)),
+                open_slots=0
+            )
+        summaries[doctor_id].open_slots += 1
+    
+    DoctorAvailability.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_appointment_appt_created_id_idx_and_more'),
+        ('users', '0004_doctorprofile_doctorprofile_created_id_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorAvailability',
+            fields=[
+                ('doctor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='availability', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('next_available_at', models.DateTimeField()),
+                ('open_slots', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'doctor availability',
+                'indexes': [models.Index(fields=['next_available_at', 'doctor'], name='availability_next_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_availability, migrations.RunPython.noop),
+    ]
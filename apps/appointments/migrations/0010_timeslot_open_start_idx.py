@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0009_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Built before the narrower index it replaces is dropped
+        migrations.AddIndex(
+            model_name='timeslot',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['date', 'start_time', 'id'], name='timeslot_open_start_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='timeslot',
+            name='timeslot_open_date_idx',
+        ),
+    ]
@@ -1,10 +1,52 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.core.exceptions import ValidationError
+from django.dispatch import Signal
 from django.utils import timezone
 from apps.users.models import User
 
 
+class TimeSlotQuerySet(models.QuerySet):
+    def with_doctor(self):
+        # TimeSlotSerializer.doctor_info reads the doctor's profile
+        return self.select_related('doctor', 'doctor__doctor_profile')
+    
+    def overlapping(self, doctor, date, start_time, end_time):
+        # Served by the (doctor, date, start_time, ...) unique index, so this
+        # is a single index probe instead of a scan over the whole day.
+        return self.filter(
+            doctor=doctor,
+            date=date,
+            start_time__lt=end_time,
+            end_time__gt=start_time
+        )
+    
+    def search_open(self, date_from, date_to, specialization=None, max_fee=None, now=None):
+        """
+        Open, not yet started slots of every doctor with a profile between
+        ``date_from`` and ``date_to`` (inclusive), optionally only one
+        specialization and up to a consultation fee. One query joining the
+        profile: in (date, start_time, id) order it walks
+        timeslot_open_start_idx and stops at the page size; for a rare
+        specialization the planner can start from doctorprofile_spec_fee_idx
+        and probe timeslot_open_idx per doctor instead.
+        """
+        now = timezone.localtime(now)
+        slots = self.filter(
+            is_available=True,
+            date__range=(max(date_from, now.date()), date_to),
+            doctor__doctor_profile__isnull=False,
+        ).exclude(date=now.date(), start_time__lte=now.time())
+        if specialization:
+            slots = slots.filter(doctor__doctor_profile__specialization=specialization)
+        if max_fee is not None:
+            slots = slots.filter(doctor__doctor_profile__consultation_fee__lte=max_fee)
+        return slots
+
+
 class TimeSlot(models.Model):
+    # Name of the PostgreSQL exclusion constraint added in migration 0005.
+    OVERLAP_CONSTRAINT = 'appointments_timeslot_no_overlap'
+    
     doctor = models.ForeignKey(
         User, 
         on_delete=models.CASCADE, 
@@ -18,13 +60,38 @@ class TimeSlot(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TimeSlotQuerySet.as_manager()
+    
     class Meta:
         ordering = ['date', 'start_time']
         unique_together = ['doctor', 'date', 'start_time', 'end_time']
+        indexes = [
+            # Keyset pagination in AllTimeSlotsView
+            models.Index(fields=['date', 'start_time', 'id'], name='timeslot_date_start_id_idx'),
+            # Open slots only: DoctorAvailableTimeSlotsView, availability refresh
+            models.Index(
+                fields=['doctor', 'date', 'start_time'],
+                condition=models.Q(is_available=True),
+                name='timeslot_open_idx'
+            ),
+            # Open slots in start order: availability search across doctors,
+            # expiry of past open slots (apps.appointments.maintenance)
+            models.Index(
+                fields=['date', 'start_time', 'id'],
+                condition=models.Q(is_available=True),
+                name='timeslot_open_start_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.doctor.username} - {self.date} {self.start_time}-{self.end_time}"
     
+    @property
+    def starts_at(self):
+        return timezone.make_aware(
+            timezone.datetime.combine(self.date, self.start_time)
+        )
+    
     def clean(self):
         # Check if start_time is before end_time
         if self.start_time >= self.end_time:
@@ -34,23 +101,178 @@ class TimeSlot(models.Model):
         if self.date < timezone.now().date():
             raise ValidationError("Cannot create time slot in the past.")
         
-        # Check for overlapping time slots for the same doctor
-        overlapping_slots = TimeSlot.objects.filter(
-            doctor=self.doctor,
-            date=self.date,
-            is_available=True
-        ).exclude(pk=self.pk)  # Exclude self when updating
+        # Check for overlapping time slots for the same doctor, booked or not.
+        # On PostgreSQL the exclusion constraint is the real guard; this gives
+        # a friendly error and covers the other backends.
+        overlapping_slot = TimeSlot.objects.overlapping(
+            self.doctor_id, self.date, self.start_time, self.end_time
+        ).exclude(pk=self.pk).only('start_time', 'end_time').first()
         
-        for slot in overlapping_slots:
-            if (self.start_time < slot.end_time and self.end_time > slot.start_time):
-                raise ValidationError(
-                    f"Time slot overlaps with existing slot: "
-                    f"{slot.start_time}-{slot.end_time}"
-                )
+        if overlapping_slot:
+            raise ValidationError(
+                f"Time slot overlaps with existing slot: "
+                f"{overlapping_slot.start_time}-{overlapping_slot.end_time}"
+            )
     
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            # A concurrent insert won the race after our clean() passed.
+            if self.OVERLAP_CONSTRAINT in str(e):
+                raise ValidationError("Time slot overlaps with an existing slot.")
+            raise
+
+
+class SlotUnavailable(Exception):
+    """The timeslot was booked by someone else before it could be claimed."""
+
+
+# Sent by AppointmentQuerySet.transition(), whose UPDATEs send no post_save,
+# with the affected ``doctor_ids`` and ``freed_slots``, the start times of the
+# timeslots a cancellation reopened by doctor (empty for other statuses).
+appointments_transitioned = Signal()
+
+
+class AppointmentQuerySet(models.QuerySet):
+    # Columns read by AppointmentSerializer
+    SERIALIZER_FIELDS = (
+        'id', 'status', 'notes', 'symptoms', 'created_at', 'updated_at',
+        'doctor__username', 'doctor__email', 'doctor__phone',
+        'doctor__doctor_profile__specialization',
+        'patient__username', 'patient__email', 'patient__phone',
+        'timeslot__date', 'timeslot__start_time', 'timeslot__end_time',
+    )
+    
+    def with_related(self):
+        """
+        Join everything AppointmentSerializer reads and load only those
+        columns, so serializing a list costs a single query.
+        """
+        return self.select_related(
+            'doctor', 'doctor__doctor_profile', 'patient', 'timeslot'
+        ).only(*self.SERIALIZER_FIELDS)
+    
+    def book(self, timeslot, patient, **extra_fields):
+        """
+        Book ``timeslot`` for ``patient``.
+        
+        The slot is claimed with a single conditional
+        ``UPDATE ... WHERE is_available`` and the appointment is inserted in
+        the same short transaction, so concurrent bookers never both succeed.
+        Raises ``SlotUnavailable`` when the claim loses the race.
+        
+        Cancelling frees the slot but keeps the appointment, which still
+        holds the slot's one-to-one row. When the insert runs into such an
+        appointment it is moved to ``ArchivedAppointment`` and the booking
+        is tried once more, so the hot path pays nothing for it.
+        """
+        appointment = self.model(
+            doctor=timeslot.doctor,
+            patient=patient,
+            timeslot=timeslot,
+            **extra_fields
+        )
+        # Uniqueness is guaranteed by the claim and the database constraints,
+        # and the related rows are the instances passed in, so only the
+        # field and business-rule checks run here.
+        appointment.full_clean(exclude=['doctor', 'patient', 'timeslot'], validate_unique=False)
+        
+        try:
+            self._claim_and_insert(timeslot, appointment)
+        except IntegrityError:
+            if not self.archive_cancelled(timeslot):
+                raise SlotUnavailable()
+            try:
+                self._claim_and_insert(timeslot, appointment)
+            except IntegrityError:
+                raise SlotUnavailable()
+        
+        return appointment
+    
+    def _claim_and_insert(self, timeslot, appointment):
+        with transaction.atomic():
+            claimed = TimeSlot.objects.filter(
+                pk=timeslot.pk, is_available=True
+            ).update(is_available=False, updated_at=timezone.now())
+            
+            if not claimed:
+                raise SlotUnavailable()
+            
+            appointment.save(timeslot_claimed=True)
+        timeslot.is_available = False
+    
+    def archive_cancelled(self, timeslot):
+        """
+        Move the cancelled appointment on ``timeslot``, if any, to
+        ``ArchivedAppointment`` and return whether there was one.
+        """
+        with transaction.atomic():
+            rows = list(
+                self.model.objects.filter(timeslot=timeslot, status=self.model.Status.CANCELLED)
+                .select_for_update(of=('self',)).values(*ArchivedAppointment.SOURCE_FIELDS)
+            )
+            if not rows:
+                return False
+            ArchivedAppointment.objects.bulk_create(
+                [ArchivedAppointment.from_row(row) for row in rows], ignore_conflicts=True
+            )
+            # QuerySet.delete() leaves the slot alone (only Appointment.delete()
+            # reopens it) and its post_delete keeps caches and availability right
+            self.model.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        return True
+    
+    def cancellable(self):
+        """Appointments that have not started yet; only those may be cancelled."""
+        now = timezone.localtime()
+        return self.filter(
+            models.Q(timeslot__date__gt=now.date())
+            | models.Q(timeslot__date=now.date(), timeslot__start_time__gt=now.time())
+        )
+    
+    def transition(self, status):
+        """
+        Move every appointment in this queryset whose current status allows
+        it to ``status`` and return their ids; the others are left alone.
+        Cancelling also skips appointments that have already started, the
+        same rule ``Appointment.clean()`` applies to a single save.
+        
+        One locking SELECT of the candidates, one conditional
+        ``UPDATE ... WHERE status IN (allowed sources)`` and, when cancelling,
+        one more UPDATE that frees their timeslots, however many rows match.
+        """
+        sources = self.model.allowed_sources(status)
+        if not sources:
+            return []
+        
+        candidates = self.cancellable() if status == self.model.Status.CANCELLED else self
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(
+                candidates.filter(status__in=sources).select_for_update(of=('self',))
+                .values_list('id', 'doctor_id', 'timeslot_id', 'timeslot__date', 'timeslot__start_time')
+            )
+            if not rows:
+                return []
+            ids = [row[0] for row in rows]
+            self.model.objects.filter(pk__in=ids, status__in=sources).update(status=status, updated_at=now)
+            
+            freed_slots = {}
+            if status == self.model.Status.CANCELLED:
+                TimeSlot.objects.filter(pk__in=[row[2] for row in rows]).update(is_available=True, updated_at=now)
+                for _, doctor_id, _, day, start_time in rows:
+                    freed_slots.setdefault(doctor_id, []).append(
+                        timezone.make_aware(timezone.datetime.combine(day, start_time))
+                    )
+            
+            appointments_transitioned.send(
+                sender=self.model,
+                doctor_ids={row[1] for row in rows},
+                freed_slots=freed_slots
+            )
+        return ids
 
 
 class Appointment(models.Model):
@@ -60,17 +282,21 @@ class Appointment(models.Model):
         CANCELLED = 'cancelled', 'Cancelled'
         COMPLETED = 'completed', 'Completed'
     
+    # No single-column indexes: the keyset indexes in Meta lead with doctor
+    # and patient and serve every lookup by either one
     doctor = models.ForeignKey(
         User, 
         on_delete=models.CASCADE, 
         related_name='doctor_appointments',
-        limit_choices_to={'role': 'doctor'}
+        limit_choices_to={'role': 'doctor'},
+        db_index=False
     )
     patient = models.ForeignKey(
         User, 
         on_delete=models.CASCADE, 
         related_name='patient_appointments',
-        limit_choices_to={'role': 'patient'}
+        limit_choices_to={'role': 'patient'},
+        db_index=False
     )
     timeslot = models.OneToOneField(
         TimeSlot, 
@@ -87,72 +313,251 @@ class Appointment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # The status state machine: every status it may change to
+    TRANSITIONS = {
+        Status.PENDING: (Status.CONFIRMED, Status.CANCELLED),
+        Status.CONFIRMED: (Status.COMPLETED, Status.CANCELLED),
+        Status.CANCELLED: (),
+        Status.COMPLETED: (),
+    }
+    
+    objects = AppointmentQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         unique_together = ['doctor', 'patient', 'timeslot']
+        indexes = [
+            # Keyset pagination in AllAppointmentsView / MyAppointmentsView. The
+            # doctor and patient ones also serve TodayAppointmentsView, ?status=
+            # filters, transitions and cascades, and unlike a (doctor, status)
+            # index they are not rewritten on every status change.
+            models.Index(fields=['-created_at', 'id'], name='appt_created_id_idx'),
+            models.Index(fields=['doctor', '-created_at', 'id'], name='appt_doctor_created_id_idx'),
+            models.Index(fields=['patient', '-created_at', 'id'], name='appt_patient_created_id_idx'),
+            # Archival of finished appointments (apps.appointments.maintenance)
+            models.Index(
+                fields=['timeslot'],
+                condition=models.Q(status__in=['completed', 'cancelled']),
+                name='appt_finished_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"Appointment #{self.id} - {self.patient.username} with Dr. {self.doctor.username}"
     
+    @classmethod
+    def can_transition(cls, old_status, new_status):
+        return old_status == new_status or new_status in cls.TRANSITIONS.get(old_status, ())
+    
+    @classmethod
+    def allowed_sources(cls, status):
+        """Statuses that may change to ``status``."""
+        return [source for source, targets in cls.TRANSITIONS.items() if status in targets]
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Kept to tell which fields a save changes without re-fetching the row
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def changed_fields(self):
+        """Attnames of loaded fields whose value differs from the database row."""
+        loaded = getattr(self, '_loaded_values', None)
+        if self._state.adding or loaded is None:
+            return None
+        # Deferred fields that have since been assigned count as changed
+        return {
+            name for name, value in self._current_values().items()
+            if name not in loaded or value != loaded[name]
+        }
+    
+    def original_status(self):
+        loaded = getattr(self, '_loaded_values', {})
+        if 'status' in loaded:
+            return loaded['status']
+        return Appointment.objects.values_list('status', flat=True).get(pk=self.pk)
+    
     def clean(self):
         # Prevent doctor from booking appointment with themselves
-        if self.doctor == self.patient:
+        if self.doctor_id == self.patient_id:
             raise ValidationError("Doctors cannot book appointments with themselves.")
         
-        # Check if timeslot belongs to the doctor
-        if self.timeslot.doctor != self.doctor:
-            raise ValidationError("Timeslot does not belong to the selected doctor.")
-        
-        # Check if timeslot is available
-        if not self.timeslot.is_available and not self.pk:
-            raise ValidationError("This timeslot is already booked.")
-        
-        # Check if appointment is in the past
-        appointment_datetime = timezone.datetime.combine(
-            self.timeslot.date, 
-            self.timeslot.start_time
-        )
-        if appointment_datetime < timezone.now():
-            raise ValidationError("Cannot book appointment in the past.")
+        changed = self.changed_fields()
+        if changed is None or changed & {'doctor_id', 'timeslot_id'}:
+            # Check if timeslot belongs to the doctor
+            if self.timeslot.doctor_id != self.doctor_id:
+                raise ValidationError("Timeslot does not belong to the selected doctor.")
+            
+            # Check if timeslot is available
+            if not self.timeslot.is_available and not self.pk:
+                raise ValidationError("This timeslot is already booked.")
+            
+            # Check if appointment is in the past
+            if self.timeslot.starts_at < timezone.now():
+                raise ValidationError("Cannot book appointment in the past.")
         
         # Status validation rules
-        if self.pk:  # Only for updates
-            old_appointment = Appointment.objects.get(pk=self.pk)
+        if self.pk and (changed is None or 'status' in changed):  # Only for updates
+            old_status = self.original_status()
             
-            # Only allow specific status transitions
-            allowed_transitions = {
-                'pending': ['confirmed', 'cancelled'],
-                'confirmed': ['completed', 'cancelled'],
-                'cancelled': [],  # Cannot change from cancelled
-                'completed': [],  # Cannot change from completed
-            }
+            if not self.can_transition(old_status, self.status):
+                raise ValidationError(
+                    f"Cannot change status from {old_status} to {self.status}"
+                )
             
-            if old_appointment.status != self.status:
-                if self.status not in allowed_transitions.get(old_appointment.status, []):
-                    raise ValidationError(
-                        f"Cannot change status from {old_appointment.status} to {self.status}"
-                    )
+            if (self.status == self.Status.CANCELLED and old_status != self.status
+                    and self.timeslot.starts_at <= timezone.now()):
+                raise ValidationError("Cannot cancel past appointments.")
     
-    def save(self, *args, **kwargs):
-        self.full_clean()
-        is_new = self.pk is None
+    def save(self, *args, timeslot_claimed=False, **kwargs):
+        # The booking path has already validated the appointment and marked
+        # the timeslot unavailable, so just write the row.
+        if timeslot_claimed:
+            self._slot_opened = False
+            super().save(*args, **kwargs)
+            self._loaded_values = self._current_values()
+            return
         
-        # If appointment is being created, mark timeslot as unavailable
-        if is_new:
-            self.timeslot.is_available = False
-            self.timeslot.save()
+        changed = self.changed_fields()
+        if changed is None:
+            self.full_clean()
+        else:
+            # Relations and uniqueness were checked when they were last saved
+            unchanged = [
+                field.name for field in self._meta.concrete_fields
+                if field.is_relation and field.attname not in changed
+            ]
+            self.full_clean(exclude=unchanged)
         
-        # If appointment is cancelled, mark timeslot as available
-        elif self.status == 'cancelled':
-            old_appointment = Appointment.objects.get(pk=self.pk)
-            if old_appointment.status != 'cancelled':
-                self.timeslot.is_available = True
-                self.timeslot.save()
+        if changed is not None and 'update_fields' not in kwargs and not args:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if field.attname in changed
+            ] + ['updated_at']
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            # If appointment is being created, mark timeslot as unavailable
+            if self._state.adding:
+                self._set_timeslot_available(False)
+            
+            # If appointment is cancelled, mark timeslot as available
+            elif self.status == self.Status.CANCELLED and self.original_status() != self.status:
+                self._set_timeslot_available(True)
+            
+            super().save(*args, **kwargs)
+        self._loaded_values = self._current_values()
     
     def delete(self, *args, **kwargs):
         # When deleting appointment, mark timeslot as available
-        self.timeslot.is_available = True
-        self.timeslot.save()
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        self._set_timeslot_available(True)
+        return super().delete(*args, **kwargs)
+    
+    def _current_values(self):
+        return {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+    
+    def _set_timeslot_available(self, available):
+        # A targeted UPDATE rather than timeslot.save(), which would re-run
+        # the slot's own validation and overlap scan; the appointment's
+        # post_save/post_delete refreshes the caches.
+        TimeSlot.objects.filter(pk=self.timeslot_id).update(
+            is_available=available, updated_at=timezone.now()
+        )
+        if Appointment.timeslot.is_cached(self):
+            self.timeslot.is_available = available
+        # Tells the post_save handler to adjust the doctor's availability
+        self._slot_opened = available
+
+
+class DoctorAvailability(models.Model):
+    """
+    Denormalized summary of a doctor's open future timeslots, maintained by
+    ``apps.appointments.availability``. Only doctors with at least one open
+    future slot have a row.
+    """
+    doctor = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='availability'
+    )
+    next_available_at = models.DateTimeField()
+    open_slots = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'doctor availability'
+        indexes = [
+            # AvailableDoctorsView: stale-row probe and soonest-first ordering
+            models.Index(fields=['next_available_at', 'doctor'], name='availability_next_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.doctor_id}: {self.open_slots} open, next {self.next_available_at}"
+
+
+class ArchivedAppointment(models.Model):
+    """
+    A completed or cancelled appointment moved out of ``Appointment`` by
+    ``apps.appointments.maintenance``. Its timeslot is deleted with it, so
+    the slot's date and times are copied here.
+    """
+    # Same id the appointment had while it was live
+    id = models.BigIntegerField(primary_key=True)
+    doctor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_doctor_appointments'
+    )
+    patient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_patient_appointments'
+    )
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    status = models.CharField(max_length=20, choices=Appointment.Status.choices)
+    notes = models.TextField(blank=True)
+    symptoms = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    
+    # Appointment.objects.values() fields from_row() reads
+    SOURCE_FIELDS = (
+        'id', 'doctor_id', 'patient_id', 'timeslot_id', 'status', 'notes', 'symptoms',
+        'created_at', 'updated_at',
+        'timeslot__date', 'timeslot__start_time', 'timeslot__end_time',
+    )
+    
+    class Meta:
+        ordering = ['-date', '-start_time']
+        indexes = [
+            models.Index(fields=['doctor', '-date'], name='archived_appt_doctor_idx'),
+            models.Index(fields=['patient', '-date'], name='archived_appt_patient_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Archived appointment #{self.id} ({self.status}) on {self.date}"
+    
+    @classmethod
+    def from_row(cls, row):
+        """Build the archived copy of an appointment from its ``SOURCE_FIELDS`` row."""
+        return cls(
+            id=row['id'],
+            doctor_id=row['doctor_id'],
+            patient_id=row['patient_id'],
+            date=row['timeslot__date'],
+            start_time=row['timeslot__start_time'],
+            end_time=row['timeslot__end_time'],
+            status=row['status'],
+            notes=row['notes'],
+            symptoms=row['symptoms'],
+            created_at=row['created_at'],
+            updated_at=row['updated_at'],
+        )
@@ -0,0 +1,52 @@
+from rest_framework import permissions
+
+
+class IsTimeslotOwner(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.is_doctor
+
+    def has_object_permission(self, request, view, obj):
+        return obj.doctor_id == request.user.id
+
+
+class IsAppointmentOwner(permissions.BasePermission):
+    def has_object_permission(self, request, view, obj):
+        user = request.user
+        if user.is_admin:
+            return True
+        return obj.doctor_id == user.id or obj.patient_id == user.id
+
+
+class CanChangeAppointmentStatus(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (request.user.is_doctor or request.user.is_admin)
+
+    def has_object_permission(self, request, view, obj):
+        if request.user.is_admin:
+            return True
+        return obj.doctor_id == request.user.id
+
+
+class CanCancelAppointment(permissions.BasePermission):
+    def has_object_permission(self, request, view, obj):
+        user = request.user
+        if user.is_admin:
+            return True
+        return obj.doctor_id == user.id or obj.patient_id == user.id
+
+
+class CanViewDoctorTimeslots(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated
+
+
+class CanCreateAppointment(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.is_patient
+
+
+class IsDoctorOrReadOnly(permissions.BasePermission):
+    def has_permission(self, request, view):
+        if request.method in permissions.SAFE_METHODS:
+            return request.user.is_authenticated
+        return request.user.is_authenticated and request.user.is_doctor
@@ -0,0 +1,112 @@
+"""
+Doctor calendar grid: a doctor's slots and their appointments for a week or
+a month, in a columnar shape.
+
+Each day is one object of parallel arrays (``slot_id[i]``, ``start_time[i]``,
+``status[i]``, ...), which is far smaller than a list of per-slot objects and
+is what a grid renderer iterates over anyway. Slots and appointments come
+from one ``LEFT JOIN`` query.
+
+The unit of caching is the Monday-to-Sunday week, keyed by the doctor's
+timeslot version, so any slot or appointment change of that doctor (see
+signals.py) retires the cached weeks. A month is assembled from the weeks
+it overlaps; the missing ones are loaded together in a single query.
+"""
+import calendar
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import get_timeslots_version
+from .models import TimeSlot
+
+
+CALENDAR_WEEK_KEY = 'doctor_calendar_week:{doctor_id}:v{version}:{week}'
+
+COLUMNS = ('slot_id', 'start_time', 'end_time', 'is_available', 'appointment_id', 'status', 'patient')
+
+WEEK = 'week'
+MONTH = 'month'
+
+
+def span_range(day, span):
+    """First and last date of the week (Monday to Sunday) or month containing ``day``."""
+    if span == MONTH:
+        first = day.replace(day=1)
+        return first, day.replace(day=calendar.monthrange(day.year, day.month)[1])
+    first = day - timedelta(days=day.weekday())
+    return first, first + timedelta(days=6)
+
+
+def load_days(doctor_id, start, end):
+    """``{date: {column: [...]}}`` for every day from ``start`` to ``end``, in one query."""
+    days = {}
+    day = start
+    while day <= end:
+        days[day] = {column: [] for column in COLUMNS}
+        day += timedelta(days=1)
+
+    rows = TimeSlot.objects.filter(
+        doctor_id=doctor_id, date__range=(start, end)
+    ).order_by('date', 'start_time').values_list(
+        'date', 'id', 'start_time', 'end_time', 'is_available',
+        'appointment__id', 'appointment__status', 'appointment__patient__username'
+    )
+    for date, *values in rows:
+        columns = days[date]
+        # HH:MM:SS, like TimeSlotSerializer
+        values[1] = values[1].isoformat()
+        values[2] = values[2].isoformat()
+        for column, value in zip(COLUMNS, values):
+            columns[column].append(value)
+    return days
+
+
+def get_weeks(doctor_id, mondays):
+    """Cached ``{date: columns}`` days for the weeks starting on ``mondays``."""
+    version = get_timeslots_version(doctor_id)
+    keys = {
+        monday: CALENDAR_WEEK_KEY.format(doctor_id=doctor_id, version=version, week=monday.isoformat())
+        for monday in mondays
+    }
+    cached = cache.get_many(keys.values())
+
+    days = {}
+    missing = []
+    for monday, key in keys.items():
+        if key in cached:
+            days.update(cached[key])
+        else:
+            missing.append(monday)
+
+    if missing:
+        loaded = load_days(doctor_id, min(missing), max(missing) + timedelta(days=6))
+        weeks = {}
+        for monday in missing:
+            week = {monday + timedelta(days=i): loaded[monday + timedelta(days=i)] for i in range(7)}
+            weeks[keys[monday]] = week
+            days.update(week)
+        cache.set_many(weeks, timeout=settings.TIMESLOTS_CACHE_TIMEOUT)
+    return days
+
+
+def build_calendar(doctor_id, day, span=WEEK):
+    start, end = span_range(day, span)
+    mondays = []
+    monday = start - timedelta(days=start.weekday())
+    while monday <= end:
+        mondays.append(monday)
+        monday += timedelta(days=7)
+
+    days = get_weeks(doctor_id, mondays)
+    return {
+        'doctor': doctor_id,
+        'span': span,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': [
+            {'date': (start + timedelta(days=i)).isoformat(), **days[start + timedelta(days=i)]}
+            for i in range((end - start).days + 1)
+        ],
+    }
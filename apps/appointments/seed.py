@@ -0,0 +1,136 @@
+"""
+Fast factory for realistic data volumes.
+
+Everything is written with ``bulk_create`` (no ``save()``/``full_clean()``,
+no signals) and every user shares one precomputed password hash, so seeding
+hundreds of thousands of rows takes seconds rather than hours. Only meant for
+benchmarks and query-plan checks, never for a real database.
+"""
+import random
+from datetime import date, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from apps.users.models import User, DoctorProfile, PatientProfile, build_search_document
+from .models import TimeSlot, Appointment
+from .availability import rebuild_availability
+
+
+SEED_PASSWORD = 'benchpass123'
+BATCH_SIZE = 5000
+SLOTS_PER_DAY = 16
+
+
+def seed(doctors=500, patients=5000, slots=200000, appointments=100000, seed_value=0):
+    """
+    Create ``doctors`` doctors with profiles, ``patients`` patients with
+    profiles, ``slots`` timeslots spread evenly across the doctors starting
+    today, and ``appointments`` appointments on randomly chosen slots.
+
+    Returns a dict with the created admin, the first doctor and the first
+    patient, which benchmarks use as the requesting users.
+    """
+    rng = random.Random(seed_value)
+    password = make_password(SEED_PASSWORD)
+    specializations = [choice for choice, _ in DoctorProfile.Specialization.choices]
+    statuses = [Appointment.Status.PENDING, Appointment.Status.CONFIRMED]
+
+    with transaction.atomic():
+        admin = User.objects.create(
+            username='seed_admin', email='seed_admin@example.com',
+            role=User.Role.ADMIN, password=password
+        )
+        doctor_users = User.objects.bulk_create(
+            [
+                User(username=f'seed_doctor_{i}', email=f'seed_doctor_{i}@example.com',
+                     role=User.Role.DOCTOR, password=password)
+                for i in range(doctors)
+            ],
+            batch_size=BATCH_SIZE
+        )
+        profiles = [
+            DoctorProfile(
+                user=user,
+                specialization=rng.choice(specializations),
+                experience_years=rng.randint(0, 40),
+                gender=rng.choice(['male', 'female']),
+                bio=f'Doctor {i} bio',
+                consultation_fee=rng.randint(10, 200)
+            )
+            for i, user in enumerate(doctor_users)
+        ]
+        # bulk_create skips save(), which maintains the search document
+        for profile in profiles:
+            profile.search_document = build_search_document(
+                profile.user.username, profile.specialization, profile.bio
+            )
+        DoctorProfile.objects.bulk_create(profiles, batch_size=BATCH_SIZE)
+        patient_users = User.objects.bulk_create(
+            [
+                User(username=f'seed_patient_{i}', email=f'seed_patient_{i}@example.com',
+                     role=User.Role.PATIENT, password=password)
+                for i in range(patients)
+            ],
+            batch_size=BATCH_SIZE
+        )
+        PatientProfile.objects.bulk_create(
+            [
+                PatientProfile(
+                    user=user,
+                    date_of_birth=date(1960, 1, 1) + timedelta(days=rng.randint(0, 20000)),
+                    gender=rng.choice(['male', 'female'])
+                )
+                for user in patient_users
+            ],
+            batch_size=BATCH_SIZE
+        )
+
+        timeslots = TimeSlot.objects.bulk_create(
+            _generate_timeslots(doctor_users, slots),
+            batch_size=BATCH_SIZE
+        )
+
+        booked = rng.sample(timeslots, min(appointments, len(timeslots)))
+        for slot in booked:
+            slot.is_available = False
+        TimeSlot.objects.bulk_update(booked, ['is_available'], batch_size=BATCH_SIZE)
+        Appointment.objects.bulk_create(
+            [
+                Appointment(
+                    doctor_id=slot.doctor_id,
+                    patient=rng.choice(patient_users),
+                    timeslot=slot,
+                    status=rng.choice(statuses)
+                )
+                for slot in booked
+            ],
+            batch_size=BATCH_SIZE
+        )
+        # bulk_create skips the signals that maintain the summary
+        rebuild_availability()
+
+    return {
+        'admin': admin,
+        'doctor': doctor_users[0],
+        'patient': patient_users[0],
+    }
+
+
+def _generate_timeslots(doctor_users, total):
+    today = date.today()
+    per_doctor = max(1, total // max(1, len(doctor_users)))
+    created = 0
+    for doctor in doctor_users:
+        for n in range(per_doctor):
+            if created >= total:
+                return
+            day = today + timedelta(days=n // SLOTS_PER_DAY)
+            minutes = 8 * 60 + (n % SLOTS_PER_DAY) * 30
+            yield TimeSlot(
+                doctor=doctor,
+                date=day,
+                start_time=time(minutes // 60, minutes % 60),
+                end_time=time((minutes + 30) // 60, (minutes + 30) % 60)
+            )
+            created += 1
@@ -1,7 +1,18 @@
+from datetime import datetime, timedelta
+
 from rest_framework import serializers
 from django.utils import timezone
-from django.db import transaction
-from .models import TimeSlot, Appointment
+from django.utils.functional import cached_property
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction, IntegrityError
+from .models import TimeSlot, Appointment, SlotUnavailable
+from .exceptions import BookingConflict, SlotHeld
+from .cache import bump_timeslots_version
+from .holds import held_by_others, release_hold
+from .availability import add_open_slots
+from .schedule import WEEK, MONTH
+from .utils import generate_slots, find_overlaps
+from apps.users.models import DoctorProfile
 from apps.users.serializers import DoctorListSerializer, UserSerializer
 
 
@@ -39,6 +50,153 @@ class TimeSlotSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Start time must be before end time.")
         
         return attrs
+    
+    def create(self, validated_data):
+        # TimeSlot.save() runs the overlap check (and the database constraint
+        # may reject a concurrent insert); surface both as a 400.
+        try:
+            return super().create(validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+
+class TimeSlotBreakSerializer(serializers.Serializer):
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+
+    def validate(self, attrs):
+        if attrs['start_time'] >= attrs['end_time']:
+            raise serializers.ValidationError("Break start time must be before end time.")
+        return attrs
+
+
+class DoctorCalendarQuerySerializer(serializers.Serializer):
+    date = serializers.DateField(
+        required=False,
+        help_text="Any day of the week (or month) to show; defaults to today."
+    )
+    span = serializers.ChoiceField(choices=[WEEK, MONTH], default=WEEK)
+
+
+class TimeSlotSearchQuerySerializer(serializers.Serializer):
+    DEFAULT_DAYS = 14
+    MAX_DAYS = 92
+    
+    specialization = serializers.ChoiceField(choices=DoctorProfile.Specialization.choices, required=False)
+    date_from = serializers.DateField(required=False, help_text="First day to search; defaults to today.")
+    date_to = serializers.DateField(
+        required=False,
+        help_text=f"Last day to search (inclusive); defaults to {DEFAULT_DAYS} days after date_from."
+    )
+    max_fee = serializers.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, required=False,
+        help_text="Only doctors whose consultation fee is at most this."
+    )
+    
+    def validate(self, attrs):
+        attrs.setdefault('date_from', timezone.localdate())
+        attrs.setdefault('date_to', attrs['date_from'] + timedelta(days=self.DEFAULT_DAYS))
+        
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError("date_from must be on or before date_to.")
+        
+        if (attrs['date_to'] - attrs['date_from']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"Date range cannot exceed {self.MAX_DAYS} days.")
+        
+        return attrs
+
+
+class TimeSlotBulkCreateSerializer(serializers.Serializer):
+    MAX_DAYS = 366
+    MAX_SLOTS = 10000
+
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6),
+        allow_empty=False,
+        help_text="Days of the week to publish slots on (0 = Monday, 6 = Sunday)."
+    )
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    slot_minutes = serializers.IntegerField(min_value=5, max_value=480)
+    breaks = TimeSlotBreakSerializer(many=True, required=False)
+    skip_conflicts = serializers.BooleanField(
+        default=False,
+        help_text="Drop slots that overlap existing ones instead of rejecting the whole batch."
+    )
+
+    def validate(self, attrs):
+        today = timezone.now().date()
+
+        if attrs['date_from'] < today:
+            raise serializers.ValidationError("Cannot create timeslots in the past.")
+
+        if attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError("date_from must be on or before date_to.")
+
+        if (attrs['date_to'] - attrs['date_from']).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f"Date range cannot exceed {self.MAX_DAYS} days.")
+
+        if attrs['start_time'] >= attrs['end_time']:
+            raise serializers.ValidationError("Start time must be before end time.")
+
+        slots = generate_slots(
+            attrs['date_from'], attrs['date_to'], attrs['weekdays'],
+            attrs['start_time'], attrs['end_time'], attrs['slot_minutes'],
+            [(b['start_time'], b['end_time']) for b in attrs.get('breaks', [])]
+        )
+
+        if not slots:
+            raise serializers.ValidationError("The rule does not produce any timeslots.")
+
+        if len(slots) > self.MAX_SLOTS:
+            raise serializers.ValidationError(
+                f"The rule produces {len(slots)} timeslots; at most {self.MAX_SLOTS} are allowed per request."
+            )
+
+        # One query for every slot the doctor already has in the range, then a
+        # single sorted sweep against the generated batch.
+        doctor = self.context['request'].user
+        existing = list(
+            TimeSlot.objects.filter(
+                doctor=doctor,
+                date__range=(attrs['date_from'], attrs['date_to'])
+            ).order_by('date', 'start_time').values_list('date', 'start_time', 'end_time')
+        )
+        conflicts = find_overlaps(slots, existing)
+
+        if conflicts and not attrs['skip_conflicts']:
+            raise serializers.ValidationError({
+                "conflicts": [
+                    f"{slots[i][0]} {slots[i][1]}-{slots[i][2]}" for i in conflicts[:20]
+                ],
+                "detail": f"{len(conflicts)} generated timeslots overlap existing slots."
+            })
+
+        skipped = set(conflicts)
+        attrs['slots'] = [slot for i, slot in enumerate(slots) if i not in skipped]
+        attrs['skipped'] = len(skipped)
+        return attrs
+
+    def create(self, validated_data):
+        doctor = self.context['request'].user
+        try:
+            with transaction.atomic():
+                timeslots = TimeSlot.objects.bulk_create(
+                    [
+                        TimeSlot(doctor=doctor, date=day, start_time=start, end_time=end)
+                        for day, start, end in validated_data['slots']
+                    ],
+                    batch_size=1000
+                )
+                # bulk_create does not send post_save
+                bump_timeslots_version(doctor.pk)
+                add_open_slots(doctor.pk, [slot.starts_at for slot in timeslots])
+                return timeslots
+        except IntegrityError:
+            # Another request created an overlapping slot after validation.
+            raise serializers.ValidationError("Timeslots changed while publishing; please retry.")
 
 
 class AvailableTimeSlotSerializer(serializers.ModelSerializer):
@@ -61,6 +219,47 @@ class AvailableTimeSlotSerializer(serializers.ModelSerializer):
         }
 
 
+class AvailableTimeSlotRowSerializer(serializers.BaseSerializer):
+    """
+    Read-only twin of ``AvailableTimeSlotSerializer`` for list responses,
+    built from ``values(*AvailableTimeSlotRowSerializer.fields)`` rows
+    instead of model instances. The output must stay identical to the
+    model serializer's; the tests compare both.
+    """
+    fields = (
+        'id', 'date', 'start_time', 'end_time', 'is_available', 'doctor_id',
+        'doctor__username', 'doctor__doctor_profile__specialization',
+        'doctor__doctor_profile__experience_years', 'doctor__doctor_profile__consultation_fee',
+    )
+    date_field = serializers.DateField()
+    time_field = serializers.TimeField()
+    
+    def to_representation(self, row):
+        time_field = self.time_field
+        return {
+            'id': row['id'],
+            'doctor_info': {
+                'id': row['doctor_id'],
+                'username': row['doctor__username'],
+                'specialization': row['doctor__doctor_profile__specialization'],
+                'experience_years': row['doctor__doctor_profile__experience_years'],
+                'consultation_fee': row['doctor__doctor_profile__consultation_fee'],
+            },
+            'date': self.date_field.to_representation(row['date']),
+            'start_time': time_field.to_representation(row['start_time']),
+            'end_time': time_field.to_representation(row['end_time']),
+            'is_available': row['is_available'],
+        }
+
+
+class AvailableDoctorSerializer(DoctorListSerializer):
+    next_available_at = serializers.DateTimeField(read_only=True)
+    open_slots = serializers.IntegerField(read_only=True)
+    
+    class Meta(DoctorListSerializer.Meta):
+        fields = DoctorListSerializer.Meta.fields + ('next_available_at', 'open_slots')
+
+
 class AppointmentSerializer(serializers.ModelSerializer):
     doctor_info = serializers.SerializerMethodField()
     patient_info = serializers.SerializerMethodField()
@@ -81,7 +280,7 @@ class AppointmentSerializer(serializers.ModelSerializer):
             'username': obj.doctor.username,
             'email': obj.doctor.email,
             'phone': obj.doctor.phone,
-            'specialization': obj.doctor.doctor_profile.specialization,
+            'specialization': obj.doctor.doctor_profile.specialization if hasattr(obj.doctor, 'doctor_profile') else None,
         }
     
     def get_patient_info(self, obj):
@@ -104,11 +303,7 @@ class AppointmentSerializer(serializers.ModelSerializer):
             return False
         
         # Check if appointment is in the future
-        appointment_datetime = timezone.datetime.combine(
-            obj.timeslot.date, 
-            obj.timeslot.start_time
-        )
-        is_future = appointment_datetime > timezone.now()
+        is_future = obj.timeslot.starts_at > timezone.now()
         
         # Check if patient can cancel (only pending or confirmed appointments)
         can_cancel_status = obj.status in ['pending', 'confirmed']
@@ -125,33 +320,101 @@ class AppointmentSerializer(serializers.ModelSerializer):
             if not timeslot_id:
                 raise serializers.ValidationError({"timeslot": "This field is required."})
             
-            try:
-                timeslot = TimeSlot.objects.get(pk=timeslot_id, is_available=True)
-            except TimeSlot.DoesNotExist:
+            # Someone else is holding the slot: reject before any query
+            if held_by_others(timeslot_id, request.user.pk) is not None:
+                raise SlotHeld()
+            
+            # Cheap, lock-free pre-check; the actual claim happens in create().
+            timeslot = TimeSlot.objects.select_related('doctor').filter(
+                pk=timeslot_id, is_available=True
+            ).first()
+            
+            if timeslot is None:
                 raise serializers.ValidationError({"timeslot": "Timeslot not available or does not exist."})
             
             # Set doctor and patient automatically
             attrs['doctor'] = timeslot.doctor
             attrs['patient'] = request.user
             attrs['timeslot'] = timeslot
-            
-            # Check if patient already has appointment with this doctor at this time
-            existing_appointment = Appointment.objects.filter(
-                patient=request.user,
-                doctor=timeslot.doctor,
-                timeslot=timeslot
-            ).exists()
-            
-            if existing_appointment:
-                raise serializers.ValidationError("You already have an appointment with this doctor at this time.")
         
         return attrs
     
     def create(self, validated_data):
-        with transaction.atomic():
-            appointment = Appointment.objects.create(**validated_data)
-            # Timeslot availability will be updated in Appointment.save() method
-            return appointment
+        validated_data.pop('doctor', None)
+        try:
+            appointment = Appointment.objects.book(**validated_data)
+        except SlotUnavailable:
+            raise BookingConflict()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        release_hold(appointment.timeslot_id, appointment.patient_id)
+        return appointment
+
+
+class AppointmentRowSerializer(serializers.BaseSerializer):
+    """
+    Read-only twin of ``AppointmentSerializer`` for list responses, built
+    from ``values(*AppointmentRowSerializer.fields)`` rows instead of model
+    instances. The output must stay identical to the model serializer's;
+    the tests compare both.
+    """
+    fields = (
+        'id', 'doctor_id', 'patient_id', 'timeslot_id', 'status', 'notes', 'symptoms',
+        'created_at', 'updated_at',
+        'doctor__username', 'doctor__email', 'doctor__phone',
+        'doctor__doctor_profile__specialization',
+        'patient__username', 'patient__email', 'patient__phone',
+        'timeslot__date', 'timeslot__start_time', 'timeslot__end_time',
+    )
+    cancellable = frozenset(['pending', 'confirmed'])
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Looked up once per list instead of for every datetime
+        self.current_timezone = timezone.get_current_timezone()
+        self.datetime_field = serializers.DateTimeField(default_timezone=self.current_timezone)
+    
+    @cached_property
+    def has_request(self):
+        return bool(self.context.get('request'))
+    
+    def to_representation(self, row):
+        datetime_field = self.datetime_field
+        status = row['status']
+        return {
+            'id': row['id'],
+            'doctor': row['doctor_id'],
+            'doctor_info': {
+                'username': row['doctor__username'],
+                'email': row['doctor__email'],
+                'phone': row['doctor__phone'],
+                'specialization': row['doctor__doctor_profile__specialization'],
+            },
+            'patient': row['patient_id'],
+            'patient_info': {
+                'username': row['patient__username'],
+                'email': row['patient__email'],
+                'phone': row['patient__phone'],
+            },
+            'timeslot': row['timeslot_id'],
+            'timeslot_info': {
+                'date': row['timeslot__date'],
+                'start_time': row['timeslot__start_time'],
+                'end_time': row['timeslot__end_time'],
+            },
+            'status': status,
+            'notes': row['notes'],
+            'symptoms': row['symptoms'],
+            'created_at': datetime_field.to_representation(row['created_at']),
+            'updated_at': datetime_field.to_representation(row['updated_at']),
+            'can_cancel': (
+                status in self.cancellable
+                and self.has_request
+                and timezone.make_aware(
+                    datetime.combine(row['timeslot__date'], row['timeslot__start_time']), self.current_timezone
+                ) > timezone.now()
+            ),
+        }
 
 
 class AppointmentStatusSerializer(serializers.ModelSerializer):
@@ -169,21 +432,36 @@ class AppointmentStatusSerializer(serializers.ModelSerializer):
         if not request.user.is_doctor and not request.user.is_admin:
             raise serializers.ValidationError("Only doctors and admins can change appointment status.")
         
-        # Check valid status transitions
-        valid_transitions = {
-            'pending': ['confirmed', 'cancelled'],
-            'confirmed': ['completed', 'cancelled'],
-        }
-        
-        if instance.status != value:
-            if value not in valid_transitions.get(instance.status, []):
-                raise serializers.ValidationError(
-                    f"Cannot change status from {instance.status} to {value}"
-                )
+        if not Appointment.can_transition(instance.status, value):
+            raise serializers.ValidationError(
+                f"Cannot change status from {instance.status} to {value}"
+            )
         
         return value
 
 
+class AppointmentBulkStatusSerializer(serializers.Serializer):
+    MAX_IDS = 1000
+    
+    status = serializers.ChoiceField(choices=Appointment.Status.choices)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_IDS,
+        required=False,
+        help_text="Appointments to change; rows that cannot make the transition are reported as rejected."
+    )
+    date = serializers.DateField(
+        required=False,
+        help_text="Instead of ids: every appointment on this day, e.g. end-of-day completion."
+    )
+    
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('date' in attrs):
+            raise serializers.ValidationError("Provide either ids or date.")
+        return attrs
+
+
 class DoctorTimeSlotSerializer(serializers.ModelSerializer):
     class Meta:
         model = TimeSlot
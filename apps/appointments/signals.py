@@ -0,0 +1,69 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.users.models import User, DoctorProfile
+from .models import TimeSlot, Appointment, appointments_transitioned
+from .cache import bump_timeslots_version
+from .availability import add_open_slots, refresh_doctor_availability, remove_open_slots
+
+
+@receiver(post_save, sender=TimeSlot)
+def timeslot_saved(sender, instance, created, **kwargs):
+    bump_timeslots_version(instance.doctor_id)
+    if created:
+        if instance.is_available:
+            add_open_slots(instance.doctor_id, [instance.starts_at])
+    else:
+        # An edit may move the slot or open/close it; rare enough to recount
+        refresh_doctor_availability(instance.doctor_id)
+
+
+@receiver(post_delete, sender=TimeSlot)
+def timeslot_deleted(sender, instance, **kwargs):
+    bump_timeslots_version(instance.doctor_id)
+    if instance.is_available:
+        remove_open_slots(instance.doctor_id, [instance.starts_at])
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_saved(sender, instance, **kwargs):
+    # Booking claims the slot with a queryset UPDATE, which sends no signal
+    bump_timeslots_version(instance.doctor_id)
+    # Set by Appointment.save() when it booked or freed the slot; status
+    # changes that do neither leave the availability alone
+    opened = instance.__dict__.pop('_slot_opened', None)
+    if opened is True:
+        add_open_slots(instance.doctor_id, [instance.timeslot.starts_at])
+    elif opened is False:
+        remove_open_slots(instance.doctor_id, [instance.timeslot.starts_at])
+
+
+@receiver(post_delete, sender=Appointment)
+def appointment_deleted(sender, instance, **kwargs):
+    # Deletes may or may not reopen the slot (cascades do not), so recount
+    instance.__dict__.pop('_slot_opened', None)
+    bump_timeslots_version(instance.doctor_id)
+    refresh_doctor_availability(instance.doctor_id)
+
+
+@receiver(appointments_transitioned, sender=Appointment)
+def appointments_bulk_changed(sender, doctor_ids, freed_slots, **kwargs):
+    for doctor_id in doctor_ids:
+        bump_timeslots_version(doctor_id)
+    for doctor_id, starts in freed_slots.items():
+        add_open_slots(doctor_id, starts)
+
+
+@receiver(post_save, sender=DoctorProfile)
+def doctor_profile_changed(sender, instance, **kwargs):
+    # doctor_info in the timeslot listing is built from the profile
+    bump_timeslots_version(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def doctor_user_changed(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the listing does not show
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    if instance.is_doctor and not created:
+        bump_timeslots_version(instance.pk)
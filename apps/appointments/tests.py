@@ -1,3 +1,2022 @@
-from django.test import TestCase
+import csv
+import json
+import time as time_module
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.users.models import DoctorProfile, PatientProfile
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+from core.metrics import PROCESSES_KEY, collect, publish, registry, reset_all
+from .management.commands.benchmark_api import ENDPOINTS, BenchmarkContext, percentile, url_names
+from .management.commands.benchmark_booking import run_contention
+from .management.commands.benchmark_json import Command as JSONBenchmarkCommand
+from .management.commands.benchmark_serializers import Command as SerializerBenchmarkCommand
+from .management.commands.explain_queries import (
+    HOT_ENDPOINTS, HOT_QUERYSETS, SEQ_SCAN_PATTERNS, Command as ExplainCommand,
+)
+from .availability import refresh_doctor_availability, refresh_stale_availability
+from .cache import get_timeslots_version
+from .export import CSVRenderer
+from .holds import get_hold, place_hold
+from .maintenance import months_before, run_maintenance
+from .models import (
+    TimeSlot, Appointment, AppointmentQuerySet, ArchivedAppointment, DoctorAvailability, SlotUnavailable,
+)
+from .seed import SEED_PASSWORD, seed
+from .utils import generate_slots, find_overlaps
+
+User = get_user_model()
+
+
+def next_weekday(weekday):
+    """Ertangi kundan boshlab berilgan hafta kunini qaytaradi"""
+    day = date.today() + timedelta(days=1)
+    while day.weekday() != weekday:
+        day += timedelta(days=1)
+    return day
+
+
+class SlotUtilsTests(TestCase):
+    """Slot generatsiya va overlap sweep testlari"""
+
+    def test_generate_slots_with_break(self):
+        """Tanaffus bilan slot generatsiya testi"""
+        monday = next_weekday(0)
+        slots = generate_slots(
+            monday, monday + timedelta(days=6), [0, 2],
+            time(9, 0), time(12, 0), 30,
+            [(time(10, 0), time(10, 30))]
+        )
+
+        # Dushanba va chorshanba, har kuni 5 tadan slot
+        self.assertEqual(len(slots), 10)
+        self.assertEqual(slots[0], (monday, time(9, 0), time(9, 30)))
+        self.assertNotIn((monday, time(10, 0), time(10, 30)), slots)
+        self.assertIn((monday, time(10, 30), time(11, 0)), slots)
+
+    def test_find_overlaps(self):
+        """Sorted sweep overlap testi"""
+        day = date.today() + timedelta(days=1)
+        candidates = [
+            (day, time(9, 0), time(9, 30)),
+            (day, time(9, 30), time(10, 0)),
+            (day, time(10, 0), time(10, 30)),
+            (day + timedelta(days=1), time(9, 0), time(9, 30)),
+        ]
+        existing = [
+            (day, time(8, 0), time(9, 0)),
+            (day, time(9, 45), time(11, 0)),
+            (day + timedelta(days=1), time(9, 15), time(9, 20)),
+        ]
+
+        self.assertEqual(find_overlaps(candidates, existing), [1, 2, 3])
+        self.assertEqual(find_overlaps(candidates, []), [])
+
+
+class TimeSlotBulkCreateAPITests(APITestCase):
+    """Bulk timeslot yaratish API testlari"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('timeslot_bulk_create')
+
+        self.doctor = User.objects.create_user(
+            username='bulk_doctor',
+            password='testpass123',
+            email='bulk_doctor@test.com',
+            role='doctor'
+        )
+        DoctorProfile.objects.create(
+            user=self.doctor,
+            specialization='cardiology',
+            experience_years=5,
+            gender='male'
+        )
+        self.patient = User.objects.create_user(
+            username='bulk_patient',
+            password='testpass123',
+            email='bulk_patient@test.com',
+            role='patient'
+        )
+
+        self.doctor_token = str(RefreshToken.for_user(self.doctor).access_token)
+        self.patient_token = str(RefreshToken.for_user(self.patient).access_token)
+
+        self.monday = next_weekday(0)
+        self.rule = {
+            'date_from': str(self.monday),
+            'date_to': str(self.monday + timedelta(days=13)),
+            'weekdays': [0, 1, 2, 3, 4],
+            'start_time': '09:00',
+            'end_time': '13:00',
+            'slot_minutes': 15,
+            'breaks': [{'start_time': '11:00', 'end_time': '11:30'}],
+        }
+
+    def test_bulk_create_success(self):
+        """Recurrence qoidasi bo'yicha slotlar yaratish testi"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.doctor_token}')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, self.rule, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Bitta overlap so'rovi va bitta bulk INSERT
+        slot_queries = [q['sql'] for q in ctx.captured_queries if 'appointments_timeslot' in q['sql']]
+        self.assertEqual(len(slot_queries), 2)
+        self.assertTrue(slot_queries[1].startswith('INSERT'))
+        # 10 ish kuni, har kuni 14 ta slot
+        self.assertEqual(response.data['created'], 140)
+        self.assertEqual(TimeSlot.objects.filter(doctor=self.doctor).count(), 140)
+
+    def test_bulk_create_rejects_overlap(self):
+        """Mavjud slot bilan overlap bo'lsa butun batch rad etiladi"""
+        TimeSlot.objects.create(
+            doctor=self.doctor,
+            date=self.monday,
+            start_time=time(9, 10),
+            end_time=time(9, 40),
+            is_available=False
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.doctor_token}')
+
+        response = self.client.post(self.url, self.rule, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('conflicts', response.data)
+        self.assertEqual(TimeSlot.objects.filter(doctor=self.doctor).count(), 1)
+
+    def test_bulk_create_skip_conflicts(self):
+        """skip_conflicts bilan overlap bo'lgan slotlar tashlab ketiladi"""
+        TimeSlot.objects.create(
+            doctor=self.doctor,
+            date=self.monday,
+            start_time=time(9, 10),
+            end_time=time(9, 40)
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.doctor_token}')
+
+        response = self.client.post(self.url, {**self.rule, 'skip_conflicts': True}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['skipped'], 3)
+        self.assertEqual(response.data['created'], 137)
+
+    def test_bulk_create_in_past(self):
+        """O'tgan sanaga slot yaratib bo'lmaydi"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.doctor_token}')
+        rule = {**self.rule, 'date_from': str(date.today() - timedelta(days=1))}
+
+        response = self.client.post(self.url, rule, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_as_patient(self):
+        """Patient bulk slot yarata olmaydi"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.patient_token}')
+
+        response = self.client.post(self.url, self.rule, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TimeSlotOverlapTests(APITestCase):
+    """TimeSlot overlap tekshiruvi testlari"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.doctor = User.objects.create_user(
+            username='overlap_doctor',
+            password='testpass123',
+            email='overlap_doctor@test.com',
+            role='doctor'
+        )
+        self.doctor_token = str(RefreshToken.for_user(self.doctor).access_token)
+        self.day = date.today() + timedelta(days=1)
+        self.slot = TimeSlot.objects.create(
+            doctor=self.doctor,
+            date=self.day,
+            start_time=time(10, 0),
+            end_time=time(10, 30)
+        )
+
+    def test_overlap_with_booked_slot(self):
+        """Band qilingan slot bilan overlap ham rad etiladi"""
+        self.slot.is_available = False
+        self.slot.save()
+
+        with self.assertRaises(ValidationError):
+            TimeSlot.objects.create(
+                doctor=self.doctor,
+                date=self.day,
+                start_time=time(10, 15),
+                end_time=time(10, 45)
+            )
+
+    def test_adjacent_slot_allowed(self):
+        """Yonma-yon slotlar overlap hisoblanmaydi"""
+        slot = TimeSlot.objects.create(
+            doctor=self.doctor,
+            date=self.day,
+            start_time=time(10, 30),
+            end_time=time(11, 0)
+        )
+        self.assertIsNotNone(slot.pk)
+
+    def test_overlap_check_is_single_query(self):
+        """Overlap tekshiruvi bitta indexed so'rov bilan bajariladi"""
+        slot = TimeSlot(
+            doctor=self.doctor,
+            date=self.day,
+            start_time=time(11, 0),
+            end_time=time(11, 30)
+        )
+        with self.assertNumQueries(1):
+            slot.clean()
+
+    def test_api_overlap_returns_400(self):
+        """API orqali overlap slot yaratish 400 qaytaradi"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.doctor_token}')
+        response = self.client.post(reverse('timeslot_create'), {
+            'doctor': self.doctor.id,
+            'date': str(self.day),
+            'start_time': '10:10',
+            'end_time': '10:40',
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(TimeSlot.objects.filter(doctor=self.doctor).count(), 1)
+
+
+class AppointmentBookingTests(APITestCase):
+    """Appointment band qilish testlari"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('appointment_create')
+
+        self.doctor = User.objects.create_user(
+            username='booking_doctor',
+            password='testpass123',
+            email='booking_doctor@test.com',
+            role='doctor'
+        )
+        DoctorProfile.objects.create(
+            user=self.doctor,
+            specialization='neurology',
+            experience_years=3,
+            gender='female'
+        )
+        self.patient = User.objects.create_user(
+            username='booking_patient',
+            password='testpass123',
+            email='booking_patient@test.com',
+            role='patient'
+        )
+        self.other_patient = User.objects.create_user(
+            username='booking_patient2',
+            password='testpass123',
+            email='booking_patient2@test.com',
+            role='patient'
+        )
+        self.patient_token = str(RefreshToken.for_user(self.patient).access_token)
+
+        self.slot = TimeSlot.objects.create(
+            doctor=self.doctor,
+            date=date.today() + timedelta(days=1),
+            start_time=time(9, 0),
+            end_time=time(9, 30)
+        )
+
+    def test_book_appointment_success(self):
+        """Appointment muvaffaqiyatli band qilinadi"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.patient_token}')
+
+        response = self.client.post(self.url, {'timeslot': self.slot.id, 'symptoms': 'Headache'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.slot.refresh_from_db()
+        self.assertFalse(self.slot.is_available)
+        appointment = Appointment.objects.get(timeslot=self.slot)
+        self.assertEqual(appointment.patient, self.patient)
+        self.assertEqual(appointment.doctor, self.doctor)
+        self.assertEqual(appointment.symptoms, 'Headache')
+
+    def test_book_unavailable_slot(self):
+        """Band slotni qayta band qilish 400 qaytaradi"""
+        Appointment.objects.book(self.slot, self.other_patient)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.patient_token}')
+
+        response = self.client.post(self.url, {'timeslot': self.slot.id}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_lost_race_raises_slot_unavailable(self):
+        """Validatsiyadan keyin slot band bo'lsa SlotUnavailable"""
+        stale_slot = TimeSlot.objects.get(pk=self.slot.pk)
+        Appointment.objects.book(self.slot, self.other_patient)
+
+        with self.assertRaises(SlotUnavailable):
+            Appointment.objects.book(stale_slot, self.patient)
+
+        self.assertEqual(Appointment.objects.filter(timeslot=self.slot).count(), 1)
+
+    def test_lost_race_returns_409(self):
+        """API orqali poygada yutqazgan bemor 409 oladi"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.patient_token}')
+
+        with mock.patch.object(AppointmentQuerySet, 'book', side_effect=SlotUnavailable):
+            response = self.client.post(self.url, {'timeslot': self.slot.id}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+
+@skipIf(connection.vendor == 'sqlite', "SQLite locks the whole table for writers")
+class ConcurrentBookingStressTests(TransactionTestCase):
+    """Ko'p parallel bemorlar bilan band qilish stress testi"""
+
+    BOOKERS = 24
+    SLOTS = 4
+
+    def setUp(self):
+        self.doctor = User.objects.create_user(
+            username='stress_doctor',
+            password='testpass123',
+            email='stress_doctor@test.com',
+            role='doctor'
+        )
+        self.patients = [
+            User.objects.create_user(
+                username=f'stress_patient_{i}',
+                password='testpass123',
+                email=f'stress_patient_{i}@test.com',
+                role='patient'
+            )
+            for i in range(self.BOOKERS)
+        ]
+        day = date.today() + timedelta(days=1)
+        self.slots = [
+            TimeSlot.objects.create(
+                doctor=self.doctor,
+                date=day,
+                start_time=time(9 + i, 0),
+                end_time=time(9 + i, 30)
+            )
+            for i in range(self.SLOTS)
+        ]
+
+    def test_parallel_bookers_never_double_book(self):
+        """Har bir slot faqat bitta bemorga beriladi, qolganlar toza rad etiladi"""
+        slots = list(TimeSlot.objects.select_related('doctor').filter(pk__in=[slot.pk for slot in self.slots]))
+        result = run_contention(slots, self.patients, workers=self.BOOKERS)
+
+        self.assertEqual(result['outcomes'], {
+            'booked': self.SLOTS, 'conflict': self.SLOTS * (self.BOOKERS - 1),
+        })
+        self.assertGreater(result['bookings_per_second'], 0)
+        self.assertEqual(Appointment.objects.count(), self.SLOTS)
+        self.assertFalse(TimeSlot.objects.filter(is_available=True).exists())
+
+
+class BookingBenchmarkTests(TransactionTestCase):
+    """Band qilish benchmarki o'lchovlari testi"""
+
+    def test_contention_reports_throughput(self):
+        """Bitta ishchi bilan ham natijalar va tezlik hisoblanadi"""
+        doctor = User.objects.create_user(username='bench_doctor', role='doctor')
+        patients = [User.objects.create_user(username=f'bench_patient_{i}', role='patient') for i in range(2)]
+        day = date.today() + timedelta(days=1)
+        slots = [
+            TimeSlot.objects.create(doctor=doctor, date=day, start_time=time(9 + i, 0), end_time=time(9 + i, 30))
+            for i in range(2)
+        ]
+
+        result = run_contention(slots, patients, workers=1)
+
+        self.assertEqual(result['outcomes'], {'booked': 2, 'conflict': 2})
+        self.assertEqual(result['attempts'], 4)
+        self.assertGreater(result['attempts_per_second'], 0)
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+
+class DoctorTimeSlotsCacheTests(APITestCase):
+    """Doctor timeslotlari keshi testlari"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+        self.doctor = User.objects.create_user(
+            username='cache_doctor',
+            password='testpass123',
+            email='cache_doctor@test.com',
+            role='doctor'
+        )
+        self.profile = DoctorProfile.objects.create(
+            user=self.doctor,
+            specialization='dentistry',
+            experience_years=7,
+            gender='male',
+            consultation_fee=40
+        )
+        self.patient = User.objects.create_user(
+            username='cache_patient',
+            password='testpass123',
+            email='cache_patient@test.com',
+            role='patient'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.patient).access_token}'
+        )
+        self.url = reverse('doctor_timeslots', kwargs={'doctor_id': self.doctor.id})
+
+        self.day = date.today() + timedelta(days=2)
+        self.slot = TimeSlot.objects.create(
+            doctor=self.doctor,
+            date=self.day,
+            start_time=time(14, 0),
+            end_time=time(14, 30)
+        )
+
+    def test_cache_hit_skips_timeslot_queries(self):
+        """Kesh hit bo'lganda hech qanday so'rov bajarilmaydi"""
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        # JWT user ham keshdan olinadi
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        """If-None-Match mos kelsa 304 qaytariladi"""
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_new_timeslot_invalidates_cache(self):
+        """Yangi slot keshni yangilaydi"""
+        etag = self.client.get(self.url)['ETag']
+        TimeSlot.objects.create(
+            doctor=self.doctor,
+            date=self.day,
+            start_time=time(15, 0),
+            end_time=time(15, 30)
+        )
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 2)
+
+    def test_booking_invalidates_cache(self):
+        """Band qilish slotni keshdagi ro'yxatdan olib tashlaydi"""
+        self.assertEqual(len(self.client.get(self.url).json()), 1)
+        Appointment.objects.book(self.slot, self.patient)
+
+        self.assertEqual(self.client.get(self.url).json(), [])
+
+    def test_profile_update_invalidates_cache(self):
+        """DoctorProfile yangilanishi keshni yangilaydi"""
+        self.client.get(self.url)
+        self.profile.consultation_fee = 55
+        self.profile.save()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.json()[0]['doctor_info']['consultation_fee'], 55.0)
+
+
+class KeysetPaginationTests(APITestCase):
+    """Keyset (cursor) pagination testlari"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username='page_admin',
+            password='testpass123',
+            email='page_admin@test.com',
+            role='admin'
+        )
+        self.doctor = User.objects.create_user(
+            username='page_doctor',
+            password='testpass123',
+            email='page_doctor@test.com',
+            role='doctor'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}'
+        )
+
+        # Bir xil sanada ko'p slot: birinchi ordering maydoni unikal emas
+        days = [date.today() + timedelta(days=offset) for offset in (1, 2)]
+        for day in days:
+            for hour in range(8, 20):
+                TimeSlot.objects.create(
+                    doctor=self.doctor,
+                    date=day,
+                    start_time=time(hour, 0),
+                    end_time=time(hour, 30)
+                )
+        self.expected_ids = list(
+            TimeSlot.objects.order_by('date', 'start_time', 'id').values_list('id', flat=True)
+        )
+
+    def test_walk_all_pages_forward_and_back(self):
+        """Barcha sahifalarni oldinga va orqaga aylanib chiqish testi"""
+        url = f"{reverse('all_timeslots')}?page_size=5"
+        pages = []
+
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([row['id'] for row in response.data['results']])
+            last = response
+            url = response.data['next']
+
+        self.assertEqual([i for page in pages for i in page], self.expected_ids)
+        self.assertEqual(len(pages), 5)
+
+        # Oxirgi sahifadan orqaga qaytish
+        response = self.client.get(last.data['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], pages[-2])
+
+    def test_deep_page_query_count(self):
+        """Chuqur sahifa birinchi sahifa bilan bir xil so'rovlar sonini talab qiladi"""
+        url = f"{reverse('all_timeslots')}?page_size=5"
+
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(url)
+        for _ in range(3):
+            response = self.client.get(response.data['next'])
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(response.data['next'])
+
+        self.assertEqual(len(first.captured_queries), len(deep.captured_queries))
+        self.assertNotIn('OFFSET', deep.captured_queries[-1]['sql'])
+
+    def test_invalid_cursor(self):
+        """Noto'g'ri cursor 404 qaytaradi"""
+        response = self.client.get(f"{reverse('all_timeslots')}?cursor=cD1nYXJiYWdl")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_max_page_size(self):
+        """page_size maksimal qiymatdan oshmaydi"""
+        response = self.client.get(f"{reverse('all_timeslots')}?page_size=1000")
+
+        self.assertLessEqual(len(response.data['results']), 100)
+
+
+class ExportTests(APITestCase):
+    """NDJSON/CSV eksport testlari"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username='export_admin',
+            password='testpass123',
+            email='export_admin@test.com',
+            role='admin'
+        )
+        self.doctor = User.objects.create_user(
+            username='export_doctor',
+            password='testpass123',
+            email='export_doctor@test.com',
+            role='doctor'
+        )
+        self.patient = User.objects.create_user(
+            username='export_patient',
+            password='testpass123',
+            email='export_patient@test.com',
+            role='patient'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}'
+        )
+
+        day = date.today() + timedelta(days=1)
+        self.slots = [
+            TimeSlot.objects.create(
+                doctor=self.doctor,
+                date=day,
+                start_time=time(hour, 0),
+                end_time=time(hour, 30)
+            )
+            for hour in range(9, 14)
+        ]
+        Appointment.objects.book(self.slots[0], self.patient, symptoms='Cough')
+        Appointment.objects.book(self.slots[1], self.patient)
+
+    def test_appointments_ndjson_export(self):
+        """Appointmentlarni NDJSON formatida eksport qilish testi"""
+        response = self.client.get(f"{reverse('all_appointments')}?format=ndjson")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['doctor_username'], 'export_doctor')
+        self.assertEqual({row['symptoms'] for row in rows}, {'Cough', ''})
+
+    def test_timeslots_csv_export_with_filter(self):
+        """Filtr bilan timeslotlarni CSV eksport qilish testi"""
+        response = self.client.get(f"{reverse('all_timeslots')}?format=csv&is_available=true")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('timeslots.csv', response['Content-Disposition'])
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:4], ['id', 'doctor', 'doctor_username', 'date'])
+        self.assertEqual(len(rows) - 1, 3)
+
+    def test_csv_export_neutralises_formulas(self):
+        """Formula bilan boshlanadigan CSV kataklari ' bilan boshlanadi"""
+        Appointment.objects.book(self.slots[2], self.patient, symptoms='=HYPERLINK("http://x")')
+
+        response = self.client.get(f"{reverse('all_appointments')}?format=csv")
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(
+            sorted(row['symptoms'] for row in rows), ['', "'=HYPERLINK(\"http://x\")", 'Cough']
+        )
+
+        body = CSVRenderer().render([{'a': '-1+1', 'b': '@SUM(A1)', 'c': '\tx', 'd': -3, 'e': 'a=b'}])
+        self.assertEqual(body.decode().splitlines()[1], "'-1+1,'@SUM(A1),'\tx,-3,a=b")
+
+    def test_export_requires_admin(self):
+        """Eksport faqat adminlar uchun"""
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.patient).access_token}'
+        )
+
+        response = self.client.get(f"{reverse('all_appointments')}?format=csv")
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ListQueryCountTests(APITestCase):
+    """Ro'yxat endpointlarida N+1 so'rovlar yo'qligini tekshirish"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = self._user('qc_admin', 'admin')
+        self.doctor = self._doctor('qc_doctor')
+        self.patient = self._user('qc_patient', 'patient')
+        self.rounds = 0
+
+    def _user(self, username, role):
+        return User.objects.create_user(
+            username=username,
+            password='testpass123',
+            email=f'{username}@test.com',
+            role=role
+        )
+
+    def _doctor(self, username):
+        doctor = self._user(username, 'doctor')
+        DoctorProfile.objects.create(
+            user=doctor,
+            specialization='pediatrics',
+            experience_years=2,
+            gender='female'
+        )
+        return doctor
+
+    def _appointment(self, doctor, patient, day, hour):
+        slot = TimeSlot.objects.create(
+            doctor=doctor,
+            date=day,
+            start_time=time(hour, 0),
+            end_time=time(hour, 30),
+            is_available=False
+        )
+        # Bugungi slotlar o'tgan vaqtda bo'lishi mumkin, shuning uchun validatsiyasiz
+        Appointment(doctor=doctor, patient=patient, timeslot=slot).save(timeslot_claimed=True)
+
+    def _add_round(self):
+        """Har bir ro'yxatga yangi doctor va patient bilan qatorlar qo'shadi"""
+        self.rounds += 1
+        other_doctor = self._doctor(f'qc_doctor_{self.rounds}')
+        other_patient = self._user(f'qc_patient_{self.rounds}', 'patient')
+        today = date.today()
+        tomorrow = today + timedelta(days=1)
+
+        for day in (today, tomorrow):
+            self._appointment(other_doctor, self.patient, day, self.rounds)
+            self._appointment(self.doctor, other_patient, day, self.rounds)
+            TimeSlot.objects.create(
+                doctor=self.doctor,
+                date=tomorrow,
+                start_time=time(self.rounds, 30 if day == today else 45),
+                end_time=time(self.rounds, 40 if day == today else 55)
+            )
+
+    def _query_counts(self):
+        endpoints = [
+            ('my_appointments', {}, self.doctor),
+            ('my_appointments', {}, self.patient),
+            ('my_appointments', {}, self.admin),
+            ('today_appointments', {}, self.doctor),
+            ('today_appointments', {}, self.patient),
+            ('today_appointments', {}, self.admin),
+            ('all_appointments', {}, self.admin),
+            ('my_timeslots', {}, self.doctor),
+            ('all_timeslots', {}, self.admin),
+            ('doctor_timeslots', {'doctor_id': self.doctor.id}, self.patient),
+            ('available_doctors', {}, self.patient),
+            ('doctor_list', {}, self.patient),
+            ('user_list', {}, self.admin),
+        ]
+        counts = {}
+        for name, kwargs, user in endpoints:
+            cache.clear()
+            self.client.force_authenticate(user)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse(name, kwargs=kwargs))
+            self.assertEqual(response.status_code, status.HTTP_200_OK, name)
+            counts[(name, user.username)] = len(ctx.captured_queries)
+        return counts
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """So'rovlar soni qatorlar soniga bog'liq emas"""
+        self._add_round()
+        before = self._query_counts()
+
+        for _ in range(3):
+            self._add_round()
+        after = self._query_counts()
+
+        for endpoint, count in before.items():
+            with self.subTest(endpoint=endpoint):
+                self.assertEqual(after[endpoint], count)
+
+    def test_appointment_list_is_single_query(self):
+        """Appointment ro'yxati bitta so'rov bilan serializatsiya qilinadi"""
+        for _ in range(3):
+            self._add_round()
+        self.client.force_authenticate(self.admin)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('today_appointments'))
+
+        self.assertEqual(len(response.data), 6)
+
+
+class BenchmarkSeedTests(TestCase):
+    def test_seed_creates_requested_volumes(self):
+        """Seed berilgan hajmdagi ma'lumotlarni yaratadi"""
+        users = seed(doctors=4, patients=10, slots=100, appointments=30)
+
+        self.assertEqual(User.objects.filter(role='doctor').count(), 4)
+        self.assertEqual(PatientProfile.objects.count(), 10)
+        self.assertEqual(TimeSlot.objects.count(), 100)
+        self.assertEqual(Appointment.objects.count(), 30)
+        self.assertEqual(TimeSlot.objects.filter(is_available=False).count(), 30)
+        self.assertTrue(users['patient'].check_password(SEED_PASSWORD))
+
+    def test_seeded_slots_do_not_overlap(self):
+        """Seed qilingan slotlar bir-biriga to'g'ri kelmaydi"""
+        seed(doctors=2, patients=2, slots=80, appointments=0)
+
+        for slot in TimeSlot.objects.all():
+            self.assertFalse(
+                TimeSlot.objects.overlapping(slot.doctor, slot.date, slot.start_time, slot.end_time)
+                .exclude(pk=slot.pk).exists()
+            )
+
+    def test_every_url_has_a_benchmark(self):
+        """Har bir URL uchun benchmark mavjud"""
+        self.assertEqual(url_names() - {endpoint.name for endpoint in ENDPOINTS}, set())
+
+    def test_percentile(self):
+        """Percentil hisoblash testi"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
+
+
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_all()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username='rm_admin', password='testpass123', email='rm_admin@test.com', role='admin'
+        )
+        self.patient = User.objects.create_user(
+            username='rm_patient', password='testpass123', email='rm_patient@test.com', role='patient'
+        )
+
+    def test_disabled_by_default(self):
+        """Middleware sukut bo'yicha o'chirilgan"""
+        self.client.force_authenticate(self.patient)
+        response = self.client.get(reverse('my_appointments'))
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(collect()['endpoints'], {})
+
+    @override_settings(REQUEST_METRICS_ENABLED=True)
+    def test_records_metrics_per_url_name(self):
+        """Har bir URL nomi bo'yicha metrikalar yig'iladi"""
+        self.client.force_authenticate(self.patient)
+        for _ in range(3):
+            response = self.client.get(reverse('my_appointments'))
+
+        self.assertIn('serializer;dur=', response['Server-Timing'])
+        self.assertIn('queries"', response['Server-Timing'])
+
+        histograms = collect()['endpoints']['my_appointments']
+        self.assertEqual(histograms['total_ms']['count'], 3)
+        self.assertEqual(histograms['queries']['count'], 3)
+        self.assertGreaterEqual(histograms['queries']['max'], 1)
+        self.assertGreater(histograms['serializer_ms']['sum'], 0)
+        self.assertEqual(histograms['bytes']['max'], len(response.content))
+
+    @override_settings(REQUEST_METRICS_ENABLED=True)
+    def test_admin_endpoint(self):
+        """Metrikalarni faqat admin ko'ra oladi va tozalay oladi"""
+        self.client.force_authenticate(self.patient)
+        self.client.get(reverse('my_appointments'))
+        self.assertEqual(self.client.get(reverse('request_metrics')).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse('request_metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('my_appointments', response.data['endpoints'])
+
+        self.assertEqual(self.client.delete(reverse('request_metrics')).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertNotIn('my_appointments', collect()['endpoints'])
+
+    @override_settings(REQUEST_METRICS_ENABLED=True, REQUEST_METRICS_PUBLISH_INTERVAL=0)
+    def test_management_command_merges_published_snapshots(self):
+        """Buyruq boshqa jarayonlar yuborgan metrikalarni ham qo'shadi"""
+        self.client.force_authenticate(self.patient)
+        self.client.get(reverse('my_appointments'))
+        publish(registry.snapshot(), timeout=60)
+        cache.set(PROCESSES_KEY, dict(cache.get(PROCESSES_KEY), **{'request_metrics:process:other:1': 0}))
+        cache.set('request_metrics:process:other:1', registry.snapshot())
+
+        out = StringIO()
+        call_command('request_metrics', '--json', stdout=out)
+        metrics = json.loads(out.getvalue())
+
+        self.assertEqual(metrics['processes'], 2)
+        self.assertEqual(metrics['endpoints']['my_appointments']['total_ms']['count'], 2)
+
+
+class DoctorAvailabilityTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.doctor = self._doctor('av_doctor', fee=80)
+        self.other_doctor = self._doctor('av_doctor2', fee=40)
+        self.patient = User.objects.create_user(
+            username='av_patient', password='testpass123', email='av_patient@test.com', role='patient'
+        )
+        self.tomorrow = date.today() + timedelta(days=1)
+
+    def _doctor(self, username, fee):
+        doctor = User.objects.create_user(
+            username=username, password='testpass123', email=f'{username}@test.com', role='doctor'
+        )
+        DoctorProfile.objects.create(
+            user=doctor, specialization='cardiology', experience_years=5, gender='male', consultation_fee=fee
+        )
+        return doctor
+
+    def _slot(self, doctor, day, hour):
+        return TimeSlot.objects.create(doctor=doctor, date=day, start_time=time(hour, 0), end_time=time(hour, 30))
+
+    def _summary(self, doctor):
+        return DoctorAvailability.objects.filter(doctor=doctor).first()
+
+    def test_summary_follows_slot_lifecycle(self):
+        """Slot yaratish, band qilish, bekor qilish va o'chirishda xulosa yangilanadi"""
+        first = self._slot(self.doctor, self.tomorrow, 9)
+        self._slot(self.doctor, self.tomorrow, 8)
+        summary = self._summary(self.doctor)
+        self.assertEqual(summary.open_slots, 2)
+        self.assertEqual(summary.next_available_at.time(), time(8, 0))
+
+        appointment = Appointment.objects.book(first, self.patient)
+        self.assertEqual(self._summary(self.doctor).open_slots, 1)
+
+        appointment.status = 'cancelled'
+        appointment.save()
+        self.assertEqual(self._summary(self.doctor).open_slots, 2)
+
+        TimeSlot.objects.filter(doctor=self.doctor).delete()
+        self.assertIsNone(self._summary(self.doctor))
+
+    def test_bulk_create_updates_summary_incrementally(self):
+        """Bulk yaratishda xulosa slotlarni qayta sanamasdan yangilanadi"""
+        self._slot(self.doctor, self.tomorrow, 15)
+        self.client.force_authenticate(self.doctor)
+        response = self.client.post(reverse('timeslot_bulk_create'), {
+            'date_from': self.tomorrow.isoformat(),
+            'date_to': (self.tomorrow + timedelta(days=6)).isoformat(),
+            'weekdays': [0, 1, 2, 3, 4, 5, 6],
+            'start_time': '09:00',
+            'end_time': '11:00',
+            'slot_minutes': 30,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        summary = self._summary(self.doctor)
+        self.assertEqual(summary.open_slots, 29)
+        self.assertEqual(summary.next_available_at.time(), time(9, 0))
+
+        rebuilt = refresh_doctor_availability(self.doctor.pk)
+        self.assertEqual((rebuilt.open_slots, rebuilt.next_available_at), (29, summary.next_available_at))
+
+    def test_available_doctors_lists_only_doctors_with_open_slots(self):
+        """Faqat bo'sh sloti bor doktorlar ro'yxatda"""
+        booked = self._slot(self.other_doctor, self.tomorrow, 9)
+        Appointment.objects.book(booked, self.patient)
+        self._slot(self.doctor, self.tomorrow, 10)
+
+        self.client.force_authenticate(self.patient)
+        response = self.client.get(reverse('available_doctors'))
+
+        self.assertEqual([d['user']['username'] for d in response.data], ['av_doctor'])
+        self.assertEqual(response.data[0]['open_slots'], 1)
+
+    def test_sort_by_soonest_availability(self):
+        """Doktorlarni eng yaqin bo'sh vaqt bo'yicha saralash"""
+        self._slot(self.doctor, self.tomorrow + timedelta(days=1), 9)
+        self._slot(self.other_doctor, self.tomorrow, 9)
+
+        self.client.force_authenticate(self.patient)
+        response = self.client.get(reverse('available_doctors'), {'ordering': 'next_available_at'})
+
+        self.assertEqual([d['user']['username'] for d in response.data], ['av_doctor2', 'av_doctor'])
+
+    def test_summary_is_adjusted_without_recounting(self):
+        """Bron, bekor qilish va o'chirish xulosani qayta sanamasdan o'zgartiradi"""
+        soonest = self._slot(self.doctor, self.tomorrow, 8)
+        self._slot(self.doctor, self.tomorrow, 9)
+        last = self._slot(self.doctor, self.tomorrow, 10)
+
+        with CaptureQueriesContext(connection) as queries:
+            appointment = Appointment.objects.book(soonest, self.patient)
+        self.assertFalse([q for q in queries.captured_queries if 'COUNT(' in q['sql']])
+        summary = self._summary(self.doctor)
+        self.assertEqual((summary.open_slots, summary.next_available_at.time()), (2, time(9, 0)))
+
+        # Faqat status o'zgarishi xulosaga tegmaydi
+        with CaptureQueriesContext(connection) as queries:
+            Appointment.objects.filter(pk=appointment.pk).transition('confirmed')
+        self.assertFalse([q for q in queries.captured_queries if 'doctoravailability' in q['sql']])
+
+        with CaptureQueriesContext(connection) as queries:
+            Appointment.objects.filter(pk=appointment.pk).transition('cancelled')
+            last.delete()
+        self.assertFalse([q for q in queries.captured_queries if 'COUNT(' in q['sql']])
+        summary = self._summary(self.doctor)
+        self.assertEqual((summary.open_slots, summary.next_available_at.time()), (2, time(8, 0)))
+
+        rebuilt = refresh_doctor_availability(self.doctor.pk)
+        self.assertEqual((rebuilt.open_slots, rebuilt.next_available_at), (2, summary.next_available_at))
+
+    def test_stale_summary_is_refreshed_by_maintenance(self):
+        """Vaqti o'tgan xulosa o'qishda emas, maintenance'da yangilanadi"""
+        self._slot(self.doctor, self.tomorrow, 9)
+        self._slot(self.doctor, self.tomorrow, 10)
+        DoctorAvailability.objects.filter(doctor=self.doctor).update(
+            next_available_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        self.client.force_authenticate(self.patient)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('available_doctors'))
+        self.assertFalse([q for q in queries.captured_queries if not q['sql'].startswith('SELECT')])
+
+        results = run_maintenance()
+        self.assertEqual(results['stale_availability']['rows'], 1)
+        self.assertEqual(self._summary(self.doctor).next_available_at.time(), time(9, 0))
+
+    def test_stale_summary_is_refreshed(self):
+        """Vaqti o'tgan xulosa yangilanadi"""
+        self._slot(self.doctor, self.tomorrow, 9)
+        self._slot(self.doctor, self.tomorrow, 10)
+        # Birinchi slot boshlangan deb hisoblaymiz
+        later = timezone.make_aware(datetime.combine(self.tomorrow, time(9, 15)))
+
+        self.assertEqual(refresh_stale_availability(later), 1)
+        summary = self._summary(self.doctor)
+        self.assertEqual(summary.open_slots, 1)
+        self.assertEqual(summary.next_available_at.time(), time(10, 0))
+
+        after_all = timezone.make_aware(datetime.combine(self.tomorrow, time(12, 0)))
+        refresh_stale_availability(after_all)
+        self.assertIsNone(self._summary(self.doctor))
+
+
+class AsyncViewsTests(APITestCase):
+    """Async (ASGI) endpointlar sync versiyalari bilan bir xil javob qaytaradi"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.doctor = User.objects.create_user(
+            username='async_doctor', password='testpass123', email='async_doctor@test.com', role='doctor'
+        )
+        DoctorProfile.objects.create(user=self.doctor, specialization='cardiology', experience_years=4, gender='male')
+        self.patient = User.objects.create_user(
+            username='async_patient', password='testpass123', email='async_patient@test.com', role='patient'
+        )
+        today = date.today()
+        for day in (today, today + timedelta(days=1)):
+            for hour in (9, 10, 11):
+                slot = TimeSlot.objects.create(
+                    doctor=self.doctor, date=day, start_time=time(hour, 0), end_time=time(hour, 30)
+                )
+                if hour != 11:
+                    slot.is_available = False
+                    slot.save()
+                    Appointment(doctor=self.doctor, patient=self.patient, timeslot=slot).save(timeslot_claimed=True)
+
+    def _auth(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def test_async_views_match_sync_views(self):
+        """Async va sync javoblar bir xil"""
+        endpoints = [
+            ('doctor_timeslots', {'doctor_id': self.doctor.id}, self.patient, ''),
+            ('doctor_timeslots', {'doctor_id': self.doctor.id}, self.patient, f'?date={date.today()}'),
+            ('my_appointments', {}, self.patient, ''),
+            ('my_appointments', {}, self.doctor, '?page_size=2'),
+            ('my_appointments', {}, self.doctor, f'?status=pending&doctor={self.doctor.id}'),
+            ('today_appointments', {}, self.doctor, ''),
+            ('available_doctors', {}, self.patient, '?ordering=next_available_at'),
+        ]
+        for name, kwargs, user, query in endpoints:
+            with self.subTest(name=name, query=query):
+                sync = self.client.get(reverse(name, kwargs=kwargs) + query, **self._auth(user))
+                cache.clear()
+                response = self.client.get(reverse(f'{name}_async', kwargs=kwargs) + query, **self._auth(user))
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                sync_data, async_data = sync.json(), response.json()
+                if 'results' in sync_data:
+                    # Pagination linklari yo'lni o'z ichiga oladi
+                    self.assertEqual(async_data['next'] is None, sync_data['next'] is None)
+                    sync_data, async_data = sync_data['results'], async_data['results']
+                self.assertEqual(async_data, sync_data)
+                self.assertTrue(async_data)
+
+    def test_async_cursor_pages(self):
+        """Async keyset pagination keyingi sahifaga o'tadi"""
+        url = reverse('my_appointments_async') + '?page_size=3'
+        first = self.client.get(url, **self._auth(self.patient)).json()
+        second = self.client.get(first['next'], **self._auth(self.patient)).json()
+
+        self.assertEqual(len(first['results']), 3)
+        self.assertEqual(len(second['results']), 1)
+        self.assertFalse({row['id'] for row in first['results']} & {row['id'] for row in second['results']})
+
+    def test_async_errors(self):
+        """Autentifikatsiya, ruxsat va 404 xatolari"""
+        response = self.client.get(reverse('my_appointments_async'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.get(
+            reverse('doctor_timeslots_async', kwargs={'doctor_id': self.patient.id}), **self._auth(self.patient)
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.post(reverse('today_appointments_async'), **self._auth(self.doctor))
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_served_under_asgi(self):
+        """ASGI handler orqali so'rov va ETag"""
+        url = reverse('doctor_timeslots_async', kwargs={'doctor_id': self.doctor.id})
+        headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.patient).access_token}'}
+
+        response = await self.async_client.get(url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(json.loads(response.content)), 2)
+
+        response = await self.async_client.get(url, headers={**headers, 'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class DoctorCalendarTests(APITestCase):
+    """Doctor haftalik/oylik kalendar endpointi testlari"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.doctor = User.objects.create_user(
+            username='cal_doctor', password='testpass123', email='cal_doctor@test.com', role='doctor'
+        )
+        self.patient = User.objects.create_user(
+            username='cal_patient', password='testpass123', email='cal_patient@test.com', role='patient'
+        )
+        self.monday = next_weekday(0)
+        self.booked = TimeSlot.objects.create(
+            doctor=self.doctor, date=self.monday, start_time=time(10, 0), end_time=time(10, 30)
+        )
+        TimeSlot.objects.create(doctor=self.doctor, date=self.monday, start_time=time(9, 0), end_time=time(9, 30))
+        TimeSlot.objects.create(
+            doctor=self.doctor, date=self.monday + timedelta(days=7), start_time=time(9, 0), end_time=time(9, 30)
+        )
+        self.appointment = Appointment.objects.book(self.booked, self.patient)
+        self.client.force_authenticate(self.doctor)
+        self.url = reverse('doctor_calendar')
+
+    def test_week_is_columnar_and_single_query(self):
+        """Hafta bitta so'rovda ustunli shaklda qaytadi"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'date': self.monday + timedelta(days=3)})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['start'], self.monday.isoformat())
+        self.assertEqual(len(response.data['days']), 7)
+        monday = response.data['days'][0]
+        self.assertEqual(monday['date'], self.monday.isoformat())
+        self.assertEqual(monday['start_time'], ['09:00:00', '10:00:00'])
+        self.assertEqual(monday['end_time'], ['09:30:00', '10:30:00'])
+        self.assertEqual(monday['is_available'], [True, False])
+        self.assertEqual(monday['appointment_id'], [None, self.appointment.pk])
+        self.assertEqual(monday['status'], [None, 'pending'])
+        self.assertEqual(monday['patient'], [None, 'cal_patient'])
+        self.assertEqual(response.data['days'][1]['slot_id'], [])
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url, {'date': self.monday})
+        self.assertEqual(cached.data, response.data)
+
+    def test_month_reuses_cached_weeks(self):
+        """Oy keshlangan haftalardan yig'iladi"""
+        response = self.client.get(self.url, {'date': self.monday, 'span': 'month'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['start'], self.monday.replace(day=1).isoformat())
+        slots = sum(len(day['slot_id']) for day in response.data['days'])
+        next_monday = self.monday + timedelta(days=7)
+        self.assertEqual(slots, 3 if next_monday.month == self.monday.month else 2)
+
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {'date': self.monday})
+
+    def test_appointment_change_invalidates_week(self):
+        """Appointment o'zgarsa kesh yangilanadi"""
+        self.client.get(self.url, {'date': self.monday})
+
+        self.appointment.status = 'confirmed'
+        self.appointment.save()
+        response = self.client.get(self.url, {'date': self.monday})
+
+        self.assertEqual(response.data['days'][0]['status'], [None, 'confirmed'])
+
+    def test_validation_and_permissions(self):
+        """Noto'g'ri parametrlar va doctor bo'lmagan foydalanuvchi"""
+        response = self.client.get(self.url, {'span': 'year'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(self.patient)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class BulkStatusTransitionTests(APITestCase):
+    """Appointmentlar holatini ommaviy o'zgartirish testlari"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.doctor = User.objects.create_user(
+            username='bulk_doctor', password='testpass123', email='bulk_doctor@test.com', role='doctor'
+        )
+        DoctorProfile.objects.create(
+            user=self.doctor, specialization='cardiology', experience_years=5, gender='male'
+        )
+        self.other_doctor = User.objects.create_user(
+            username='bulk_other', password='testpass123', email='bulk_other@test.com', role='doctor'
+        )
+        self.patient = User.objects.create_user(
+            username='bulk_patient', password='testpass123', email='bulk_patient@test.com', role='patient'
+        )
+        self.day = date.today() + timedelta(days=3)
+        self.appointments = [self._book(self.doctor, hour) for hour in range(9, 14)]
+        self.foreign = self._book(self.other_doctor, 9)
+        self.client.force_authenticate(self.doctor)
+        self.url = reverse('appointment_bulk_status')
+
+    def _book(self, doctor, hour):
+        slot = TimeSlot.objects.create(
+            doctor=doctor, date=self.day, start_time=time(hour, 0), end_time=time(hour, 30)
+        )
+        return Appointment.objects.book(slot, self.patient)
+
+    def test_state_machine_is_shared(self):
+        """Bitta va ommaviy o'zgartirish bir xil qoidaga bo'ysunadi"""
+        self.assertTrue(Appointment.can_transition('pending', 'confirmed'))
+        self.assertFalse(Appointment.can_transition('completed', 'cancelled'))
+        self.assertEqual(sorted(Appointment.allowed_sources('cancelled')), ['confirmed', 'pending'])
+
+        appointment = self.appointments[0]
+        appointment.status = 'completed'
+        with self.assertRaises(ValidationError):
+            appointment.save()
+
+    def test_bulk_confirm_reports_rejected(self):
+        """Ruxsat etilmagan va begona appointmentlar rad etiladi"""
+        done = self.appointments[0]
+        Appointment.objects.filter(pk=done.pk).update(status='completed')
+        ids = [a.pk for a in self.appointments] + [self.foreign.pk, 999999]
+
+        response = self.client.post(self.url, {'ids': ids, 'status': 'confirmed'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], sorted(a.pk for a in self.appointments[1:]))
+        self.assertEqual(response.data['rejected'], sorted([done.pk, self.foreign.pk, 999999]))
+        self.assertEqual(Appointment.objects.filter(status='confirmed').count(), 4)
+        self.assertEqual(Appointment.objects.get(pk=self.foreign.pk).status, 'pending')
+
+    def test_end_of_day_completion_is_set_based(self):
+        """Kun oxirida yakunlash appointmentlar soniga bog'liq bo'lmagan so'rovlar bilan"""
+        Appointment.objects.filter(doctor=self.doctor).update(status='confirmed')
+        updated = Appointment.objects.filter(doctor=self.doctor, timeslot__date=self.day)
+
+        with CaptureQueriesContext(connection) as queries:
+            ids = updated.transition('completed')
+
+        writes = [q for q in queries.captured_queries if q['sql'].startswith(('SELECT', 'UPDATE'))]
+        self.assertEqual(len(writes), 2)
+        self.assertEqual(sorted(ids), sorted(a.pk for a in self.appointments))
+        self.assertFalse(Appointment.objects.exclude(status='completed').filter(doctor=self.doctor).exists())
+
+    def test_bulk_cancel_frees_slots_and_refreshes_caches(self):
+        """Bekor qilish slotlarni bitta UPDATE bilan bo'shatadi va keshni yangilaydi"""
+        timeslots_url = reverse('doctor_timeslots', kwargs={'doctor_id': self.doctor.pk})
+        self.client.force_authenticate(self.patient)
+        self.assertEqual(len(json.loads(self.client.get(timeslots_url).content)), 0)
+
+        self.client.force_authenticate(self.doctor)
+        response = self.client.post(self.url, {'date': self.day, 'status': 'cancelled'}, format='json')
+
+        self.assertEqual(len(response.data['updated']), 5)
+        self.assertEqual(response.data['rejected'], [])
+        self.assertEqual(TimeSlot.objects.filter(doctor=self.doctor, is_available=True).count(), 5)
+        self.assertEqual(DoctorAvailability.objects.get(doctor=self.doctor).open_slots, 5)
+        self.client.force_authenticate(self.patient)
+        self.assertEqual(len(json.loads(self.client.get(timeslots_url).content)), 5)
+
+    def test_past_appointments_are_never_cancelled(self):
+        """O'tgan appointment hech qaysi yo'l bilan bekor qilinmaydi"""
+        past_slot = TimeSlot.objects.bulk_create([TimeSlot(
+            doctor=self.doctor, date=date.today() - timedelta(days=1),
+            start_time=time(9, 0), end_time=time(9, 30), is_available=False
+        )])[0]
+        past = Appointment.objects.bulk_create([Appointment(
+            doctor=self.doctor, patient=self.patient, timeslot=past_slot, status='confirmed'
+        )])[0]
+
+        # Admin action va bulk view shu queryset metodini chaqiradi
+        self.assertEqual(Appointment.objects.filter(pk=past.pk).transition('cancelled'), [])
+
+        response = self.client.post(self.url, {'ids': [past.pk], 'status': 'cancelled'}, format='json')
+        self.assertEqual(response.data['rejected'], [past.pk])
+
+        response = self.client.delete(reverse('appointment_cancel', kwargs={'pk': past.pk}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        past.refresh_from_db()
+        past_slot.refresh_from_db()
+        self.assertEqual(past.status, 'confirmed')
+        self.assertFalse(past_slot.is_available)
+
+    def test_validation_and_permissions(self):
+        """Noto'g'ri so'rovlar va bemor uchun taqiq"""
+        response = self.client.post(self.url, {'status': 'confirmed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(
+            self.url, {'ids': [1], 'date': self.day, 'status': 'confirmed'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(self.patient)
+        response = self.client.post(self.url, {'ids': [1], 'status': 'confirmed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AppointmentPersistenceTests(APITestCase):
+    """Appointmentni saqlashda ortiqcha so'rovlar yo'qligi testlari"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.doctor = User.objects.create_user(
+            username='lean_doctor', password='testpass123', email='lean_doctor@test.com', role='doctor'
+        )
+        DoctorProfile.objects.create(
+            user=self.doctor, specialization='cardiology', experience_years=5, gender='male'
+        )
+        self.patient = User.objects.create_user(
+            username='lean_patient', password='testpass123', email='lean_patient@test.com', role='patient'
+        )
+        self.day = date.today() + timedelta(days=2)
+        self.slots = [
+            TimeSlot.objects.create(
+                doctor=self.doctor, date=self.day, start_time=time(hour, 0), end_time=time(hour, 30)
+            )
+            for hour in range(8, 18)
+        ]
+
+    def test_booking_takes_fixed_number_of_queries(self):
+        """Bron qilish doimiy va kam so'rov bilan bajariladi"""
+        self.client.force_authenticate(self.patient)
+        url = reverse('appointment_create')
+        self.client.post(url, {'timeslot': self.slots[0].pk}, format='json')
+
+        for slot in self.slots[1:3]:
+            # Pre-check, claim, insert, availability adjustment (with their
+            # savepoints) and the doctor profile for the response
+            with self.assertNumQueries(11):
+                response = self.client.post(url, {'timeslot': slot.pk}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_status_change_writes_only_changed_fields(self):
+        """Holat o'zgarishi qayta o'qishsiz va faqat o'zgargan ustunlar bilan saqlanadi"""
+        appointment = Appointment.objects.book(self.slots[0], self.patient)
+        appointment = Appointment.objects.select_related('timeslot').get(pk=appointment.pk)
+
+        appointment.status = 'cancelled'
+        with CaptureQueriesContext(connection) as queries:
+            appointment.save()
+
+        sql = [q['sql'] for q in queries.captured_queries]
+        self.assertFalse([q for q in sql if q.startswith('SELECT') and 'appointments_appointment' in q])
+        update = next(q for q in sql if q.startswith('UPDATE "appointments_appointment"'))
+        self.assertIn('"status"', update)
+        self.assertNotIn('"notes"', update)
+        self.assertTrue(TimeSlot.objects.get(pk=self.slots[0].pk).is_available)
+        self.assertTrue(appointment.timeslot.is_available)
+
+        appointment.status = 'confirmed'
+        with self.assertRaises(ValidationError):
+            appointment.save()
+
+    def test_deferred_status_is_still_saved(self):
+        """Kechiktirilgan maydon o'zgartirilsa ham saqlanadi"""
+        appointment = Appointment.objects.book(self.slots[0], self.patient)
+        appointment = Appointment.objects.only('id', 'doctor', 'patient', 'timeslot').get(pk=appointment.pk)
+
+        appointment.status = 'confirmed'
+        appointment.save()
+
+        self.assertEqual(Appointment.objects.get(pk=appointment.pk).status, 'confirmed')
+
+    def test_past_appointment_can_complete_but_not_cancel(self):
+        """O'tgan appointment yakunlanadi, lekin bekor qilinmaydi"""
+        appointment = Appointment.objects.book(self.slots[0], self.patient)
+        TimeSlot.objects.filter(pk=self.slots[0].pk).update(date=date.today() - timedelta(days=1))
+
+        appointment = Appointment.objects.get(pk=appointment.pk)
+        appointment.status = 'cancelled'
+        with self.assertRaises(ValidationError):
+            appointment.save()
+
+        appointment = Appointment.objects.get(pk=appointment.pk)
+        appointment.status = 'confirmed'
+        appointment.save()
+        appointment.status = 'completed'
+        appointment.save()
+        self.assertEqual(Appointment.objects.get(pk=appointment.pk).status, 'completed')
+
+
+class ScheduleMaintenanceTests(TestCase):
+    """Eskirgan slotlarni o'chirish va appointmentlarni arxivlash testlari"""
+
+    def setUp(self):
+        cache.clear()
+        self.doctor = User.objects.create_user(
+            username='old_doctor', password='testpass123', email='old_doctor@test.com', role='doctor'
+        )
+        self.patient = User.objects.create_user(
+            username='old_patient', password='testpass123', email='old_patient@test.com', role='patient'
+        )
+        self.today = timezone.localdate()
+        long_ago = self.today - timedelta(days=400)
+        yesterday = self.today - timedelta(days=1)
+        # Past rows cannot pass model validation, so they are inserted directly
+        self.expired = TimeSlot.objects.bulk_create([
+            TimeSlot(doctor=self.doctor, date=long_ago, start_time=time(hour, 0), end_time=time(hour, 30))
+            for hour in range(8, 13)
+        ])
+        self.recent = TimeSlot.objects.bulk_create([
+            TimeSlot(doctor=self.doctor, date=yesterday, start_time=time(9, 0), end_time=time(9, 30))
+        ])[0]
+        booked = TimeSlot.objects.bulk_create([
+            TimeSlot(doctor=self.doctor, date=long_ago, start_time=time(hour, 0), end_time=time(hour, 30),
+                     is_available=hour == 14)
+            for hour in range(14, 18)
+        ])
+        statuses = ['cancelled', 'completed', 'completed', 'confirmed']
+        self.appointments = Appointment.objects.bulk_create([
+            Appointment(doctor=self.doctor, patient=self.patient, timeslot=slot, status=status, notes='note')
+            for slot, status in zip(booked, statuses)
+        ])
+
+    def test_expires_and_archives_in_batches(self):
+        """Slotlar va appointmentlar kichik partiyalarda ko'chiriladi"""
+        results = run_maintenance(today=self.today, slot_days=1, archive_months=6, batch_size=2)
+
+        self.assertEqual(results['expired_timeslots']['rows'], 5)
+        self.assertEqual(results['expired_timeslots']['batches'], 3)
+        self.assertEqual(results['archived_appointments']['rows'], 3)
+        self.assertGreater(results['archived_appointments']['rows_per_second'], 0)
+
+        # Recent slots and unfinished appointments stay
+        self.assertTrue(TimeSlot.objects.filter(pk=self.recent.pk).exists())
+        self.assertEqual(list(Appointment.objects.values_list('status', flat=True)), ['confirmed'])
+        self.assertEqual(TimeSlot.objects.count(), 2)
+
+        archived = ArchivedAppointment.objects.get(pk=self.appointments[0].pk)
+        self.assertEqual(archived.status, 'cancelled')
+        self.assertEqual(archived.start_time, time(14, 0))
+        self.assertEqual(archived.notes, 'note')
+
+        again = run_maintenance(today=self.today, slot_days=1, archive_months=6)
+        self.assertEqual(again['expired_timeslots']['rows'], 0)
+        self.assertEqual(again['archived_appointments']['rows'], 0)
+
+    def test_bumps_doctor_cache_version(self):
+        """Ta'sirlangan doctor keshi yangilanadi"""
+        version = get_timeslots_version(self.doctor.pk)
+        run_maintenance(today=self.today)
+        self.assertNotEqual(get_timeslots_version(self.doctor.pk), version)
+
+    def test_purge_invalidates_cached_listing(self):
+        """Tozalashdan keyin keshlangan ro'yxat va availability yangilanadi"""
+        TimeSlot.objects.create(
+            doctor=self.doctor, date=self.today + timedelta(days=2), start_time=time(10, 0), end_time=time(10, 30)
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.patient).access_token}')
+        url = reverse('doctor_timeslots', kwargs={'doctor_id': self.doctor.id})
+        client.get(url)
+        with self.assertNumQueries(0):
+            client.get(url)
+
+        run_maintenance(today=self.today, slot_days=1, archive_months=6)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(any('appointments_timeslot' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(DoctorAvailability.objects.get(doctor=self.doctor).open_slots, 1)
+
+    def test_months_before_clamps_day(self):
+        """Oy ayirish oy oxirini to'g'ri hisoblaydi"""
+        self.assertEqual(months_before(date(2026, 3, 31), 1), date(2026, 2, 28))
+        self.assertEqual(months_before(date(2026, 1, 15), 13), date(2024, 12, 15))
+
+    def test_command_reports_rows_per_second(self):
+        """Buyruq qatorlar/sekund hisobotini chiqaradi"""
+        out = StringIO()
+        call_command('expire_schedule', '--batch-size', '2', '--pause', '0', stdout=out)
+        self.assertIn('expired_timeslots', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        self.assertEqual(ArchivedAppointment.objects.count(), 3)
+
+
+class QueryPlanTests(TestCase):
+    """Issiq so'rovlar indeksdan foydalanishini tekshirish testlari"""
+
+    def test_hot_endpoints_are_benchmarked(self):
+        """Har bir issiq endpoint benchmark ro'yxatida bor"""
+        labels = {endpoint.label for endpoint in ENDPOINTS}
+        self.assertEqual(set(HOT_ENDPOINTS) - labels, set())
+
+    def test_sqlite_seq_scan_pattern(self):
+        """To'liq jadval skani indeksli skandan ajratiladi"""
+        pattern = SEQ_SCAN_PATTERNS['sqlite']
+        self.assertEqual(pattern.findall('SCAN appointments_timeslot'), ['appointments_timeslot'])
+        self.assertEqual(pattern.findall('SCAN appointments_timeslot USING INDEX timeslot_open_idx'), [])
+        self.assertEqual(pattern.findall('SEARCH users_user USING INTEGER PRIMARY KEY (rowid=?)'), [])
+
+    @skipIf(connection.vendor != 'sqlite', 'Plan format checked on SQLite')
+    def test_background_querysets_use_indexes(self):
+        """Fon so'rovlari ketma-ket skanga tushmaydi"""
+        context = BenchmarkContext(seed(doctors=3, patients=10, slots=300, appointments=100), 1)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        command = ExplainCommand()
+
+        for name, build in HOT_QUERYSETS.items():
+            plan = command.explain(command.sql_for(build(context)))
+            self.assertEqual(SEQ_SCAN_PATTERNS['sqlite'].findall(plan), [], f'{name}: {plan}')
+
+
+class RowSerializerTests(APITestCase):
+    """values() qatorlaridan yasalgan javob model serializer javobi bilan bir xil"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username='rows_admin', password='testpass123', email='rows_admin@test.com', role='admin'
+        )
+        self.doctor = User.objects.create_user(
+            username='rows_doctor', password='testpass123', email='rows_doctor@test.com', role='doctor',
+            phone='+998901234567'
+        )
+        DoctorProfile.objects.create(
+            user=self.doctor, specialization='cardiology', experience_years=4, gender='male',
+            consultation_fee=Decimal('150000.50')
+        )
+        # Profilsiz doctor: specialization None bo'lishi kerak
+        self.bare_doctor = User.objects.create_user(
+            username='rows_bare', password='testpass123', email='rows_bare@test.com', role='doctor'
+        )
+        self.patient = User.objects.create_user(
+            username='rows_patient', password='testpass123', email='rows_patient@test.com', role='patient'
+        )
+        today = date.today()
+        yesterday, tomorrow = today - timedelta(days=1), today + timedelta(days=1)
+        rows = [
+            (self.doctor, yesterday, 9, Appointment.Status.COMPLETED),
+            (self.doctor, today, 0, Appointment.Status.CONFIRMED),
+            (self.bare_doctor, today, 0, Appointment.Status.PENDING),
+            (self.doctor, tomorrow, 9, Appointment.Status.CANCELLED),
+            (self.doctor, tomorrow, 10, Appointment.Status.CONFIRMED),
+            (self.bare_doctor, tomorrow, 11, Appointment.Status.PENDING),
+        ]
+        for doctor, day, hour, appointment_status in rows:
+            # O'tgan slotlar save() validatsiyasidan o'tmaydi
+            slot = TimeSlot.objects.bulk_create([TimeSlot(
+                doctor=doctor, date=day, start_time=time(hour, 0), end_time=time(hour, 30), is_available=False
+            )])[0]
+            Appointment(
+                doctor=doctor, patient=self.patient, timeslot=slot, status=appointment_status,
+                notes="Bosh og'rig'i — ünïcode", symptoms='"quoted"\nline'
+            ).save(timeslot_claimed=True)
+        for hour in (12, 13):
+            TimeSlot.objects.create(doctor=self.doctor, date=tomorrow, start_time=time(hour, 0), end_time=time(hour, 30))
+
+    def _both(self, name, user, kwargs=None, data=None):
+        self.client.force_authenticate(user)
+        url = reverse(name, kwargs=kwargs)
+        cache.clear()
+        fast = self.client.get(url, data)
+        cache.clear()
+        with override_settings(FAST_LIST_SERIALIZERS=False):
+            slow = self.client.get(url, data)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK, name)
+        return fast, slow
+
+    def test_output_is_byte_identical(self):
+        """Tez va oddiy serializatsiya bir xil baytlarni qaytaradi"""
+        endpoints = [
+            ('my_appointments', self.doctor, None),
+            ('my_appointments', self.patient, None),
+            ('my_appointments', self.admin, None),
+            ('my_appointments_async', self.patient, None),
+            ('today_appointments', self.doctor, None),
+            ('today_appointments', self.admin, None),
+            ('today_appointments_async', self.admin, None),
+            ('all_appointments', self.admin, None),
+            ('doctor_timeslots', self.patient, {'doctor_id': self.doctor.pk}),
+            ('doctor_timeslots_async', self.patient, {'doctor_id': self.doctor.pk}),
+        ]
+        for name, user, kwargs in endpoints:
+            with self.subTest(endpoint=name, user=user.username):
+                fast, slow = self._both(name, user, kwargs)
+                self.assertEqual(fast.content, slow.content)
+
+        body = json.loads(self._both('all_appointments', self.admin)[0].content)
+        self.assertEqual(
+            sorted(row['can_cancel'] for row in body['results']), [False, False, False, False, True, True]
+        )
+
+    def test_cursor_pages_are_identical(self):
+        """Keyingi sahifalar ham bir xil"""
+        fast, slow = self._both('all_appointments', self.admin, data={'page_size': 2})
+        self.assertEqual(fast.content, slow.content)
+        next_url = json.loads(fast.content)['next']
+
+        fast, slow = self._both('all_appointments', self.admin, data={'page_size': 2})
+        self.client.force_authenticate(self.admin)
+        fast = self.client.get(next_url)
+        with override_settings(FAST_LIST_SERIALIZERS=False):
+            slow = self.client.get(next_url)
+        self.assertEqual(fast.content, slow.content)
+        self.assertEqual(len(json.loads(fast.content)['results']), 2)
+
+    def test_model_serializer_is_bypassed(self):
+        """JSON ro'yxati model serializerni chaqirmaydi, boshqa formatlar chaqiradi"""
+        self.client.force_authenticate(self.admin)
+        with mock.patch(
+            'apps.appointments.serializers.AppointmentSerializer.to_representation', side_effect=AssertionError
+        ):
+            response = self.client.get(reverse('all_appointments'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Eksport o'z values_list() proyeksiyasidan foydalanadi
+        response = self.client.get(reverse('all_appointments'), {'format': 'ndjson'})
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 6)
+
+    def test_benchmark_compares_both_paths(self):
+        """Mikro-benchmark ikkala yo'l uchun rows/s qaytaradi"""
+        results = SerializerBenchmarkCommand().run({
+            'doctors': 3, 'patients': 10, 'slots': 200, 'appointments': 50, 'rows': 40, 'rounds': 1,
+        })
+
+        self.assertEqual(set(results), {'appointments', 'available_timeslots'})
+        for result in results.values():
+            self.assertEqual(result['rows']['rows'], 40)
+            self.assertGreater(result['model']['serialize_rows_per_second'], 0)
+            self.assertGreater(result['rows']['end_to_end_rows_per_second'], 0)
+
+
+class ORJSONCodecTests(APITestCase):
+    """orjson renderer/parser DRF JSON klasslari bilan mos ishlashi testi"""
+
+    payload = {
+        'id': 1,
+        'fee': Decimal('150000.50'),
+        'date': date(2026, 3, 1),
+        'start_time': time(9, 30),
+        'precise_time': time(9, 30, 0, 125000),
+        'created_at': datetime(2026, 3, 1, 9, 30, 15, 250000, tzinfo=dt_timezone.utc),
+        'local': datetime(2026, 3, 1, 14, 30, tzinfo=dt_timezone(timedelta(hours=5))),
+        'duration': timedelta(minutes=30),
+        'label': gettext_lazy('Pending'),
+        'notes': "Bosh og'rig'i — ünïcode \u2028\u2029 \"quoted\"",
+        'nested': [{1: True, 'none': None}, (1.5, 'x')],
+        'big': 2 ** 70,
+    }
+
+    def test_renders_same_bytes_as_drf(self):
+        """orjson DRF JSONRenderer bilan bir xil baytlarni beradi"""
+        self.assertEqual(ORJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+        small = {key: value for key, value in self.payload.items() if key != 'big'}
+        self.assertEqual(ORJSONRenderer().render(small), JSONRenderer().render(small))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_floats_orjson_writes_differently_fall_back(self):
+        """NaN/Infinity xato beradi, eksponentali floatlar DRF kabi yoziladi"""
+        for value in (float('nan'), float('inf'), float('-inf'), Decimal('NaN')):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                ORJSONRenderer().render({'a': [{'b': value}]})
+
+        for value in (1e16, -2.5e20, 1e-05, 3e-9, 1e-4, 9999999999999998.0, 0.0, 1.5):
+            with self.subTest(value=value):
+                data = {'a': [value, {'b': (value,)}]}
+                self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_falls_back_to_stdlib(self):
+        """Indent so'ralganda stdlib renderer ishlatiladi"""
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            ORJSONRenderer().render(self.payload, media_type),
+            JSONRenderer().render(self.payload, media_type)
+        )
+
+    def test_parser_matches_drf(self):
+        """Parser to'g'ri JSONni o'qiydi va noto'g'risini rad etadi"""
+        body = '{"a": [1, 2.5, "ü"], "b": null}'.encode()
+        self.assertEqual(ORJSONParser().parse(BytesIO(body)), {'a': [1, 2.5, 'ü'], 'b': None})
+
+        # 64 bitdan katta butun sonlar aniq saqlanadi
+        for number in (123456789012345678901234567890, 2 ** 64, -(2 ** 63) - 1):
+            with self.subTest(number=number):
+                body = b'{"id": %d, "x": 1.5}' % number
+                self.assertEqual(ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+                self.assertEqual(ORJSONParser().parse(BytesIO(body))['id'], number)
+
+        for bad in (b'{"a": NaN}', b'{"a": 1', b'', b'{"a": 12345678901234567890'):
+            with self.subTest(body=bad), self.assertRaises(ParseError):
+                ORJSONParser().parse(BytesIO(bad))
+
+        latin = '{"name": "Jüri"}'.encode('latin-1')
+        self.assertEqual(
+            ORJSONParser().parse(BytesIO(latin), parser_context={'encoding': 'latin-1'}), {'name': 'Jüri'}
+        )
+
+    def test_registered_as_default(self):
+        """API javoblari va so'rovlari orjson orqali o'tadi"""
+        doctor = User.objects.create_user(
+            username='orjson_doctor', password='testpass123', email='orjson_doctor@test.com', role='doctor'
+        )
+        self.client.force_authenticate(doctor)
+        day = date.today() + timedelta(days=2)
+
+        response = self.client.post(reverse('timeslot_create'), {
+            'doctor': doctor.pk, 'date': day.isoformat(), 'start_time': '09:00', 'end_time': '09:30',
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+        self.assertIsInstance(response.renderer_context['request'].parsers[0], ORJSONParser)
+        self.assertEqual(json.loads(response.content)['start_time'], '09:00:00')
+
+    def test_benchmark_compares_codecs(self):
+        """Benchmark ikkala codec uchun natija qaytaradi"""
+        results = JSONBenchmarkCommand().run({
+            'sizes': [5, 20], 'rounds': 1, 'doctors': 3, 'patients': 10, 'slots': 100,
+        })
+
+        self.assertEqual(set(results), {5, 20})
+        self.assertGreater(results[20]['bytes'], results[5]['bytes'])
+        self.assertGreater(results[20]['orjson']['render_mb_per_second'], 0)
+
+
+class TimeSlotSearchTests(APITestCase):
+    """Barcha doctorlar bo'yicha bo'sh slot qidiruvi testlari"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.patient = User.objects.create_user(
+            username='search_patient', password='testpass123', email='search_patient@test.com', role='patient'
+        )
+        self.cheap = self._doctor('search_cheap', 'cardiology', '100.00')
+        self.pricey = self._doctor('search_pricey', 'cardiology', '300.00')
+        self.neuro = self._doctor('search_neuro', 'neurology', '50.00')
+        self.bare = User.objects.create_user(
+            username='search_bare', password='testpass123', email='search_bare@test.com', role='doctor'
+        )
+        self.day = date.today() + timedelta(days=1)
+
+        self.slots = {
+            'cheap_9': self._slot(self.cheap, self.day, 9),
+            'pricey_8': self._slot(self.pricey, self.day, 8),
+            'pricey_9': self._slot(self.pricey, self.day, 9),
+            'cheap_next': self._slot(self.cheap, self.day + timedelta(days=1), 7),
+            'cheap_late': self._slot(self.cheap, self.day + timedelta(days=20), 7),
+            'neuro_9': self._slot(self.neuro, self.day, 9),
+            'bare_9': self._slot(self.bare, self.day, 9),
+            'booked': self._slot(self.cheap, self.day, 10, is_available=False),
+            # O'tgan slot: bugun yarim tundan keyin boshlangan
+            'past': TimeSlot.objects.bulk_create([TimeSlot(
+                doctor=self.cheap, date=date.today(), start_time=time(0, 0), end_time=time(0, 1)
+            )])[0],
+        }
+        self.client.force_authenticate(self.patient)
+
+    def _doctor(self, username, specialization, fee):
+        doctor = User.objects.create_user(
+            username=username, password='testpass123', email=f'{username}@test.com', role='doctor'
+        )
+        DoctorProfile.objects.create(
+            user=doctor, specialization=specialization, experience_years=3, gender='female',
+            consultation_fee=Decimal(fee)
+        )
+        return doctor
+
+    def _slot(self, doctor, day, hour, is_available=True):
+        return TimeSlot.objects.create(
+            doctor=doctor, date=day, start_time=time(hour, 0), end_time=time(hour, 30), is_available=is_available
+        )
+
+    def _search(self, **params):
+        response = self.client.get(reverse('timeslot_search'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return json.loads(response.content)
+
+    def _ids(self, *names):
+        return [self.slots[name].pk for name in names]
+
+    def test_open_slots_of_specialization_soonest_first(self):
+        """Mutaxassislik bo'yicha bo'sh slotlar boshlanish vaqti tartibida"""
+        body = self._search(specialization='cardiology')
+
+        self.assertEqual(
+            [row['id'] for row in body['results']], self._ids('pricey_8', 'cheap_9', 'pricey_9', 'cheap_next')
+        )
+        first = body['results'][0]
+        self.assertEqual(first['doctor_info']['username'], 'search_pricey')
+        self.assertEqual(first['doctor_info']['consultation_fee'], 300.0)
+
+    def test_fee_and_date_window(self):
+        """Narx chegarasi va sana oralig'i qo'llanadi"""
+        body = self._search(specialization='cardiology', max_fee='150')
+        self.assertEqual([row['id'] for row in body['results']], self._ids('cheap_9', 'cheap_next'))
+
+        later = self.day + timedelta(days=1)
+        body = self._search(date_from=later.isoformat(), date_to=(later + timedelta(days=30)).isoformat())
+        self.assertEqual([row['id'] for row in body['results']], self._ids('cheap_next', 'cheap_late'))
+
+        body = self._search(max_fee='60')
+        self.assertEqual([row['id'] for row in body['results']], self._ids('neuro_9'))
+
+    def test_keyset_pages_cover_every_slot_once(self):
+        """Kursor sahifalari har bir slotni bir marta qaytaradi"""
+        # Bir vaqtdagi slotlar id bo'yicha
+        expected = self._ids('pricey_8', 'cheap_9', 'pricey_9', 'neuro_9', 'cheap_next')
+        body = self._search(page_size=2)
+        seen = [row['id'] for row in body['results']]
+        while body['next']:
+            with self.assertNumQueries(1):
+                response = self.client.get(body['next'])
+            body = json.loads(response.content)
+            seen.extend(row['id'] for row in body['results'])
+
+        self.assertEqual(seen, expected)
+
+    def test_single_query(self):
+        """Qidiruv bitta so'rov bilan bajariladi"""
+        with self.assertNumQueries(1):
+            self.client.get(reverse('timeslot_search'), {'specialization': 'cardiology', 'max_fee': '500'})
+
+    def test_slot_freed_by_cancellation_can_be_booked_again(self):
+        """Bekor qilingan slot qidiruvda chiqadi va uni qayta bron qilish mumkin"""
+        slot = self.slots['cheap_9']
+        response = self.client.post(reverse('appointment_create'), {'timeslot': slot.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        first = response.data['id']
+        response = self.client.delete(reverse('appointment_cancel', kwargs={'pk': first}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        found = self._search(specialization='cardiology')['results']
+        self.assertIn(slot.pk, [row['id'] for row in found])
+
+        other = User.objects.create_user(
+            username='search_other', password='testpass123', email='search_other@test.com', role='patient'
+        )
+        self.client.force_authenticate(other)
+        response = self.client.post(reverse('appointment_create'), {'timeslot': slot.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.content)
+        self.assertEqual(Appointment.objects.get(timeslot=slot).patient, other)
+        self.assertEqual(ArchivedAppointment.objects.get(pk=first).status, 'cancelled')
+        summary = DoctorAvailability.objects.get(doctor=self.cheap)
+        rebuilt = refresh_doctor_availability(self.cheap.pk)
+        self.assertEqual((summary.open_slots, summary.next_available_at), (rebuilt.open_slots, rebuilt.next_available_at))
+        self.assertNotIn(slot.pk, [row['id'] for row in self._search(specialization='cardiology')['results']])
+
+        # Band slot avvalgidek rad etiladi
+        response = self.client.post(reverse('appointment_create'), {'timeslot': slot.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_queries(self):
+        """Noto'g'ri parametrlar 400 qaytaradi"""
+        today = date.today()
+        for params in (
+            {'specialization': 'astrology'},
+            {'date_from': today.isoformat(), 'date_to': (today - timedelta(days=1)).isoformat()},
+            {'date_from': today.isoformat(), 'date_to': (today + timedelta(days=200)).isoformat()},
+            {'max_fee': '-1'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('timeslot_search'), params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SlotHoldTests(APITestCase):
+    """Slotni vaqtincha band qilish (hold) testlari"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.doctor = User.objects.create_user(
+            username='hold_doctor', password='testpass123', email='hold_doctor@test.com', role='doctor'
+        )
+        DoctorProfile.objects.create(user=self.doctor, specialization='cardiology', experience_years=2, gender='male')
+        self.alice = User.objects.create_user(
+            username='hold_alice', password='testpass123', email='hold_alice@test.com', role='patient'
+        )
+        self.bob = User.objects.create_user(
+            username='hold_bob', password='testpass123', email='hold_bob@test.com', role='patient'
+        )
+        day = date.today() + timedelta(days=1)
+        self.slot = TimeSlot.objects.create(doctor=self.doctor, date=day, start_time=time(9, 0), end_time=time(9, 30))
+        self.other = TimeSlot.objects.create(doctor=self.doctor, date=day, start_time=time(10, 0), end_time=time(10, 30))
+
+    def _hold(self, user, slot):
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('timeslot_hold', kwargs={'pk': slot.pk}))
+
+    def _listed(self, name='doctor_timeslots'):
+        self.client.force_authenticate(self.bob)
+        response = self.client.get(reverse(name, kwargs={'doctor_id': self.doctor.pk}))
+        return [row['id'] for row in json.loads(response.content)]
+
+    def test_hold_hides_slot_and_blocks_others(self):
+        """Hold qilingan slot ro'yxatdan yashiriladi va boshqalarga berilmaydi"""
+        self.assertEqual(self._listed(), [self.slot.pk, self.other.pk])
+
+        response = self._hold(self.alice, self.slot)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['expires_in'], 120)
+
+        self.assertEqual(self._listed(), [self.other.pk])
+        self.assertEqual(self._listed('doctor_timeslots_async'), [self.other.pk])
+        self.assertEqual(self._hold(self.bob, self.slot).status_code, status.HTTP_409_CONFLICT)
+
+        # Bron urinishlari bazaga tegmasdan rad etiladi
+        self.client.force_authenticate(self.bob)
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('appointment_create'), {'timeslot': self.slot.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['detail'].code, 'slot_held')
+
+    def test_renewal_never_overwrites_a_hold_taken_in_between(self):
+        """Yangilash paytida boshqa bemor olgan hold ustiga yozilmaydi"""
+        place_hold(self.slot, self.alice.pk)
+        read_hold = get_hold
+        calls = []
+
+        def expire_and_take(timeslot_id):
+            # Alice'ning holdi o'qilgandan so'ng tugaydi va uni Bob oladi
+            calls.append(timeslot_id)
+            current = read_hold(timeslot_id)
+            if len(calls) == 1:
+                cache.delete(f'timeslot_hold:{timeslot_id}')
+                self.assertIsNotNone(place_hold(self.slot, self.bob.pk))
+            return current
+
+        with mock.patch('apps.appointments.holds.get_hold', side_effect=expire_and_take):
+            self.assertIsNone(place_hold(self.slot, self.alice.pk))
+
+        self.assertEqual(get_hold(self.slot.pk).patient_id, self.bob.pk)
+
+    def test_renewal_extends_own_hold(self):
+        """Bemor o'z holdini yangilaydi"""
+        first = place_hold(self.slot, self.alice.pk, seconds=30)
+        renewed = place_hold(self.slot, self.alice.pk, seconds=90)
+
+        self.assertGreater(renewed.expires_at, first.expires_at)
+        self.assertEqual(get_hold(self.slot.pk).expires_at, renewed.expires_at)
+
+    def test_holder_books_and_hold_is_released(self):
+        """Hold egasi bron qiladi va hold bekor bo'ladi"""
+        self._hold(self.alice, self.slot)
+        response = self.client.post(reverse('appointment_create'), {'timeslot': self.slot.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(get_hold(self.slot.pk))
+
+    def test_hold_expires(self):
+        """Muddati o'tgan hold slotni qaytaradi"""
+        self._hold(self.alice, self.slot)
+        self.assertEqual(self._listed(), [self.other.pk])
+
+        later = time_module.time() + 121
+        with mock.patch('time.time', return_value=later):
+            self.assertIsNone(get_hold(self.slot.pk))
+            # Keshdagi javob ham hold bilan birga eskiradi
+            self.assertEqual(self._listed(), [self.slot.pk, self.other.pk])
+            self.assertEqual(self._hold(self.bob, self.slot).status_code, status.HTTP_201_CREATED)
+
+    def test_one_hold_per_patient_and_release(self):
+        """Bemor bitta slotni ushlaydi; yangisi eskisini bo'shatadi"""
+        self._hold(self.alice, self.slot)
+        self._hold(self.alice, self.other)
+        self.assertIsNone(get_hold(self.slot.pk))
+        self.assertEqual(get_hold(self.other.pk).patient_id, self.alice.pk)
+
+        url = reverse('timeslot_hold', kwargs={'pk': self.other.pk})
+        self.client.force_authenticate(self.bob)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(self.alice)
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._listed(), [self.slot.pk, self.other.pk])
+
+    def test_only_open_future_slots(self):
+        """Band yoki o'tgan slotni hold qilib bo'lmaydi"""
+        self.slot.is_available = False
+        self.slot.save()
+        past = TimeSlot.objects.bulk_create([TimeSlot(
+            doctor=self.doctor, date=date.today() - timedelta(days=1), start_time=time(9, 0), end_time=time(9, 30)
+        )])[0]
+
+        for slot in (self.slot, past):
+            with self.subTest(slot=slot.pk):
+                self.assertEqual(self._hold(self.alice, slot).status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(self.doctor)
+        response = self.client.post(reverse('timeslot_hold', kwargs={'pk': self.other.pk}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,37 +1,47 @@
 from django.urls import path
 from .views import (
     # TimeSlot Views
-    TimeSlotCreateView, TimeSlotListView, TimeSlotDetailView,
+    TimeSlotCreateView, TimeSlotBulkCreateView, TimeSlotListView, TimeSlotDetailView, TimeSlotHoldView,
+    DoctorCalendarView,
     
     # Appointment Views
     AppointmentCreateView, MyAppointmentsView, AppointmentDetailView,
-    AppointmentStatusUpdateView, AppointmentCancelView,
+    AppointmentStatusUpdateView, AppointmentCancelView, AppointmentBulkStatusView,
     
     # Doctor TimeSlots
-    DoctorAvailableTimeSlotsView,
+    DoctorAvailableTimeSlotsView, TimeSlotSearchView,
     
     # Admin Views
     AllAppointmentsView, AllTimeSlotsView,
     
     # Utility Views
     AvailableDoctorsView, TodayAppointmentsView,
+    
+    # Async (ASGI) Views
+    AsyncDoctorAvailableTimeSlotsView, AsyncMyAppointmentsView,
+    AsyncTodayAppointmentsView, AsyncAvailableDoctorsView,
 )
 
 urlpatterns = [
     # TimeSlots
     path('timeslots/', TimeSlotCreateView.as_view(), name='timeslot_create'),
+    path('timeslots/bulk/', TimeSlotBulkCreateView.as_view(), name='timeslot_bulk_create'),
     path('timeslots/my/', TimeSlotListView.as_view(), name='my_timeslots'),
     path('timeslots/<int:pk>/', TimeSlotDetailView.as_view(), name='timeslot_detail'),
+    path('timeslots/<int:pk>/hold/', TimeSlotHoldView.as_view(), name='timeslot_hold'),
+    path('timeslots/calendar/', DoctorCalendarView.as_view(), name='doctor_calendar'),
     
     # Doctor Available TimeSlots
     path('doctors/<int:doctor_id>/timeslots/', 
          DoctorAvailableTimeSlotsView.as_view(), 
          name='doctor_timeslots'),
+    path('timeslots/search/', TimeSlotSearchView.as_view(), name='timeslot_search'),
     
     # Appointments
     path('appointments/', AppointmentCreateView.as_view(), name='appointment_create'),
     path('appointments/me/', MyAppointmentsView.as_view(), name='my_appointments'),
     path('appointments/today/', TodayAppointmentsView.as_view(), name='today_appointments'),
+    path('appointments/status/', AppointmentBulkStatusView.as_view(), name='appointment_bulk_status'),
     path('appointments/<int:pk>/', AppointmentDetailView.as_view(), name='appointment_detail'),
     path('appointments/<int:pk>/status/', 
          AppointmentStatusUpdateView.as_view(), 
@@ -43,6 +53,14 @@ urlpatterns = [
     # Available Doctors
     path('doctors/available/', AvailableDoctorsView.as_view(), name='available_doctors'),
     
+    # Async (ASGI) variants of the read-heavy endpoints above
+    path('doctors/<int:doctor_id>/timeslots/async/',
+         AsyncDoctorAvailableTimeSlotsView.as_view(),
+         name='doctor_timeslots_async'),
+    path('appointments/me/async/', AsyncMyAppointmentsView.as_view(), name='my_appointments_async'),
+    path('appointments/today/async/', AsyncTodayAppointmentsView.as_view(), name='today_appointments_async'),
+    path('doctors/available/async/', AsyncAvailableDoctorsView.as_view(), name='available_doctors_async'),
+    
     # Admin only endpoints
     path('admin/appointments/', AllAppointmentsView.as_view(), name='all_appointments'),
     path('admin/timeslots/', AllTimeSlotsView.as_view(), name='all_timeslots'),
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+
+def subtract_intervals(start, end, breaks):
+    """
+    Split the working window ``start``-``end`` into the segments left over
+    after removing ``breaks`` (a list of ``(start, end)`` time pairs).
+    """
+    segments = []
+    cursor = start
+    for break_start, break_end in sorted(breaks):
+        if break_end <= cursor or break_start >= end:
+            continue
+        if break_start > cursor:
+            segments.append((cursor, break_start))
+        cursor = max(cursor, break_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        segments.append((cursor, end))
+    return segments
+
+
+def generate_slots(date_from, date_to, weekdays, start, end, slot_minutes, breaks=()):
+    """
+    Expand a weekly recurrence rule into ``(date, start_time, end_time)``
+    tuples, ordered by date and start time.
+    """
+    step = timedelta(minutes=slot_minutes)
+    segments = subtract_intervals(start, end, breaks)
+    weekdays = set(weekdays)
+    slots = []
+
+    day = date_from
+    while day <= date_to:
+        if day.weekday() in weekdays:
+            for segment_start, segment_end in segments:
+                cursor = datetime.combine(day, segment_start)
+                limit = datetime.combine(day, segment_end)
+                while cursor + step <= limit:
+                    slots.append((day, cursor.time(), (cursor + step).time()))
+                    cursor += step
+        day += timedelta(days=1)
+    return slots
+
+
+def find_overlaps(candidates, existing):
+    """
+    Return the indexes of ``candidates`` that overlap any interval in
+    ``existing``.
+
+    Both arguments are sequences of ``(date, start_time, end_time)`` sorted
+    by ``(date, start_time)``; ``candidates`` must not overlap each other.
+    The check is a single merge sweep over both lists.
+    """
+    overlapping = []
+    j = 0
+    for index, (day, start, end) in enumerate(candidates):
+        # Existing intervals that finish before this candidate starts cannot
+        # overlap it or any later candidate.
+        while j < len(existing) and (existing[j][0], existing[j][2]) <= (day, start):
+            j += 1
+
+        k = j
+        while k < len(existing) and (existing[k][0], existing[k][1]) < (day, end):
+            if existing[k][0] == day and existing[k][2] > start:
+                overlapping.append(index)
+                break
+            k += 1
+    return overlapping
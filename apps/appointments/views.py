@@ -1,24 +1,45 @@
+import math
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import partial
+
+from asgiref.sync import sync_to_async
 from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.conf import settings
+from django.db.models import F, Q
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import parse_etags
 
 from .models import TimeSlot, Appointment
 from .serializers import (
-    TimeSlotSerializer, AvailableTimeSlotSerializer,
-    AppointmentSerializer, AppointmentStatusSerializer,
-    DoctorTimeSlotSerializer
+    TimeSlotSerializer, TimeSlotBulkCreateSerializer, AvailableTimeSlotSerializer, AvailableTimeSlotRowSerializer,
+    AvailableDoctorSerializer, AppointmentSerializer, AppointmentRowSerializer, AppointmentStatusSerializer,
+    AppointmentBulkStatusSerializer,
+    DoctorTimeSlotSerializer, DoctorCalendarQuerySerializer, TimeSlotSearchQuerySerializer
 )
 from .permissions import (
     IsTimeslotOwner, IsAppointmentOwner, CanChangeAppointmentStatus,
     CanCancelAppointment, CanViewDoctorTimeslots, CanCreateAppointment,
     IsDoctorOrReadOnly
 )
+from .exceptions import SlotHeld
+from .export import ExportMixin
+from .holds import held_by_others, holds_for, place_hold, release_hold
+from .schedule import build_calendar
+from .cache import (
+    get_timeslots_version, timeslots_response_key,
+    get_cached_response, set_cached_response
+)
+from core.async_views import AsyncListAPIView
+from core.pagination import AppointmentCursorPagination, TimeSlotCursorPagination
 from apps.users.permissions import IsAdmin, IsDoctor, IsPatient
+from apps.users.authentication import TokenClaimsAuthentication
 from apps.users.models import User, DoctorProfile
 
 
@@ -33,6 +54,22 @@ class TimeSlotCreateView(generics.CreateAPIView):
         serializer.save(doctor=self.request.user)
 
 
+class TimeSlotBulkCreateView(generics.GenericAPIView):
+    serializer_class = TimeSlotBulkCreateSerializer
+    permission_classes = [permissions.IsAuthenticated, IsDoctor]
+    
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        timeslots = serializer.save()
+        
+        return Response({
+            'created': len(timeslots),
+            'skipped': serializer.validated_data['skipped'],
+            'timeslots': DoctorTimeSlotSerializer(timeslots, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+
+
 class TimeSlotListView(generics.ListAPIView):
     serializer_class = TimeSlotSerializer
     permission_classes = [permissions.IsAuthenticated, IsDoctor]
@@ -43,7 +80,7 @@ class TimeSlotListView(generics.ListAPIView):
         # Doctors can only see their own timeslots
         return TimeSlot.objects.filter(
             doctor=self.request.user
-        ).select_related('doctor').order_by('date', 'start_time')
+        ).with_doctor().order_by('date', 'start_time')
 
 
 class TimeSlotDetailView(generics.RetrieveDestroyAPIView):
@@ -51,7 +88,7 @@ class TimeSlotDetailView(generics.RetrieveDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated, IsTimeslotOwner]
     
     def get_queryset(self):
-        return TimeSlot.objects.select_related('doctor')
+        return TimeSlot.objects.with_doctor()
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -67,9 +104,97 @@ class TimeSlotDetailView(generics.RetrieveDestroyAPIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class DoctorCalendarView(APIView):
+    """
+    The doctor's own slots with their appointments for one week (default) or
+    month, as per-day parallel arrays; replaces joining the timeslot and
+    appointment listings client-side.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsDoctor]
+    
+    def get(self, request):
+        query = DoctorCalendarQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        day = query.validated_data.get('date') or timezone.now().date()
+        return Response(build_calendar(request.user.id, day, query.validated_data['span']))
+
+
+class CachedResponseMixin:
+    """
+    Serves JSON responses from the cache, with an ETag. Subclasses provide
+    ``cached_response()``, returning the cache key for the request and the
+    cached ``(etag, body)`` or ``None``, under a key that changes whenever
+    the data does. Building the response may shorten how long it stays
+    cached by setting ``response_timeout``. The browsable API and other
+    formats skip the cache.
+    """
+    response_timeout = None
+    
+    def cached(self, request, respond):
+        if request.accepted_renderer.format != 'json':
+            return respond()
+        
+        key, cached = self.cached_response()
+        if cached is None:
+            body = self.render_body(respond())
+            etag = set_cached_response(key, body, self.response_timeout)
+        else:
+            etag, body = cached
+        
+        return self.etag_response(etag, body)
+    
+    def render_body(self, response):
+        return self.request.accepted_renderer.render(
+            response.data, self.request.accepted_media_type, self.get_renderer_context()
+        )
+    
+    def etag_response(self, etag, body):
+        if etag in parse_etags(self.request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type=self.request.accepted_renderer.media_type)
+        response['ETag'] = etag
+        return response
+
+
+class RowListMixin:
+    """
+    Serializes JSON list responses with ``row_serializer_class``, a
+    read-only serializer fed ``values()`` rows, instead of building model
+    instances for ``serializer_class`` to walk. The filtered queryset is
+    projected to the row serializer's ``fields``, so filtering, pagination
+    and the async views work unchanged. Other formats (the browsable API,
+    exports) and ``FAST_LIST_SERIALIZERS = False`` keep the model serializer.
+    """
+    row_serializer_class = None
+    
+    def serves_rows(self):
+        request = getattr(self, 'request', None)
+        return (
+            settings.FAST_LIST_SERIALIZERS
+            and request is not None
+            and getattr(request, 'accepted_renderer', None) is not None
+            and request.accepted_renderer.format == 'json'
+        )
+    
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.serves_rows():
+            return queryset.values(*self.row_serializer_class.fields)
+        return queryset
+    
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many') and self.serves_rows():
+            kwargs.setdefault('context', self.get_serializer_context())
+            return self.row_serializer_class(*args, **kwargs)
+        return super().get_serializer(*args, **kwargs)
+
+
 # Doctor Available TimeSlots
-class DoctorAvailableTimeSlotsView(generics.ListAPIView):
+class DoctorAvailableTimeSlotsView(CachedResponseMixin, RowListMixin, generics.ListAPIView):
     serializer_class = AvailableTimeSlotSerializer
+    row_serializer_class = AvailableTimeSlotRowSerializer
+    authentication_classes = [TokenClaimsAuthentication]
     permission_classes = [permissions.IsAuthenticated, CanViewDoctorTimeslots]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['date']
@@ -77,13 +202,97 @@ class DoctorAvailableTimeSlotsView(generics.ListAPIView):
     def get_queryset(self):
         doctor_id = self.kwargs.get('doctor_id')
         doctor = get_object_or_404(User, pk=doctor_id, role='doctor')
-        
+        return self.available_timeslots(doctor.pk)
+    
+    def available_timeslots(self, doctor_id):
         # Only show available timeslots in the future
         return TimeSlot.objects.filter(
-            doctor=doctor,
+            doctor_id=doctor_id,
             is_available=True,
             date__gte=timezone.now().date()
         ).select_related('doctor', 'doctor__doctor_profile').order_by('date', 'start_time')
+    
+    def list(self, request, *args, **kwargs):
+        return self.cached(request, partial(self.list_unheld, request))
+    
+    def list_unheld(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(self.get_serializer(self.without_held(list(queryset)), many=True).data)
+    
+    def without_held(self, slots):
+        """
+        Drop slots patients are holding. The response is then cached only
+        until the first of those holds expires, when the slot is back.
+        """
+        # values() rows on the JSON path, model instances otherwise
+        ids = [slot['id'] if isinstance(slot, dict) else slot.pk for slot in slots]
+        holds = holds_for(ids)
+        if not holds:
+            return slots
+        self.response_timeout = max(1, math.ceil(min(hold.expires_at for hold in holds.values()) - time.time()))
+        return [slot for slot, pk in zip(slots, ids) if pk not in holds]
+    
+    def cached_response(self):
+        """Return the cache key for this request and the cached ``(etag, body)``, if any."""
+        doctor_id = self.kwargs.get('doctor_id')
+        key = timeslots_response_key(
+            doctor_id, get_timeslots_version(doctor_id), timezone.now().date(), self.request.query_params
+        )
+        return key, get_cached_response(key)
+
+
+class TimeSlotSearchView(RowListMixin, generics.ListAPIView):
+    """
+    Open slots across all doctors, soonest first, filtered by
+    specialization, date window and maximum fee; replaces polling
+    DoctorAvailableTimeSlotsView doctor by doctor. ``?page_size=`` asks for
+    the first N and the keyset cursor pages on from there.
+    """
+    serializer_class = AvailableTimeSlotSerializer
+    row_serializer_class = AvailableTimeSlotRowSerializer
+    authentication_classes = [TokenClaimsAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimeSlotCursorPagination
+    
+    def get_queryset(self):
+        query = TimeSlotSearchQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        return TimeSlot.objects.search_open(**query.validated_data).with_doctor()
+
+
+class TimeSlotHoldView(APIView):
+    """
+    Hold an open slot for ``SLOT_HOLD_SECONDS`` while filling in the
+    booking, or release the hold. A patient holds one slot at a time.
+    """
+    permission_classes = [permissions.IsAuthenticated, CanCreateAppointment]
+    
+    def post(self, request, pk):
+        # Contended slots are turned away before any query
+        if held_by_others(pk, request.user.pk) is not None:
+            raise SlotHeld()
+        
+        now = timezone.localtime()
+        timeslot = TimeSlot.objects.filter(pk=pk, is_available=True).filter(
+            Q(date__gt=now.date()) | Q(date=now.date(), start_time__gt=now.time())
+        ).only('id', 'doctor_id').first()
+        if timeslot is None:
+            raise NotFound("Timeslot not available or does not exist.")
+        
+        hold = place_hold(timeslot, request.user.pk)
+        if hold is None:
+            raise SlotHeld()
+        
+        return Response({
+            'timeslot': timeslot.pk,
+            'expires_at': datetime.fromtimestamp(hold.expires_at, tz=dt_timezone.utc),
+            'expires_in': hold.expires_in,
+        }, status=status.HTTP_201_CREATED)
+    
+    def delete(self, request, pk):
+        if not release_hold(pk, request.user.pk):
+            raise NotFound("You are not holding this timeslot.")
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 # Appointment Views
@@ -98,9 +307,11 @@ class AppointmentCreateView(generics.CreateAPIView):
         return context
 
 
-class MyAppointmentsView(generics.ListAPIView):
+class MyAppointmentsView(RowListMixin, generics.ListAPIView):
     serializer_class = AppointmentSerializer
+    row_serializer_class = AppointmentRowSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AppointmentCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['status', 'doctor']
     
@@ -111,23 +322,17 @@ class MyAppointmentsView(generics.ListAPIView):
             # Doctors see appointments where they are the doctor
             return Appointment.objects.filter(
                 doctor=user
-            ).select_related(
-                'doctor', 'patient', 'timeslot'
-            ).order_by('-created_at')
+            ).with_related().order_by('-created_at')
         
         elif user.is_patient:
             # Patients see their own appointments
             return Appointment.objects.filter(
                 patient=user
-            ).select_related(
-                'doctor', 'patient', 'timeslot'
-            ).order_by('-created_at')
+            ).with_related().order_by('-created_at')
         
         elif user.is_admin:
             # Admins see all appointments
-            return Appointment.objects.all().select_related(
-                'doctor', 'patient', 'timeslot'
-            ).order_by('-created_at')
+            return Appointment.objects.all().with_related().order_by('-created_at')
         
         return Appointment.objects.none()
 
@@ -137,9 +342,7 @@ class AppointmentDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated, IsAppointmentOwner]
     
     def get_queryset(self):
-        return Appointment.objects.select_related(
-            'doctor', 'patient', 'timeslot'
-        )
+        return Appointment.objects.with_related()
 
 
 class AppointmentStatusUpdateView(generics.UpdateAPIView):
@@ -168,6 +371,43 @@ class AppointmentStatusUpdateView(generics.UpdateAPIView):
         pass
 
 
+class AppointmentBulkStatusView(APIView):
+    """
+    Apply one status change to many appointments, e.g. end-of-day
+    completion, with a few set-based queries instead of one request per
+    appointment. Doctors act on their own appointments, admins on all.
+    Appointments whose status (or, for cancellation, start time) does not
+    allow the change are left alone and reported as rejected.
+    """
+    permission_classes = [permissions.IsAuthenticated, CanChangeAppointmentStatus]
+    
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_admin:
+            return Appointment.objects.all()
+        return Appointment.objects.filter(doctor=user)
+    
+    def post(self, request):
+        serializer = AppointmentBulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        new_status = serializer.validated_data['status']
+        ids = serializer.validated_data.get('ids')
+        
+        queryset = self.get_queryset()
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        else:
+            queryset = queryset.filter(timeslot__date=serializer.validated_data['date'])
+        
+        updated = queryset.transition(new_status)
+        done = set(updated)
+        return Response({
+            'status': new_status,
+            'updated': sorted(updated),
+            'rejected': sorted({pk for pk in ids if pk not in done}) if ids is not None else [],
+        })
+
+
 class AppointmentCancelView(generics.DestroyAPIView):
     queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
@@ -186,87 +426,162 @@ class AppointmentCancelView(generics.DestroyAPIView):
         return Appointment.objects.none()
     
     def perform_destroy(self, instance):
-        # Only cancel if appointment is in the future
-        appointment_datetime = timezone.datetime.combine(
-            instance.timeslot.date, 
-            instance.timeslot.start_time
-        )
-        
-        if appointment_datetime <= timezone.now():
-            raise ValidationError("Cannot cancel past appointments.")
-        
         # Only allow cancellation of pending or confirmed appointments
-        if instance.status not in ['pending', 'confirmed']:
+        if instance.status not in Appointment.allowed_sources(Appointment.Status.CANCELLED):
             raise ValidationError(f"Cannot cancel appointment with status: {instance.status}")
         
-        instance.status = 'cancelled'
-        instance.save()
+        # The same state machine as the bulk and admin actions, which leaves
+        # appointments that have already started alone
+        if not Appointment.objects.filter(pk=instance.pk).transition(Appointment.Status.CANCELLED):
+            raise ValidationError("Cannot cancel past appointments.")
 
 
 # Admin Views
-class AllAppointmentsView(generics.ListAPIView):
-    queryset = Appointment.objects.all().select_related(
-        'doctor', 'patient', 'timeslot'
-    ).order_by('-created_at')
+class AllAppointmentsView(ExportMixin, RowListMixin, generics.ListAPIView):
+    queryset = Appointment.objects.all().with_related().order_by('-created_at')
     serializer_class = AppointmentSerializer
+    row_serializer_class = AppointmentRowSerializer
     permission_classes = [IsAdmin]
+    pagination_class = AppointmentCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['status', 'doctor', 'patient']
     search_fields = [
         'doctor__username', 'patient__username',
         'notes', 'symptoms'
     ]
+    export_filename = 'appointments'
+    export_fields = (
+        ('id', 'id'),
+        ('status', 'status'),
+        ('doctor', 'doctor_id'),
+        ('doctor_username', 'doctor__username'),
+        ('patient', 'patient_id'),
+        ('patient_username', 'patient__username'),
+        ('timeslot', 'timeslot_id'),
+        ('date', 'timeslot__date'),
+        ('start_time', 'timeslot__start_time'),
+        ('end_time', 'timeslot__end_time'),
+        ('notes', 'notes'),
+        ('symptoms', 'symptoms'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    )
 
 
-class AllTimeSlotsView(generics.ListAPIView):
-    queryset = TimeSlot.objects.all().select_related('doctor')
+class AllTimeSlotsView(ExportMixin, generics.ListAPIView):
+    queryset = TimeSlot.objects.all().with_doctor()
     serializer_class = TimeSlotSerializer
     permission_classes = [IsAdmin]
+    pagination_class = TimeSlotCursorPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['doctor', 'date', 'is_available']
+    export_filename = 'timeslots'
+    export_fields = (
+        ('id', 'id'),
+        ('doctor', 'doctor_id'),
+        ('doctor_username', 'doctor__username'),
+        ('date', 'date'),
+        ('start_time', 'start_time'),
+        ('end_time', 'end_time'),
+        ('is_available', 'is_available'),
+        ('created_at', 'created_at'),
+    )
 
 
 # Utility Views
 class AvailableDoctorsView(generics.ListAPIView):
+    serializer_class = AvailableDoctorSerializer
+    authentication_classes = [TokenClaimsAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [filters.OrderingFilter]
+    # ?ordering=next_available_at lists the soonest available doctors first
+    ordering_fields = ['next_available_at', 'open_slots', 'consultation_fee', 'experience_years']
+    ordering = ['-created_at', 'id']
     
-    def get(self, request, *args, **kwargs):
-        # Get doctors who have available timeslots
-        available_doctors = DoctorProfile.objects.filter(
-            user__time_slots__is_available=True,
-            user__time_slots__date__gte=timezone.now().date()
-        ).distinct().select_related('user')
-        
-        from apps.users.serializers import DoctorListSerializer
-        serializer = DoctorListSerializer(available_doctors, many=True)
-        return Response(serializer.data)
+    def get_queryset(self):
+        # Reads the DoctorAvailability summary instead of joining and
+        # de-duplicating every future timeslot. Rows whose soonest slot has
+        # started are refreshed by the schedule maintenance, not here.
+        return DoctorProfile.objects.filter(
+            user__availability__isnull=False
+        ).select_related('user').annotate(
+            next_available_at=F('user__availability__next_available_at'),
+            open_slots=F('user__availability__open_slots')
+        )
 
 
-class TodayAppointmentsView(generics.ListAPIView):
+class TodayAppointmentsView(RowListMixin, generics.ListAPIView):
     serializer_class = AppointmentSerializer
+    row_serializer_class = AppointmentRowSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
         user = self.request.user
         today = timezone.now().date()
+        queryset = Appointment.objects.filter(
+            timeslot__date=today
+        ).with_related().order_by('timeslot__start_time')
         
         if user.is_doctor:
-            return Appointment.objects.filter(
+            return queryset.filter(
                 doctor=user,
-                timeslot__date=today,
                 status__in=['pending', 'confirmed']
-            ).select_related('patient', 'timeslot').order_by('timeslot__start_time')
+            )
         
         elif user.is_patient:
-            return Appointment.objects.filter(
+            return queryset.filter(
                 patient=user,
-                timeslot__date=today,
                 status__in=['pending', 'confirmed']
-            ).select_related('doctor', 'timeslot').order_by('timeslot__start_time')
+            )
         
         elif user.is_admin:
-            return Appointment.objects.filter(
-                timeslot__date=today
-            ).select_related('doctor', 'patient', 'timeslot').order_by('timeslot__start_time')
+            return queryset
+        
+        return Appointment.objects.none()
+
+
+# Async (ASGI) Views
+# Same querysets, filters, pagination and serializers as the sync views above,
+# served on the event loop with the async ORM.
+class AsyncDoctorAvailableTimeSlotsView(AsyncListAPIView, DoctorAvailableTimeSlotsView):
+    def get_queryset(self):
+        # The doctor is checked in get(), with the async ORM
+        return self.available_timeslots(self.kwargs.get('doctor_id'))
+    
+    async def get(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            await self.acheck_doctor()
+            return await self.alist(request, *args, **kwargs)
+        
+        # Both cache round trips in one thread hop
+        key, cached = await sync_to_async(self.cached_response)()
+        if cached is None:
+            await self.acheck_doctor()
+            body = self.render_body(await self.alist(request, *args, **kwargs))
+            etag = await sync_to_async(set_cached_response)(key, body, self.response_timeout)
+        else:
+            etag, body = cached
         
-        return Appointment.objects.none()
\ No newline at end of file
+        return self.etag_response(etag, body)
+    
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        slots = [slot async for slot in queryset.aiterator()]
+        slots = await sync_to_async(self.without_held)(slots)
+        return Response(self.get_serializer(slots, many=True).data)
+    
+    async def acheck_doctor(self):
+        if not await User.objects.filter(pk=self.kwargs.get('doctor_id'), role='doctor').aexists():
+            raise Http404
+
+
+class AsyncMyAppointmentsView(AsyncListAPIView, MyAppointmentsView):
+    pass
+
+
+class AsyncTodayAppointmentsView(AsyncListAPIView, TodayAppointmentsView):
+    pass
+
+
+class AsyncAvailableDoctorsView(AsyncListAPIView, AvailableDoctorsView):
+    pass
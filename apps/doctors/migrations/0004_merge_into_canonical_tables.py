@@ -0,0 +1,117 @@
+import logging
+
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 2000
+
+
+def merge_profiles(apps, schema_editor):
+    """Create a users.DoctorProfile for every doctor that only has the old one."""
+    OldProfile = apps.get_model('doctors', 'DoctorProfile')
+    DoctorProfile = apps.get_model('users', 'DoctorProfile')
+    specializations = {
+        value for value, _ in DoctorProfile._meta.get_field('specialization').choices
+    }
+
+    batch = []
+    for old in OldProfile.objects.select_related('user').order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        specialization = old.specialization.strip().lower()
+        bio = ''
+        if specialization not in specializations:
+            # Free text the canonical choices cannot hold is kept in the bio
+            bio = f'Specialization: {old.specialization}'
+            specialization = DoctorProfile._meta.get_field('specialization').default
+        batch.append(DoctorProfile(
+            user_id=old.user_id,
+            specialization=specialization,
+            experience_years=old.experience_years,
+            gender=old.gender,
+            bio=bio,
+            # Same format as users.models.build_search_document
+            search_document='\n'.join(
+                ' '.join(str(part).lower().split())
+                for part in (old.user.username, specialization, bio)
+            ),
+        ))
+        if len(batch) == BATCH_SIZE:
+            _insert_profiles(DoctorProfile, batch)
+            batch = []
+    _insert_profiles(DoctorProfile, batch)
+
+
+def _insert_profiles(DoctorProfile, batch):
+    # The canonical profile wins where a doctor has both
+    existing = set(
+        DoctorProfile.objects.filter(user_id__in=[p.user_id for p in batch]).values_list('user_id', flat=True)
+    )
+    DoctorProfile.objects.bulk_create([p for p in batch if p.user_id not in existing])
+
+
+def merge_timeslots(apps, schema_editor):
+    """
+    Stream the old slots into appointments.TimeSlot in batches, skipping
+    any that duplicate or overlap a slot the doctor already has there.
+
+    The old serializer never checked that a slot ends after it starts, so
+    inverted and zero-length rows are skipped too: on PostgreSQL an inverted
+    one would make the overlap constraint's tsrange() abort the migration.
+    """
+    OldTimeSlot = apps.get_model('doctors', 'TimeSlot')
+    TimeSlot = apps.get_model('appointments', 'TimeSlot')
+
+    rows = OldTimeSlot.objects.order_by('pk').values_list(
+        'doctor__user_id', 'date', 'start_time', 'end_time', 'is_available'
+    ).iterator(chunk_size=BATCH_SIZE)
+    batch = []
+    invalid = 0
+    for row in rows:
+        if row[2] >= row[3]:
+            invalid += 1
+            continue
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            _insert_timeslots(TimeSlot, batch)
+            batch = []
+    _insert_timeslots(TimeSlot, batch)
+
+    if invalid:
+        logger.warning('Skipped %d doctors.TimeSlot rows that do not end after they start', invalid)
+
+
+def _insert_timeslots(TimeSlot, batch):
+    if not batch:
+        return
+    taken = {}
+    existing = TimeSlot.objects.filter(
+        doctor_id__in={row[0] for row in batch},
+        date__in={row[1] for row in batch},
+    ).values_list('doctor_id', 'date', 'start_time', 'end_time')
+    for doctor_id, day, start, end in existing:
+        taken.setdefault((doctor_id, day), []).append((start, end))
+
+    slots = []
+    for doctor_id, day, start, end, is_available in batch:
+        intervals = taken.setdefault((doctor_id, day), [])
+        if any(start < other_end and end > other_start for other_start, other_end in intervals):
+            continue
+        intervals.append((start, end))
+        slots.append(TimeSlot(
+            doctor_id=doctor_id, date=day, start_time=start, end_time=end, is_available=is_available
+        ))
+    TimeSlot.objects.bulk_create(slots)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0003_alter_doctorprofile_gender_alter_timeslot_doctor'),
+        ('users', '0006_doctorprofile_search_document'),
+        ('appointments', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_profiles, migrations.RunPython.noop),
+        migrations.RunPython(merge_timeslots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:25
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0004_merge_into_canonical_tables'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='timeslot',
+            unique_together=None,
+        ),
+        migrations.RemoveField(
+            model_name='timeslot',
+            name='doctor',
+        ),
+        migrations.DeleteModel(
+            name='DoctorProfile',
+        ),
+        migrations.DeleteModel(
+            name='TimeSlot',
+        ),
+    ]
@@ -1,19 +1,3 @@
-from django.db import models
-from django.conf import settings
-
-class DoctorProfile(models.Model):
-    GENDER_CHOICES = (("male","Male"), ("female","Female"))
-    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    specialization = models.CharField(max_length=100)
-    experience_years = models.PositiveIntegerField()
-    gender = models.CharField(max_length=10, choices=GENDER_CHOICES)
-
-class TimeSlot(models.Model):
-    doctor = models.ForeignKey(DoctorProfile, on_delete=models.CASCADE)
-    date = models.DateField()
-    start_time = models.TimeField()
-    end_time = models.TimeField()
-    is_available = models.BooleanField(default=True)
-
-    class Meta:
-        unique_together = ("doctor", "date", "start_time", "end_time")
+# Doctor profiles and timeslots live in apps.users.DoctorProfile and
+# apps.appointments.TimeSlot; migrations 0004-0005 merged and dropped the
+# copies this app used to keep.
@@ -1,5 +0,0 @@
-from rest_framework import permissions
-
-class IsDoctor(permissions.BasePermission):
-    def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.role == 'doctor'
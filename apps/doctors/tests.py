@@ -1,3 +1,142 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from apps.appointments.models import TimeSlot
+from apps.users.models import DoctorProfile, User
+
+
+class MergeIntoCanonicalTablesTests(TransactionTestCase):
+    """Eski doctors jadvallarini asosiy jadvallarga ko'chirish migratsiyasi testi"""
+
+    before = [('doctors', '0003_alter_doctorprofile_gender_alter_timeslot_doctor')]
+    after = [('doctors', '0004_merge_into_canonical_tables')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_profiles_and_slots_are_merged(self):
+        """Profillar va slotlar takrorlanmasdan birlashtiriladi"""
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        # Every other app stays migrated
+        others = [node for node in executor.loader.graph.leaf_nodes() if node[0] != 'doctors']
+        old_apps = executor.loader.project_state(others + self.before).apps
+
+        OldUser = old_apps.get_model('users', 'User')
+        OldProfile = old_apps.get_model('doctors', 'DoctorProfile')
+        OldTimeSlot = old_apps.get_model('doctors', 'TimeSlot')
+        Profile = old_apps.get_model('users', 'DoctorProfile')
+        Slot = old_apps.get_model('appointments', 'TimeSlot')
+
+        only_old = OldUser.objects.create(username='only_old', email='only_old@test.com', role='doctor')
+        both = OldUser.objects.create(username='both', email='both@test.com', role='doctor')
+        Profile.objects.create(user=both, specialization='neurology', experience_years=9, gender='female')
+        old_only_profile = OldProfile.objects.create(
+            user=only_old, specialization='Sports medicine', experience_years=3, gender='male'
+        )
+        old_both_profile = OldProfile.objects.create(
+            user=both, specialization='cardiology', experience_years=1, gender='female'
+        )
+
+        day = date.today() + timedelta(days=5)
+        Slot.objects.create(doctor=both, date=day, start_time=time(9, 0), end_time=time(10, 0))
+        OldTimeSlot.objects.create(doctor=old_both_profile, date=day, start_time=time(9, 30), end_time=time(10, 30))
+        OldTimeSlot.objects.create(doctor=old_both_profile, date=day, start_time=time(10, 0), end_time=time(10, 30))
+        OldTimeSlot.objects.create(doctor=old_only_profile, date=day, start_time=time(9, 0), end_time=time(9, 30))
+        OldTimeSlot.objects.create(
+            doctor=old_only_profile, date=day, start_time=time(9, 15), end_time=time(9, 45), is_available=False
+        )
+        # Eski serializer end_time > start_time ni tekshirmagan
+        OldTimeSlot.objects.create(doctor=old_only_profile, date=day, start_time=time(12, 0), end_time=time(11, 0))
+        OldTimeSlot.objects.create(doctor=old_only_profile, date=day, start_time=time(13, 0), end_time=time(13, 0))
+
+        executor = MigrationExecutor(connection)
+        with self.assertLogs(
+            'apps.doctors.migrations.0004_merge_into_canonical_tables', level='WARNING'
+        ) as logs:
+            executor.migrate(self.after)
+        self.assertIn('Skipped 2', logs.output[0])
+        new_apps = executor.loader.project_state(others + self.after).apps
+        Profile = new_apps.get_model('users', 'DoctorProfile')
+        Slot = new_apps.get_model('appointments', 'TimeSlot')
+
+        # The existing canonical profile is kept as it was
+        self.assertEqual(Profile.objects.get(user_id=both.pk).specialization, 'neurology')
+        merged = Profile.objects.get(user_id=only_old.pk)
+        self.assertEqual(merged.specialization, 'cardiology')
+        self.assertEqual(merged.bio, 'Specialization: Sports medicine')
+        self.assertIn('only_old', merged.search_document)
+
+        # Overlapping, duplicate, inverted and zero-length slots are skipped
+        self.assertEqual(
+            sorted(Slot.objects.filter(doctor_id=both.pk).values_list('start_time', flat=True)),
+            [time(9, 0), time(10, 0)]
+        )
+        self.assertEqual(Slot.objects.filter(doctor_id=only_old.pk).count(), 1)
+
+
+class DoctorsRoutesTests(APITestCase):
+    """/api/doctors/ yo'llari asosiy jadvallardan keshlangan holda o'qishi testi"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.doctor = User.objects.create_user(
+            username='routes_doctor', password='testpass123', email='routes_doctor@test.com', role='doctor'
+        )
+        self.profile = DoctorProfile.objects.create(
+            user=self.doctor, specialization='dermatology', experience_years=4, gender='male'
+        )
+        self.day = date.today() + timedelta(days=3)
+        self.client.force_authenticate(self.doctor)
+
+    def test_profile_is_cached_until_it_changes(self):
+        """Profil keshlanadi va o'zgarganda yangilanadi"""
+        url = reverse('doctors_profile')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['specialization'], 'dermatology')
+
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        response = self.client.patch(url, {'experience_years': 7}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(url).json()['experience_years'], 7)
+
+    def test_created_slots_land_in_canonical_table(self):
+        """Yangi slot asosiy jadvalga yoziladi va ro'yxatda ko'rinadi"""
+        list_url = reverse('doctors_timeslots')
+        self.assertEqual(self.client.get(list_url).json(), [])
+
+        response = self.client.post(reverse('doctors_timeslot_create'), {
+            'date': self.day.isoformat(), 'start_time': '09:00', 'end_time': '09:30',
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        slot = TimeSlot.objects.get(doctor=self.doctor)
+        self.assertEqual(slot.start_time, time(9, 0))
+        self.assertEqual([row['id'] for row in self.client.get(list_url).json()], [slot.pk])
+
+        # Same overlap rules as /api/appointments/timeslots/
+        response = self.client.post(reverse('doctors_timeslot_create'), {
+            'date': self.day.isoformat(), 'start_time': '09:15', 'end_time': '09:45',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_patient_is_forbidden(self):
+        """Bemor doctor yo'llariga kira olmaydi"""
+        patient = User.objects.create_user(
+            username='routes_patient', password='testpass123', email='routes_patient@test.com', role='patient'
+        )
+        self.client.force_authenticate(patient)
+        self.assertEqual(self.client.get(reverse('doctors_timeslots')).status_code, status.HTTP_403_FORBIDDEN)
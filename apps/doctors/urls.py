@@ -2,8 +2,7 @@ from django.urls import path
 from .views import DoctorProfileView, TimeSlotCreateView, TimeSlotListView
 
 urlpatterns = [
-    path("profile/", DoctorProfileView.as_view()),
-    path("timeslots/", TimeSlotListView.as_view()),
-    path("timeslots/create/", TimeSlotCreateView.as_view()),
+    path("profile/", DoctorProfileView.as_view(), name="doctors_profile"),
+    path("timeslots/", TimeSlotListView.as_view(), name="doctors_timeslots"),
+    path("timeslots/create/", TimeSlotCreateView.as_view(), name="doctors_timeslot_create"),
 ]
-
@@ -1,25 +1,49 @@
-from rest_framework import generics, permissions
-from .models import DoctorProfile, TimeSlot
-from .serializers import DoctorProfileSerializer, TimeSlotSerializer
-from apps.users.permissions import IsDoctor
+"""
+The original ``/api/doctors/`` routes, kept for existing clients as thin
+views over the canonical tables: ``apps.users.models.DoctorProfile`` and
+``apps.appointments.models.TimeSlot``. Reads are cached per doctor under
+the doctor's timeslot cache version, which every change to their slots,
+appointments, profile or user row bumps.
+"""
+from functools import partial
 
-class DoctorProfileView(generics.RetrieveUpdateAPIView):
-    serializer_class = DoctorProfileSerializer
-    permission_classes = [permissions.IsAuthenticated, IsDoctor]
+from django.utils import timezone
 
-    def get_object(self):
-        return self.request.user.doctorprofile
+from apps.appointments import views as appointment_views
+from apps.appointments.cache import get_cached_response, get_timeslots_version, timeslots_response_key
+from apps.users import views as user_views
 
-class TimeSlotCreateView(generics.CreateAPIView):
-    serializer_class = TimeSlotSerializer
-    permission_classes = [permissions.IsAuthenticated, IsDoctor]
 
-    def perform_create(self, serializer):
-        serializer.save(doctor=self.request.user.doctorprofile)
+class DoctorCachedResponseMixin(appointment_views.CachedResponseMixin):
+    cache_scope = None
+    
+    def cached_response(self):
+        doctor_id = self.request.user.pk
+        key = timeslots_response_key(
+            doctor_id, get_timeslots_version(doctor_id), timezone.now().date(),
+            self.request.query_params, scope=self.cache_scope
+        )
+        return key, get_cached_response(key)
 
-class TimeSlotListView(generics.ListAPIView):
-    serializer_class = TimeSlotSerializer
-    permission_classes = [permissions.IsAuthenticated, IsDoctor]
 
-    def get_queryset(self):
-        return TimeSlot.objects.filter(doctor=self.request.user.doctorprofile)
+class DoctorProfileView(DoctorCachedResponseMixin, user_views.DoctorProfileView):
+    cache_scope = 'profile'
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(request, partial(super().retrieve, request, *args, **kwargs))
+
+
+class TimeSlotCreateView(appointment_views.TimeSlotCreateView):
+    def get_serializer(self, *args, **kwargs):
+        # Slots are always the requesting doctor's, so ``doctor`` may be omitted
+        if 'data' in kwargs:
+            kwargs['data'] = kwargs['data'].copy()
+            kwargs['data']['doctor'] = self.request.user.pk
+        return super().get_serializer(*args, **kwargs)
+
+
+class TimeSlotListView(DoctorCachedResponseMixin, appointment_views.TimeSlotListView):
+    cache_scope = 'own'
+    
+    def list(self, request, *args, **kwargs):
+        return self.cached(request, partial(super().list, request, *args, **kwargs))
@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User
+from .tokens import ClinicTokenUser, ROLE_CLAIM, token_version
+
+
+USER_SNAPSHOT_KEY = 'auth:user:{user_id}'
+
+# User columns kept in the snapshot: everything the permission classes read.
+# Any other field is loaded lazily (one query) the first time it is accessed.
+SNAPSHOT_FIELDS = ('id', 'username', 'role', 'is_active', 'token_version')
+
+
+class LocalLRUCache:
+    """Small thread-safe per-process LRU with a per-entry TTL."""
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_users = LocalLRUCache(
+    maxsize=settings.AUTH_USER_LOCAL_CACHE_SIZE,
+    timeout=settings.AUTH_USER_LOCAL_CACHE_TIMEOUT
+)
+
+
+def _snapshot_row(user_id):
+    return User.objects.filter(pk=user_id).values(
+        *SNAPSHOT_FIELDS, 'password', 'doctor_profile__id', 'patient_profile__id'
+    )
+
+
+def _snapshot_from_row(row):
+    if row is None:
+        return None
+    snapshot = {field: row[field] for field in SNAPSHOT_FIELDS}
+    snapshot['doctor_profile_id'] = row['doctor_profile__id']
+    snapshot['patient_profile_id'] = row['patient_profile__id']
+    if api_settings.CHECK_REVOKE_TOKEN:
+        snapshot['password_hash'] = get_md5_hash_password(row['password'])
+    return snapshot
+
+
+def load_user_snapshot(user_id):
+    return _snapshot_from_row(_snapshot_row(user_id).first())
+
+
+def get_user_snapshot(user_id):
+    key = USER_SNAPSHOT_KEY.format(user_id=user_id)
+    snapshot = local_users.get(key)
+    if snapshot is None:
+        snapshot = cache.get(key)
+        if snapshot is None:
+            snapshot = load_user_snapshot(user_id)
+            if snapshot is None:
+                return None
+            cache.set(key, snapshot, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        local_users.set(key, snapshot)
+    return snapshot
+
+
+async def aget_user_snapshot(user_id):
+    """``get_user_snapshot()`` for async views, using the async cache and ORM."""
+    key = USER_SNAPSHOT_KEY.format(user_id=user_id)
+    snapshot = local_users.get(key)
+    if snapshot is None:
+        snapshot = await cache.aget(key)
+        if snapshot is None:
+            snapshot = _snapshot_from_row(await _snapshot_row(user_id).afirst())
+            if snapshot is None:
+                return None
+            await cache.aset(key, snapshot, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        local_users.set(key, snapshot)
+    return snapshot
+
+
+def _delete_user_snapshot(user_id):
+    key = USER_SNAPSHOT_KEY.format(user_id=user_id)
+    local_users.delete(key)
+    cache.delete(key)
+
+
+def invalidate_user_snapshot(user_id):
+    """
+    Drop the cached snapshot now and again once the surrounding transaction
+    commits, so a request that re-cached the pre-commit row does not keep it.
+    Other workers' local copies expire after AUTH_USER_LOCAL_CACHE_TIMEOUT.
+    """
+    _delete_user_snapshot(user_id)
+    transaction.on_commit(lambda: _delete_user_snapshot(user_id))
+
+
+def user_from_snapshot(snapshot):
+    # A real (partially loaded) User, so FK assignment, equality and
+    # serializers keep working; unlisted fields are deferred.
+    user = User.from_db('default', SNAPSHOT_FIELDS, [snapshot[field] for field in SNAPSHOT_FIELDS])
+    user.doctor_profile_id = snapshot['doctor_profile_id']
+    user.patient_profile_id = snapshot['patient_profile_id']
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that resolves the token's user from a cached
+    snapshot (per-process LRU in front of the shared cache) instead of
+    querying the users table on every request.
+    """
+
+    def get_user(self, validated_token):
+        return self.user_for_snapshot(self.get_snapshot(validated_token), validated_token)
+
+    def user_for_snapshot(self, snapshot, validated_token):
+        return user_from_snapshot(snapshot)
+
+    async def aauthenticate(self, request):
+        """Async counterpart of ``authenticate()``, used by ``AsyncAPIView``."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        snapshot = self.check_snapshot(
+            validated_token, await aget_user_snapshot(self.get_user_id(validated_token))
+        )
+        return self.user_for_snapshot(snapshot, validated_token), validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    def get_snapshot(self, validated_token):
+        return self.check_snapshot(
+            validated_token, get_user_snapshot(self.get_user_id(validated_token))
+        )
+
+    def check_snapshot(self, validated_token, snapshot):
+        if snapshot is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not snapshot['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if token_version(validated_token) != snapshot['token_version']:
+            raise AuthenticationFailed(_("Token has been revoked."), code="token_revoked")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != snapshot.get('password_hash'):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return snapshot
+
+
+class TokenClaimsAuthentication(CachedJWTAuthentication):
+    """
+    Authenticate as a ``ClinicTokenUser`` built from the token claims, for
+    read-only views that only check the role. Revocation and deactivation
+    are still enforced through the cached snapshot; tokens without claims,
+    or whose role no longer matches, fall back to the snapshot user.
+    """
+
+    def user_for_snapshot(self, snapshot, validated_token):
+        if validated_token.get(ROLE_CLAIM) != snapshot['role']:
+            return user_from_snapshot(snapshot)
+        return ClinicTokenUser(validated_token)
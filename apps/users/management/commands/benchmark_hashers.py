@@ -0,0 +1,87 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+SAMPLE_PASSWORD = 'benchpass123'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure hash and verify cost of each PASSWORD_HASHER_POLICY with the '
+        'configured work factors, and the login throughput one core and the '
+        'hashing pool can sustain.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', action='append', choices=sorted(settings.PASSWORD_HASHER_POLICIES),
+                            help='Only benchmark this policy (repeatable).')
+        parser.add_argument('--rounds', type=int, default=10, help='Verifications per measurement.')
+        parser.add_argument('--workers', type=int, default=settings.PASSWORD_HASHING_WORKERS,
+                            help='Threads for the pooled measurement.')
+        parser.add_argument('--output', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        rounds = options['rounds']
+        workers = options['workers']
+        if rounds < 1 or workers < 1:
+            raise CommandError('--rounds and --workers must be positive.')
+
+        results = {}
+        for policy in options['policy'] or settings.PASSWORD_HASHER_POLICIES:
+            hasher = import_string(settings.PASSWORD_HASHER_POLICIES[policy])()
+            try:
+                results[policy] = self.measure(hasher, rounds, workers)
+            except ValueError as exc:
+                # Argon2 without argon2-cffi installed
+                results[policy] = {'unavailable': str(exc)}
+
+        self.stdout.write(
+            f"{'policy':<8} {'hash ms':>9} {'verify ms':>10} {'logins/s/core':>14} "
+            f"{'logins/s':>9} {'workers':>8}"
+        )
+        for policy, result in results.items():
+            if 'unavailable' in result:
+                self.stdout.write(f"{policy:<8} unavailable: {result['unavailable']}")
+                continue
+            self.stdout.write(
+                f"{policy:<8} {result['hash_ms']:>9.1f} {result['verify_ms']:>10.1f} "
+                f"{result['logins_per_second_per_core']:>14.1f} {result['logins_per_second']:>9.1f} "
+                f"{workers:>8}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({'workers': workers, 'rounds': rounds, 'policies': results}, f, indent=2, sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def measure(self, hasher, rounds, workers):
+        started = time.perf_counter()
+        encoded = hasher.encode(SAMPLE_PASSWORD, hasher.salt())
+        hash_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            hasher.verify(SAMPLE_PASSWORD, encoded)
+        verify_seconds = (time.perf_counter() - started) / rounds
+
+        # A login is one verify; the pool shows how far it scales past a core
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            started = time.perf_counter()
+            list(pool.map(lambda _: hasher.verify(SAMPLE_PASSWORD, encoded), range(rounds * workers)))
+            pooled_seconds = time.perf_counter() - started
+
+        return {
+            'algorithm': hasher.algorithm,
+            'params': {
+                key: value for key, value in hasher.decode(encoded).items()
+                if key not in ('hash', 'salt')
+            },
+            'hash_ms': round(hash_seconds * 1000, 3),
+            'verify_ms': round(verify_seconds * 1000, 3),
+            'logins_per_second_per_core': round(1 / verify_seconds, 2),
+            'logins_per_second': round(rounds * workers / pooled_seconds, 2),
+        }
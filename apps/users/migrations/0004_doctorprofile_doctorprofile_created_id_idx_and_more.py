@@ -0,0 +1,22 @@
+# Generated by Django 5.2.9 on 2026-10-17 03:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_alter_user_managers_user_phone_alter_user_role_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='doctorprofile',
+            index=models.Index(fields=['-created_at', 'id'], name='doctorprofile_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at', 'id'], name='user_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:13
+
+from django.db import migrations, models
+
+
+def backfill_search_document(apps, schema_editor):
+    # Same format as models.build_search_document
+    DoctorProfile = apps.get_model('users', 'DoctorProfile')
+    batch = []
+    for profile in DoctorProfile.objects.select_related('user').iterator(chunk_size=2000):
+        profile.search_document = '\n'.join(
+            ' '.join(str(part).lower().split())
+            for part in (profile.user.username, profile.specialization, profile.bio)
+        )
+        batch.append(profile)
+        if len(batch) == 2000:
+            DoctorProfile.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    DoctorProfile.objects.bulk_update(batch, ['search_document'])
+
+
+def add_search_indexes(apps, schema_editor):
+    # Other backends search through the in-process index in apps.users.search
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        "ALTER TABLE users_doctorprofile ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', split_part(search_document, E'\\n', 1)), 'A') || "
+        "setweight(to_tsvector('simple', split_part(search_document, E'\\n', 2)), 'B') || "
+        "setweight(to_tsvector('simple', split_part(search_document, E'\\n', 3)), 'D')"
+        ") STORED"
+    )
+    schema_editor.execute(
+        'CREATE INDEX doctorprofile_search_vector_idx ON users_doctorprofile USING gin (search_vector)'
+    )
+    schema_editor.execute(
+        'CREATE INDEX doctorprofile_search_trgm_idx ON users_doctorprofile '
+        'USING gin (search_document gin_trgm_ops)'
+    )
+
+
+def remove_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS doctorprofile_search_trgm_idx')
+    schema_editor.execute('ALTER TABLE users_doctorprofile DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctorprofile',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_document, migrations.RunPython.noop),
+        migrations.RunPython(add_search_indexes, remove_search_indexes),
+    ]
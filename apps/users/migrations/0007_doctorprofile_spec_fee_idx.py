@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_doctorprofile_search_document'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='doctorprofile',
+            index=models.Index(fields=['specialization', 'consultation_fee'], name='doctorprofile_spec_fee_idx'),
+        ),
+    ]
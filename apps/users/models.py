@@ -36,15 +36,37 @@ class User(AbstractUser):
     phone = models.CharField(validators=[phone_regex], max_length=17, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Embedded in issued tokens; bumping it revokes all of them
+    token_version = models.PositiveIntegerField(default=0)
     
     objects = UserManager()
     
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ['email']
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Keyset pagination in UserListView
+            models.Index(fields=['-created_at', 'id'], name='user_created_id_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.username} ({self.role})"
     
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Users authenticated from a cached snapshot have most columns
+        # deferred; load them all on first access instead of one query per field.
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred and set(fields) <= deferred:
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+    
+    def revoke_tokens(self):
+        """Invalidate every access and refresh token issued to this user so far."""
+        self.token_version = models.F('token_version') + 1
+        self.save(update_fields=['token_version'])
+        self.refresh_from_db(fields=['token_version'])
+    
     @property
     def is_admin(self):
         return self.role == self.Role.ADMIN
@@ -58,6 +80,15 @@ class User(AbstractUser):
         return self.role == self.Role.PATIENT
 
 
+def build_search_document(username, specialization, bio):
+    """
+    Text behind the doctor search (see ``apps.users.search``): one
+    lower-cased line each for username, specialization and bio, in weight
+    order.
+    """
+    return '\n'.join(' '.join(str(part).lower().split()) for part in (username, specialization, bio))
+
+
 class DoctorProfile(models.Model):
     class Specialization(models.TextChoices):
         CARDIOLOGY = 'cardiology', 'Cardiology'
@@ -88,14 +119,29 @@ class DoctorProfile(models.Model):
     gender = models.CharField(max_length=10, choices=Gender.choices)
     bio = models.TextField(blank=True)
     consultation_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    # Denormalized so one indexed column answers a search (username lives on User)
+    search_document = models.TextField(blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"Dr. {self.user.get_full_name() or self.user.username} - {self.specialization}"
     
+    def save(self, *args, **kwargs):
+        self.search_document = build_search_document(self.user.username, self.specialization, self.bio)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'search_document' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'search_document']
+        super().save(*args, **kwargs)
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination in DoctorListView
+            models.Index(fields=['-created_at', 'id'], name='doctorprofile_created_id_idx'),
+            # Availability search by specialization and maximum fee
+            models.Index(fields=['specialization', 'consultation_fee'], name='doctorprofile_spec_fee_idx'),
+        ]
 
 
 class PatientProfile(models.Model):
@@ -0,0 +1,191 @@
+"""
+Ranked doctor search over ``DoctorProfile.search_document``.
+
+On PostgreSQL, migration 0006 adds a generated ``search_vector`` tsvector
+column (username weighted A, specialization B, bio D) with a GIN index, plus
+a GIN trigram index on ``search_document``. Every search term becomes a
+``LIKE '%term%'`` that the trigram index serves, and results are ranked by
+``ts_rank`` (prefix matches) plus trigram similarity.
+
+Other backends have neither, so an in-process inverted index over the same
+documents stands in: token postings with a trigram index over the
+vocabulary, rebuilt when a profile changes (tracked by a cache version, so
+every worker notices). Matching is the same per-term substring rule, and the
+ranking weighs fields the same way.
+
+Either way the filter annotates ``search_rank``, which makes
+``KeysetCursorPagination`` page by relevance. The rank is a double precision
+number on both paths, so the cursor's ``str()`` of it compares equal to the
+column again; a ``real`` would be widened on comparison and pages could
+repeat or drop rows at tied ranks.
+"""
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from core.pagination import SEARCH_RANK
+from .models import DoctorProfile
+
+
+SEARCH_VERSION_KEY = 'doctor_search:version'
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Same relative weights as PostgreSQL's ts_rank defaults for A, B and D,
+# in search_document line order (username, specialization, bio).
+FIELD_WEIGHTS = (1.0, 0.4, 0.1)
+
+# The fallback passes every match's id to the database twice (filter and
+# rank), so only the best ones are kept to stay within SQLite's 999 query
+# parameters.
+MAX_INDEX_RESULTS = 300
+
+
+def search_tokens(terms):
+    return [token for term in terms for token in TOKEN_RE.findall(term.lower())]
+
+
+class DoctorSearchFilter(filters.SearchFilter):
+    """
+    Drop-in for ``SearchFilter`` on doctor profiles (same ``?search=``
+    parameter and every-term-must-match rule) backed by the search index
+    instead of ``ILIKE`` scans over a join.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        tokens = search_tokens(self.get_search_terms(request))
+        if not tokens:
+            return queryset
+        if connections[queryset.db].vendor == 'postgresql':
+            return postgres_search(queryset, tokens)
+        return index_search(queryset, tokens)
+
+
+def postgres_search(queryset, tokens):
+    for token in tokens:
+        queryset = queryset.filter(search_document__contains=token)
+
+    table = connections[queryset.db].ops.quote_name(DoctorProfile._meta.db_table)
+    # Tokens are \w+ only, so they are safe inside a tsquery
+    tsquery = ' & '.join(f'{token}:*' for token in tokens)
+    return queryset.annotate(**{SEARCH_RANK: RawSQL(
+        f"(ts_rank({table}.search_vector, to_tsquery('simple', %s)) "
+        f"+ similarity({table}.search_document, %s))::double precision",
+        (tsquery, ' '.join(tokens)),
+        output_field=FloatField()
+    )})
+
+
+def index_search(queryset, tokens):
+    scores = get_search_index().search(tokens)
+    if not scores:
+        return queryset.none()
+    if len(scores) > MAX_INDEX_RESULTS:
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:MAX_INDEX_RESULTS]
+        scores = dict(best)
+
+    # One WHEN per distinct score keeps the statement small
+    by_score = defaultdict(list)
+    for profile_id, score in scores.items():
+        by_score[round(score, 6)].append(profile_id)
+    return queryset.filter(pk__in=scores).annotate(**{SEARCH_RANK: Case(
+        *(When(pk__in=ids, then=Value(score)) for score, ids in by_score.items()),
+        default=Value(0.0),
+        output_field=FloatField()
+    )})
+
+
+class SearchIndex:
+    """Inverted index: token -> {profile_id: field weight}, plus trigram -> tokens."""
+
+    def __init__(self, documents):
+        self.postings = defaultdict(dict)
+        for profile_id, document in documents:
+            for weight, line in zip(FIELD_WEIGHTS, document.split('\n')):
+                for token in TOKEN_RE.findall(line):
+                    postings = self.postings[token]
+                    postings[profile_id] = postings.get(profile_id, 0) + weight
+
+        self.trigrams = defaultdict(set)
+        for token in self.postings:
+            for gram in trigrams(token):
+                self.trigrams[gram].add(token)
+        self.size = len({pid for postings in self.postings.values() for pid in postings})
+
+    def matching_tokens(self, term):
+        if len(term) < 3:
+            candidates = self.postings.keys()
+        else:
+            grams = sorted((self.trigrams.get(gram, set()) for gram in trigrams(term)), key=len)
+            candidates = set.intersection(*grams) if grams else set()
+        return [token for token in candidates if term in token]
+
+    def search(self, terms):
+        """Return ``{profile_id: score}`` for documents that contain every term."""
+        scores = None
+        for term in terms:
+            term_scores = defaultdict(float)
+            for token in self.matching_tokens(term):
+                postings = self.postings[token]
+                # Rare tokens and whole-token matches count for more
+                idf = math.log(1 + self.size / len(postings))
+                closeness = len(term) / len(token)
+                for profile_id, weight in postings.items():
+                    term_scores[profile_id] += weight * idf * closeness
+            if scores is None:
+                scores = dict(term_scores)
+            else:
+                scores = {pid: score + term_scores[pid] for pid, score in scores.items() if pid in term_scores}
+            if not scores:
+                return {}
+        return scores
+
+
+def trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_search_version():
+    version = cache.get(SEARCH_VERSION_KEY)
+    if version is None:
+        # Seeded with the time so an evicted counter never reuses a version
+        cache.add(SEARCH_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(SEARCH_VERSION_KEY)
+    return version
+
+
+def get_search_index():
+    global _index, _index_version
+    version = get_search_version()
+    if _index_version != version:
+        with _index_lock:
+            if _index_version != version:
+                _index = SearchIndex(DoctorProfile.objects.values_list('id', 'search_document').iterator())
+                _index_version = version
+    return _index
+
+
+def _incr_search_version():
+    try:
+        cache.incr(SEARCH_VERSION_KEY)
+    except ValueError:
+        get_search_version()
+
+
+def bump_search_version():
+    """Rebuild the fallback index on next use, now and after the transaction commits."""
+    _incr_search_version()
+    transaction.on_commit(_incr_search_version)
@@ -1,7 +1,15 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import authenticate
 from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from core.hashing import hash_password
+from .authentication import get_user_snapshot
 from .models import User, DoctorProfile, PatientProfile
+from .tokens import token_version
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -72,13 +80,13 @@ class RegisterSerializer(serializers.ModelSerializer):
         bio = validated_data.pop('bio', '')
         consultation_fee = validated_data.pop('consultation_fee', 0)
         
-        # Create user
-        user = User.objects.create_user(
+        # Create user; the password is hashed in the shared hashing pool
+        user = User.objects.create(
             username=validated_data['username'],
             email=validated_data['email'],
             role=validated_data['role'],
             phone=validated_data.get('phone', ''),
-            password=password
+            password=hash_password(password)
         )
         
         # Create profile based on role
@@ -102,10 +110,12 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
 
 
-class LoginSerializer(serializers.Serializer):
+class LoginCredentialsSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField(write_only=True)
-    
+
+
+class LoginSerializer(LoginCredentialsSerializer):
     def validate(self, attrs):
         username = attrs.get('username')
         password = attrs.get('password')
@@ -153,4 +163,14 @@ class DoctorListSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = DoctorProfile
-        fields = ('id', 'user', 'specialization', 'experience_years', 'gender', 'bio', 'consultation_fee')
\ No newline at end of file
+        fields = ('id', 'user', 'specialization', 'experience_years', 'gender', 'bio', 'consultation_fee')
+
+
+class ClinicTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        # Refuse refresh tokens issued before the user's tokens were revoked
+        refresh = self.token_class(attrs['refresh'])
+        snapshot = get_user_snapshot(refresh.payload.get(api_settings.USER_ID_CLAIM))
+        if snapshot is None or token_version(refresh) != snapshot['token_version']:
+            raise InvalidToken(_("Token has been revoked."))
+        return super().validate(attrs)
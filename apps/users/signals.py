@@ -0,0 +1,42 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import User, DoctorProfile, build_search_document
+from .authentication import invalidate_user_snapshot
+from .search import bump_search_version
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the snapshot does not hold
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_user_snapshot(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def username_changed(sender, instance, created, update_fields=None, **kwargs):
+    # The doctor search document embeds the username
+    if created or not instance.is_doctor:
+        return
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    for profile in DoctorProfile.objects.filter(user=instance):
+        document = build_search_document(instance.username, profile.specialization, profile.bio)
+        if profile.search_document != document:
+            profile.user = instance
+            profile.save(update_fields=['search_document'])
+
+
+@receiver(post_save, sender=DoctorProfile)
+def doctor_profile_saved(sender, instance, created, **kwargs):
+    # The snapshot only holds the profile id, which never changes afterwards
+    if created:
+        invalidate_user_snapshot(instance.user_id)
+    bump_search_version()
+
+
+@receiver(post_delete, sender=DoctorProfile)
+def doctor_profile_deleted(sender, instance, **kwargs):
+    invalidate_user_snapshot(instance.user_id)
+    bump_search_version()
@@ -1,10 +1,23 @@
-from django.test import TestCase
+import threading
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password as real_make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from rest_framework.test import APITestCase, APIClient
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .authentication import (
+    CachedJWTAuthentication, LocalLRUCache, TokenClaimsAuthentication, local_users
+)
 from .models import DoctorProfile, PatientProfile
+from .search import SearchIndex, get_search_index
+from .tokens import ClinicTokenUser
 
 User = get_user_model()
 
@@ -825,4 +838,439 @@ class IntegrationTests(APITestCase):
         update_data = {'bio': 'Integration test bio'}
         response = self.client.patch(reverse('doctor_profile'), update_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data['bio'], 'Integration test bio')
\ No newline at end of file
+        self.assertEqual(response.data['bio'], 'Integration test bio')
+
+class CachedJWTAuthenticationTests(APITestCase):
+    """Keshlangan JWT autentifikatsiya testlari"""
+    
+    def setUp(self):
+        cache.clear()
+        local_users.clear()
+        self.factory = APIRequestFactory()
+        self.auth = CachedJWTAuthentication()
+        self.doctor = User.objects.create_user(
+            username='cached_doctor',
+            password='testpass123',
+            email='cached_doctor@test.com',
+            role='doctor'
+        )
+        self.profile = DoctorProfile.objects.create(
+            user=self.doctor,
+            specialization='cardiology',
+            experience_years=4,
+            gender='male'
+        )
+    
+    def _authenticate(self, user):
+        token = RefreshToken.for_user(user).access_token
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.auth.authenticate(request)[0]
+    
+    def test_cached_user_needs_no_queries(self):
+        """Ikkinchi so'rovda users jadvaliga murojaat qilinmaydi"""
+        self._authenticate(self.doctor)
+        
+        with self.assertNumQueries(0):
+            user = self._authenticate(self.doctor)
+            self.assertTrue(user.is_doctor)
+            self.assertTrue(user.is_active)
+            self.assertEqual(user, self.doctor)
+            self.assertEqual(user.doctor_profile_id, self.profile.pk)
+    
+    def test_shared_cache_is_used_after_local_miss(self):
+        """Lokal keshda bo'lmasa umumiy keshdan olinadi"""
+        self._authenticate(self.doctor)
+        local_users.clear()
+        
+        with self.assertNumQueries(0):
+            self._authenticate(self.doctor)
+    
+    def test_other_fields_load_lazily(self):
+        """Snapshotda yo'q maydonlar kerak bo'lganda yuklanadi"""
+        user = self._authenticate(self.doctor)
+        
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'cached_doctor@test.com')
+    
+    def test_user_save_invalidates_snapshot(self):
+        """User saqlanganda kesh tozalanadi"""
+        self._authenticate(self.doctor)
+        
+        self.doctor.is_active = False
+        self.doctor.save()
+        
+        with self.assertRaises(AuthenticationFailed):
+            self._authenticate(self.doctor)
+    
+    def test_deleted_user_is_rejected(self):
+        """O'chirilgan user autentifikatsiyadan o'tmaydi"""
+        self._authenticate(self.doctor)
+        token = RefreshToken.for_user(self.doctor).access_token
+        self.doctor.delete()
+        
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate(request)
+    
+    def test_api_request_uses_cached_user(self):
+        """API so'rovida foydalanuvchi keshdan olinadi"""
+        token = RefreshToken.for_user(self.doctor).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.client.get(reverse('my_timeslots'))
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('my_timeslots'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('FROM "users_user"' in q['sql'] for q in ctx.captured_queries))
+    
+    def test_local_lru_evicts_and_expires(self):
+        """Lokal LRU eng eski va muddati o'tgan yozuvlarni o'chiradi"""
+        lru = LocalLRUCache(maxsize=2, timeout=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+        
+        expired = LocalLRUCache(maxsize=2, timeout=-1)
+        expired.set('a', 1)
+        self.assertIsNone(expired.get('a'))
+
+
+class TokenClaimsTests(APITestCase):
+    """Token claimlari va bekor qilish testlari"""
+    
+    def setUp(self):
+        cache.clear()
+        local_users.clear()
+        self.client = APIClient()
+        self.factory = APIRequestFactory()
+        self.doctor = User.objects.create_user(
+            username='claims_doctor',
+            password='testpass123',
+            email='claims_doctor@test.com',
+            role='doctor'
+        )
+        self.profile = DoctorProfile.objects.create(
+            user=self.doctor,
+            specialization='neurology',
+            experience_years=6,
+            gender='female'
+        )
+    
+    def _login(self):
+        response = self.client.post(reverse('login'), {
+            'username': 'claims_doctor',
+            'password': 'testpass123'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_login_token_carries_claims(self):
+        """Login tokenida rol va profil claimlari bor"""
+        access = AccessToken(self._login()['access'])
+        
+        self.assertEqual(access['role'], 'doctor')
+        self.assertEqual(access['doctor_profile_id'], self.profile.pk)
+        self.assertIsNone(access['patient_profile_id'])
+        self.assertEqual(access['ver'], 0)
+    
+    def test_token_user_authorizes_from_claims(self):
+        """Token user rolni claimlardan oladi"""
+        access = self._login()['access']
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        auth = TokenClaimsAuthentication()
+        auth.authenticate(request)
+        
+        with self.assertNumQueries(0):
+            user = auth.authenticate(request)[0]
+        
+        self.assertIsInstance(user, ClinicTokenUser)
+        self.assertTrue(user.is_doctor)
+        self.assertFalse(user.is_admin)
+        self.assertEqual(user.doctor_profile_id, self.profile.pk)
+        self.assertEqual(user, self.doctor)
+    
+    def test_role_change_falls_back_to_model_user(self):
+        """Rol o'zgarsa eski claimlar ishlatilmaydi"""
+        access = self._login()['access']
+        self.doctor.role = 'patient'
+        self.doctor.save()
+        
+        request = self.factory.get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        user = TokenClaimsAuthentication().authenticate(request)[0]
+        
+        self.assertIsInstance(user, User)
+        self.assertTrue(user.is_patient)
+    
+    def test_logout_all_revokes_issued_tokens(self):
+        """Barcha tokenlarni bekor qilish testi"""
+        tokens = self._login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        
+        response = self.client.post(reverse('logout_all'))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        
+        response = self.client.get(reverse('user_profile'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        self.client.credentials()
+        response = self.client.post(reverse('token_refresh'), {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        # Yangi login ishlaydi
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self._login()["access"]}')
+        response = self.client.get(reverse('user_profile'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_tokens_without_version_claim_still_work(self):
+        """Versiyasiz eski tokenlar ishlashda davom etadi"""
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.doctor).access_token}'
+        )
+        
+        self.assertEqual(self.client.get(reverse('doctor_list')).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse('user_profile')).status_code, status.HTTP_200_OK)
+
+
+MD5_ONLY = ['django.contrib.auth.hashers.MD5PasswordHasher']
+SCRYPT_FIRST = ['core.hashers.TunedScryptPasswordHasher'] + MD5_ONLY
+
+
+@override_settings(PASSWORD_HASHERS=MD5_ONLY)
+class PasswordHashingTests(APITestCase):
+    """Parol xeshlash siyosati va async login testlari"""
+    
+    def setUp(self):
+        cache.clear()
+        local_users.clear()
+        self.client = APIClient()
+        # Eski siyosat (MD5_ONLY): parol md5 bilan saqlanadi
+        self.patient = User.objects.create_user(
+            username='hash_patient',
+            password='testpass123',
+            email='hash_patient@test.com',
+            role='patient'
+        )
+        self.credentials = {'username': 'hash_patient', 'password': 'testpass123'}
+        self.registration = {
+            'username': 'pool_patient',
+            'password': 'testpass123',
+            'password2': 'testpass123',
+            'email': 'pool_patient@test.com',
+            'role': 'patient',
+            'date_of_birth': '1990-01-01',
+            'patient_gender': 'female',
+        }
+    
+    def test_login_rehashes_to_current_policy(self):
+        """Siyosat o'zgarsa login paytida parol qayta xeshlanadi"""
+        self.assertTrue(self.patient.password.startswith('md5$'))
+        
+        with override_settings(PASSWORD_HASHERS=SCRYPT_FIRST):
+            response = self.client.post(reverse('login'), self.credentials, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.patient.refresh_from_db()
+        self.assertTrue(self.patient.password.startswith('scrypt$'))
+    
+    def test_async_login_returns_tokens(self):
+        """Async login token qaytaradi"""
+        response = self.client.post(reverse('login_async'), self.credentials, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['user']['username'], 'hash_patient')
+        self.assertEqual(AccessToken(data['access'])['role'], 'patient')
+        self.assertIn('refresh', data)
+    
+    def test_async_login_rehashes_to_current_policy(self):
+        """Async login ham eski xeshni yangilaydi"""
+        with override_settings(PASSWORD_HASHERS=SCRYPT_FIRST):
+            response = self.client.post(reverse('login_async'), self.credentials, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.patient.refresh_from_db()
+        self.assertTrue(self.patient.password.startswith('scrypt$'))
+    
+    def test_async_login_invalid_credentials(self):
+        """Async login noto'g'ri parol va faol bo'lmagan user testi"""
+        response = self.client.post(reverse('login_async'), {
+            'username': 'hash_patient',
+            'password': 'wrongpass'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'non_field_errors': ['Invalid credentials']})
+        
+        response = self.client.post(reverse('login_async'), {
+            'username': 'nobody',
+            'password': 'testpass123'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        self.patient.is_active = False
+        self.patient.save()
+        response = self.client.post(reverse('login_async'), self.credentials, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.post(reverse('login_async'), {'username': 'hash_patient'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('password', response.json())
+    
+    @override_settings(PASSWORD_HASHING_WORKERS=0, PASSWORD_HASHING_MAX_PENDING=0)
+    def test_async_login_rejected_when_pool_is_full(self):
+        """Xeshlash navbati to'lsa 503 qaytadi"""
+        response = self.client.post(reverse('login_async'), self.credentials, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_async_login_uses_drf_request_handling(self):
+        """Async login DRF parserlari va xatolarni qayta ishlashidan foydalanadi"""
+        response = self.client.post(reverse('login_async'), self.credentials)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(reverse('login_async'), '{"username":', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('detail', response.json())
+
+    def test_register_hashes_in_pool(self):
+        """Ro'yxatdan o'tishda parol xeshlash pulida xeshlanadi"""
+        threads = []
+
+        def make_password(raw_password):
+            threads.append(threading.current_thread().name)
+            return real_make_password(raw_password)
+
+        with mock.patch('core.hashing.make_password', side_effect=make_password):
+            response = self.client.post(reverse('register'), self.registration, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('password-hashing'))
+        self.assertTrue(User.objects.get(username='pool_patient').check_password('testpass123'))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=0, PASSWORD_HASHING_MAX_PENDING=0)
+    def test_register_rejected_when_pool_is_full(self):
+        """Xeshlash navbati to'lsa ro'yxatdan o'tish ham 503 qaytaradi"""
+        response = self.client.post(reverse('register'), self.registration, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(User.objects.filter(username='pool_patient').exists())
+
+
+class DoctorSearchTests(APITestCase):
+    """Doctor qidiruv indeksi va reyting testlari"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.patient = User.objects.create_user(
+            username='search_patient', password='testpass123', email='search_patient@test.com', role='patient'
+        )
+        self.client.force_authenticate(self.patient)
+        self.smith = self._doctor('smith', 'dermatology', 'Treats skin conditions')
+        self.heart = self._doctor('heartdoc', 'cardiology', 'Former surgeon')
+        self.other = self._doctor('jones', 'neurology', 'Works with smith on cardiology research')
+    
+    def _doctor(self, username, specialization, bio):
+        user = User.objects.create_user(
+            username=username, password='testpass123', email=f'{username}@test.com', role='doctor'
+        )
+        return DoctorProfile.objects.create(user=user, specialization=specialization, gender='male', bio=bio)
+    
+    def _search(self, term):
+        response = self.client.get(reverse('doctor_list'), {'search': term})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data['results']]
+    
+    def test_results_ranked_by_relevance(self):
+        """Username va mutaxassislik mosligi biodan yuqori turadi"""
+        self.assertEqual(self._search('smith'), [self.smith.pk, self.other.pk])
+        self.assertEqual(self._search('cardio'), [self.heart.pk, self.other.pk])
+    
+    def test_every_term_must_match(self):
+        """Har bir so'z mos kelishi kerak"""
+        self.assertEqual(self._search('smith cardiology'), [self.other.pk])
+        self.assertEqual(self._search('SKIN treats'), [self.smith.pk])
+        self.assertEqual(self._search('nobody'), [])
+    
+    def test_index_follows_profile_and_username_changes(self):
+        """Profil yoki username o'zgarsa indeks yangilanadi"""
+        self.assertEqual(self._search('pediatric'), [])
+        
+        self.heart.bio = 'Now also pediatrics'
+        self.heart.save()
+        self.assertEqual(self._search('pediatric'), [self.heart.pk])
+        
+        self.heart.user.username = 'kardash'
+        self.heart.user.save()
+        self.heart.refresh_from_db()
+        self.assertTrue(self.heart.search_document.startswith('kardash\n'))
+        self.assertEqual(self._search('kardash'), [self.heart.pk])
+        
+        self.heart.delete()
+        self.assertEqual(self._search('kardash'), [])
+    
+    def test_ranked_pages_do_not_repeat(self):
+        """Reytingli natijalar sahifalanadi"""
+        for i in range(5):
+            self._doctor(f'derm_{i}', 'dermatology', 'skin' * (i + 1))
+        
+        response = self.client.get(reverse('doctor_list'), {'search': 'derm', 'page_size': 3})
+        first = [row['id'] for row in response.data['results']]
+        response = self.client.get(response.data['next'])
+        second = [row['id'] for row in response.data['results']]
+        
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 3)
+        self.assertFalse(set(first) & set(second))
+    
+    def test_tied_and_near_tied_ranks_page_without_gaps(self):
+        """Teng va deyarli teng reytinglar sahifalarda takrorlanmaydi va tushib qolmaydi"""
+        ids = [self._doctor(f'tie_{i}', 'dermatology', 'same bio').pk for i in range(5)]
+        # Tokenlar uzunligi bir harfga farq qiladi: reytinglar juda yaqin
+        ids += [self._doctor('tie_' + 'x' * (20 + i), 'dermatology', 'same bio').pk for i in range(4)]
+        
+        response = self.client.get(reverse('doctor_list'), {'search': 'tie', 'page_size': 100})
+        everything = [row['id'] for row in response.data['results']]
+        self.assertEqual(sorted(everything), sorted(ids))
+        
+        paged = []
+        response = self.client.get(reverse('doctor_list'), {'search': 'tie', 'page_size': 2})
+        while True:
+            paged += [row['id'] for row in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(paged, everything)
+        
+        # Orqaga ham xuddi shu chegaradan qaytadi
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], everything[-3:-1])
+    
+    def test_fallback_keeps_only_best_matches(self):
+        """Zaxira indeks faqat eng yaxshi natijalarni bazaga uzatadi"""
+        for i in range(4):
+            self._doctor(f'cap_{i}', 'dermatology', '')
+        best = self._doctor('cap', 'dermatology', '')
+        
+        with mock.patch('apps.users.search.MAX_INDEX_RESULTS', 2):
+            found = self._search('cap')
+        
+        self.assertEqual(len(found), 2)
+        self.assertEqual(found[0], best.pk)
+    
+    def test_search_index(self):
+        """Inverted indeks qisman so'zlar va trigramlar bilan ishlaydi"""
+        index = SearchIndex([(1, 'alice\ncardiology\nheart'), (2, 'bob\nneurology\nalice referrals')])
+        
+        self.assertEqual(set(index.search(['alic'])), {1, 2})
+        self.assertGreater(index.search(['alice'])[1], index.search(['alice'])[2])
+        self.assertEqual(set(index.search(['ology', 'heart'])), {1})
+        self.assertEqual(set(index.search(['o'])), {1, 2})
+        self.assertEqual(index.search(['zzz']), {})
+        self.assertIs(get_search_index(), get_search_index())
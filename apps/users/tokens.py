@@ -0,0 +1,83 @@
+from functools import cached_property
+
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+
+
+# Claims added to every token issued by LoginView / RegisterView; access
+# tokens inherit them from their refresh token.
+ROLE_CLAIM = 'role'
+DOCTOR_PROFILE_CLAIM = 'doctor_profile_id'
+PATIENT_PROFILE_CLAIM = 'patient_profile_id'
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+class ClinicRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        doctor_profile_id, patient_profile_id = User.objects.filter(pk=user.pk).values_list(
+            'doctor_profile__id', 'patient_profile__id'
+        ).first()
+        token[ROLE_CLAIM] = user.role
+        token[DOCTOR_PROFILE_CLAIM] = doctor_profile_id
+        token[PATIENT_PROFILE_CLAIM] = patient_profile_id
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+def token_version(token):
+    # Tokens issued before versioning carry no claim and count as version 0
+    return token.get(TOKEN_VERSION_CLAIM, 0)
+
+
+class ClinicTokenUser(TokenUser):
+    """
+    Stateless user backed by the token claims, with the same role helpers as
+    ``User`` so the permission classes work without loading the model.
+    """
+
+    @cached_property
+    def id(self):
+        # The claim is a string; match the type of User.pk so comparisons
+        # such as ``obj.doctor_id == request.user.id`` keep working.
+        return User._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def role(self):
+        return self.token[ROLE_CLAIM]
+
+    @property
+    def is_admin(self):
+        return self.role == User.Role.ADMIN
+
+    @property
+    def is_doctor(self):
+        return self.role == User.Role.DOCTOR
+
+    @property
+    def is_patient(self):
+        return self.role == User.Role.PATIENT
+
+    @cached_property
+    def doctor_profile_id(self):
+        return self.token.get(DOCTOR_PROFILE_CLAIM)
+
+    @cached_property
+    def patient_profile_id(self):
+        return self.token.get(PATIENT_PROFILE_CLAIM)
+
+    @cached_property
+    def token_version(self):
+        return token_version(self.token)
+
+    def __eq__(self, other):
+        # Compare equal to the matching User, e.g. ``obj.user == request.user``
+        if isinstance(other, User):
+            return self.id == other.pk
+        return super().__eq__(other)
+
+    __hash__ = TokenUser.__hash__
@@ -2,7 +2,7 @@ from django.urls import path
 from rest_framework_simplejwt.views import TokenBlacklistView
 
 from .views import (
-    RegisterView, LoginView, CustomTokenRefreshView, UserProfileView,
+    RegisterView, LoginView, AsyncLoginView, CustomTokenRefreshView, LogoutAllView, UserProfileView,
     DoctorProfileView, PatientProfileView, DoctorListView, DoctorDetailView,
     UserListView, UserDetailView
 )
@@ -11,8 +11,10 @@ urlpatterns = [
     # Authentication
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
+    path('login/async/', AsyncLoginView.as_view(), name='login_async'),
     path('token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path('logout/', TokenBlacklistView.as_view(), name='logout'),
+    path('logout/all/', LogoutAllView.as_view(), name='logout_all'),
     
     # Profile
     path('me/', UserProfileView.as_view(), name='user_profile'),
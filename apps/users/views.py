@@ -1,17 +1,25 @@
+from asgiref.sync import sync_to_async
 from rest_framework import status, generics, permissions, filters
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 
+from core.async_views import AsyncAPIView
+from core.hashing import acheck_password
+from core.pagination import KeysetCursorPagination
 from .models import User, DoctorProfile, PatientProfile
 from .serializers import (
-    UserSerializer, RegisterSerializer, LoginSerializer,
-    DoctorProfileSerializer, PatientProfileSerializer, DoctorListSerializer
+    UserSerializer, RegisterSerializer, LoginSerializer, LoginCredentialsSerializer,
+    DoctorProfileSerializer, PatientProfileSerializer, DoctorListSerializer,
+    ClinicTokenRefreshSerializer
 )
 from .permissions import IsAdmin, IsDoctor, IsPatient, IsOwner
+from .authentication import TokenClaimsAuthentication
+from .search import DoctorSearchFilter
+from .tokens import ClinicRefreshToken
 
 
 class RegisterView(generics.CreateAPIView):
@@ -24,7 +32,7 @@ class RegisterView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
         
-        refresh = RefreshToken.for_user(user)
+        refresh = ClinicRefreshToken.for_user(user)
         
         return Response({
             'user': UserSerializer(user).data,
@@ -41,7 +49,38 @@ class LoginView(APIView):
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
         
-        refresh = RefreshToken.for_user(user)
+        refresh = ClinicRefreshToken.for_user(user)
+        
+        return Response({
+            'user': UserSerializer(user).data,
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+        })
+
+
+class AsyncLoginView(AsyncAPIView):
+    """
+    Same contract as ``LoginView`` for ASGI deployments: password hashing runs
+    in the bounded hashing pool instead of blocking the event loop, and an
+    outdated hash is upgraded to the current policy on success.
+    """
+    permission_classes = [permissions.AllowAny]
+    
+    async def post(self, request):
+        serializer = LoginCredentialsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        username = serializer.validated_data['username']
+        password = serializer.validated_data['password']
+        
+        user = await User.objects.filter(username=username).afirst()
+        # Unknown usernames still pay for one hash, like ModelBackend
+        is_correct = await acheck_password(user, password)
+        
+        # Inactive users are rejected the same way authenticate() does
+        if not (is_correct and user.is_active):
+            raise ValidationError({'non_field_errors': ['Invalid credentials']})
+        
+        refresh = await sync_to_async(ClinicRefreshToken.for_user)(user)
         
         return Response({
             'user': UserSerializer(user).data,
@@ -51,9 +90,19 @@ class LoginView(APIView):
 
 
 class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = ClinicTokenRefreshSerializer
     permission_classes = [permissions.AllowAny]
 
 
+class LogoutAllView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        # Revokes every access and refresh token issued to the user so far
+        request.user.revoke_tokens()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class UserProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
@@ -90,10 +139,12 @@ class PatientProfileView(generics.RetrieveUpdateAPIView):
 
 class DoctorListView(generics.ListAPIView):
     serializer_class = DoctorListSerializer
+    authentication_classes = [TokenClaimsAuthentication]
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    pagination_class = KeysetCursorPagination
+    # ?search= matches username, specialization and bio, ranked by relevance
+    filter_backends = [DjangoFilterBackend, DoctorSearchFilter]
     filterset_fields = ['specialization', 'gender']
-    search_fields = ['user__username', 'specialization', 'bio']
     
     def get_queryset(self):
         return DoctorProfile.objects.select_related('user').all()
@@ -101,6 +152,7 @@ class DoctorListView(generics.ListAPIView):
 
 class DoctorDetailView(generics.RetrieveAPIView):
     serializer_class = DoctorListSerializer
+    authentication_classes = [TokenClaimsAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     queryset = DoctorProfile.objects.select_related('user').all()
 
@@ -110,6 +162,7 @@ class UserListView(generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]
+    pagination_class = KeysetCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['role', 'is_active']
     search_fields = ['username', 'email', 'phone']
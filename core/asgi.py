@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+from apps.appointments.maintenance import start_maintenance_runner  # noqa: E402
+
+start_maintenance_runner()
@@ -0,0 +1,119 @@
+"""
+Async (ASGI) variants of DRF's ``APIView`` and ``ListAPIView``.
+
+DRF's request cycle is synchronous, so under ASGI every request to a regular
+view holds a worker thread for its whole duration. These views run the cycle
+on the event loop instead:
+
+- authentication awaits an authenticator's ``aauthenticate()`` when it has
+  one (``CachedJWTAuthentication`` does) and otherwise runs ``authenticate()``
+  in a thread;
+- permissions, throttles and serializers run inline, so they must not touch
+  the database. The project's permission classes only read ``request.user``
+  and the querysets are fully loaded before serializing;
+- filter backends run inline too, except when the request has query
+  parameters: django-filter validates model choices (``?doctor=``) with a
+  query, so those requests filter in a thread;
+- lists are fetched with the async ORM, and pages through the paginator's
+  ``apaginate_queryset()`` when it has one.
+"""
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions, generics
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if hasattr(response, '__await__'):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        # Same steps as APIView.initial(), with authentication awaited
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+
+        neg = self.perform_content_negotiation(request)
+        request.accepted_renderer, request.accepted_media_type = neg
+
+        version, scheme = self.determine_version(request, *args, **kwargs)
+        request.version, request.versioning_scheme = version, scheme
+
+        await self.aperform_authentication(request)
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    async def aperform_authentication(self, request):
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, 'aauthenticate'):
+                    user_auth_tuple = await authenticator.aauthenticate(request)
+                else:
+                    user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            except exceptions.APIException:
+                request._not_authenticated()
+                raise
+
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+
+        request._not_authenticated()
+
+
+class AsyncListAPIView(AsyncAPIView, generics.GenericAPIView):
+    """
+    Async ``ListAPIView``. Subclassing a sync list view as well reuses its
+    queryset, filters, pagination and serializer unchanged::
+
+        class AsyncMyView(AsyncListAPIView, MyView):
+            pass
+
+    ``get_queryset()`` must stay lazy (no queries) for that to work.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer([obj async for obj in queryset.aiterator()], many=True)
+        return Response(serializer.data)
+
+    async def afilter_queryset(self, queryset):
+        if self.request.query_params:
+            return await sync_to_async(self.filter_queryset)(queryset)
+        return self.filter_queryset(queryset)
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        if hasattr(self.paginator, 'apaginate_queryset'):
+            return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        return await sync_to_async(self.paginator.paginate_queryset)(queryset, self.request, view=self)
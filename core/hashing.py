@@ -0,0 +1,96 @@
+"""
+Password hashing in a bounded pool.
+
+Django's async password helpers (``acheck_password``, ``aauthenticate``)
+still run the hasher inline, which blocks the event loop for the whole
+hash. Login and registration use these helpers instead: the work runs in a
+bounded thread pool (PBKDF2, scrypt and Argon2 release the GIL while
+hashing), and when too many jobs are already waiting the request is refused
+with a 503 rather than queueing without limit. Sync views wait for their
+job in the pool too, so the limit covers every hash the API computes.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class HashingOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-in requests at the moment; please retry shortly.'
+    default_code = 'hashing_overloaded'
+    # Sent as Retry-After by DRF's exception handler
+    wait = 1
+
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHING_WORKERS,
+                    thread_name_prefix='password-hashing'
+                )
+    return _executor
+
+
+@contextmanager
+def _reserve():
+    global _pending
+    with _pending_lock:
+        if _pending >= settings.PASSWORD_HASHING_WORKERS + settings.PASSWORD_HASHING_MAX_PENDING:
+            raise HashingOverloaded()
+        _pending += 1
+    try:
+        yield
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+
+async def run_hashing(func, *args, **kwargs):
+    with _reserve():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def run_hashing_sync(func, *args, **kwargs):
+    with _reserve():
+        return get_executor().submit(func, *args, **kwargs).result()
+
+
+async def amake_password(raw_password):
+    return await run_hashing(make_password, raw_password)
+
+
+def hash_password(raw_password):
+    """``make_password()`` for sync views, run in the same bounded pool."""
+    return run_hashing_sync(make_password, raw_password)
+
+
+async def acheck_password(user, raw_password):
+    """
+    ``user.check_password()`` with the hashing in the pool, including the
+    transparent rehash when the stored hash is outdated. Pass ``user=None``
+    for an unknown username: the default hasher still runs once so response
+    time does not reveal which usernames exist.
+    """
+    encoded = user.password if user is not None else ''
+    is_correct, must_update = await run_hashing(verify_password, raw_password, encoded)
+    if user is not None and is_correct and must_update:
+        user.password = await amake_password(raw_password)
+        await user.asave(update_fields=['password'])
+    return is_correct
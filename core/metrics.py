@@ -0,0 +1,234 @@
+"""
+In-process request metrics, aggregated per resolved URL name.
+
+Each worker keeps its own histograms (see ``RequestMetricsMiddleware``) and
+periodically publishes a snapshot to the default cache, so an admin endpoint
+or the ``request_metrics`` management command can merge every live worker's
+numbers. With the default per-process LocMemCache only the serving process is
+visible.
+"""
+import bisect
+import contextvars
+import functools
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.serializers import BaseSerializer
+
+
+# Upper bounds of the histogram buckets; values above the last bound land in
+# an overflow bucket.
+BUCKETS = {
+    'total_ms': (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+    'db_ms': (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+    'serializer_ms': (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+    'queries': (0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+    'bytes': (1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+}
+
+PROCESSES_KEY = 'request_metrics:processes'
+PROCESS_KEY = 'request_metrics:process:{host}:{pid}'
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        return {
+            'bounds': list(self.bounds),
+            'counts': list(self.counts),
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'max': round(self.max, 3),
+        }
+
+
+def merge_histograms(a, b):
+    if a['bounds'] != b['bounds']:
+        # Snapshot from a worker running different bucket bounds; keep ours.
+        return a
+    return {
+        'bounds': a['bounds'],
+        'counts': [x + y for x, y in zip(a['counts'], b['counts'])],
+        'count': a['count'] + b['count'],
+        'sum': round(a['sum'] + b['sum'], 3),
+        'max': max(a['max'], b['max']),
+    }
+
+
+def estimate_percentile(histogram, q):
+    """Upper bound of the bucket holding the ``q``-th percentile."""
+    if not histogram['count']:
+        return None
+    rank = q / 100 * histogram['count']
+    seen = 0
+    for bound, count in zip(histogram['bounds'] + [histogram['max']], histogram['counts']):
+        seen += count
+        if seen >= rank:
+            return min(bound, histogram['max'])
+    return histogram['max']
+
+
+class MetricsRegistry:
+    """Thread-safe per-URL-name histograms for one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._last_publish = time.monotonic()
+
+    def record(self, name, **values):
+        with self._lock:
+            histograms = self._endpoints.get(name)
+            if histograms is None:
+                histograms = self._endpoints[name] = {
+                    metric: Histogram(bounds) for metric, bounds in BUCKETS.items()
+                }
+            for metric, value in values.items():
+                if value is not None:
+                    histograms[metric].observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {metric: histogram.as_dict() for metric, histogram in histograms.items()}
+                for name, histograms in self._endpoints.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def publish_if_due(self):
+        interval = settings.REQUEST_METRICS_PUBLISH_INTERVAL
+        now = time.monotonic()
+        if now - self._last_publish < interval:
+            return
+        self._last_publish = now
+        publish(self.snapshot(), timeout=interval * 10)
+
+
+registry = MetricsRegistry()
+
+
+def process_key():
+    return PROCESS_KEY.format(host=socket.gethostname(), pid=os.getpid())
+
+
+def publish(snapshot, timeout):
+    key = process_key()
+    cache.set(key, snapshot, timeout=timeout)
+    # Racy read-modify-write, but every worker re-registers on each publish,
+    # so a lost update heals itself on the next interval.
+    processes = cache.get(PROCESSES_KEY) or {}
+    processes[key] = time.time()
+    cache.set(PROCESSES_KEY, processes, timeout=None)
+
+
+def collect():
+    """Merge the local histograms with every worker snapshot in the cache."""
+    local_key = process_key()
+    snapshots = [registry.snapshot()]
+    live = {}
+    for key, published_at in (cache.get(PROCESSES_KEY) or {}).items():
+        if key == local_key:
+            continue
+        snapshot = cache.get(key)
+        if snapshot is not None:
+            snapshots.append(snapshot)
+            live[key] = published_at
+
+    merged = {}
+    for snapshot in snapshots:
+        for name, histograms in snapshot.items():
+            if name not in merged:
+                merged[name] = histograms
+            else:
+                merged[name] = {
+                    metric: merge_histograms(merged[name][metric], histogram)
+                    for metric, histogram in histograms.items()
+                    if metric in merged[name]
+                }
+
+    return {
+        'processes': len(snapshots),
+        'endpoints': {
+            name: {
+                metric: dict(histogram, p50=estimate_percentile(histogram, 50), p99=estimate_percentile(histogram, 99))
+                for metric, histogram in histograms.items()
+            }
+            for name, histograms in sorted(merged.items())
+        },
+    }
+
+
+def reset_all():
+    registry.reset()
+    for key in cache.get(PROCESSES_KEY) or {}:
+        cache.delete(key)
+    cache.delete(PROCESSES_KEY)
+
+
+class RequestTimings:
+    """Counters for the request currently being handled."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self._in_serializer = False
+
+    def query_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+current_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def _timed_data(fget):
+    @functools.wraps(fget)
+    def data(self):
+        timings = current_timings.get()
+        if timings is None or timings._in_serializer:
+            return fget(self)
+        # Only the outermost serializer is timed; nested ones are part of it.
+        timings._in_serializer = True
+        started = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            timings.serializer_time += time.perf_counter() - started
+            timings._in_serializer = False
+    data._request_metrics = True
+    return data
+
+
+def install_serializer_timing():
+    """
+    Time ``BaseSerializer.data``, which every DRF serializer (and
+    ``ListSerializer``) goes through via ``super().data``. Only installed
+    when the middleware is enabled.
+    """
+    fget = BaseSerializer.data.fget
+    if not getattr(fget, '_request_metrics', False):
+        BaseSerializer.data = property(_timed_data(fget))
@@ -0,0 +1,86 @@
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import RequestTimings, current_timings, install_serializer_timing, registry
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, DB time, serializer time and response size per
+    resolved URL name, and report them in a ``Server-Timing`` header.
+
+    Opt-in through ``REQUEST_METRICS_ENABLED``; when it is off Django drops
+    the middleware at startup and nothing is patched.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        install_serializer_timing()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with self.wrap_queries(timings):
+                started = time.perf_counter()
+                response = self.get_response(request)
+                total = time.perf_counter() - started
+        finally:
+            current_timings.reset(token)
+        return self.record(request, response, timings, total)
+
+    async def __acall__(self, request):
+        # Async views run their queries in sync_to_async threads, which share
+        # this context's connections and so the same execute wrappers.
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with self.wrap_queries(timings):
+                started = time.perf_counter()
+                response = await self.get_response(request)
+                total = time.perf_counter() - started
+        finally:
+            current_timings.reset(token)
+        return self.record(request, response, timings, total)
+
+    def wrap_queries(self, timings):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timings.query_wrapper))
+        return stack
+
+    def record(self, request, response, timings, total):
+        match = request.resolver_match
+        name = (match.view_name if match else None) or '<unresolved>'
+        size = None if response.streaming else len(response.content)
+
+        registry.record(
+            name,
+            total_ms=total * 1000,
+            db_ms=timings.db_time * 1000,
+            serializer_ms=timings.serializer_time * 1000,
+            queries=timings.queries,
+            bytes=size,
+        )
+        registry.publish_if_due()
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timings.db_time * 1000:.2f};desc="{timings.queries} queries"',
+            f'serializer;dur={timings.serializer_time * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+        return response
@@ -0,0 +1,165 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+# Annotation added by ranking search filters (e.g. DoctorSearchFilter).
+# When present, pages follow relevance instead of the view's ordering.
+SEARCH_RANK = 'search_rank'
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination keyed on *every* field of ``ordering``.
+
+    DRF's ``CursorPagination`` only keys on the first ordering field and
+    falls back to an offset for ties, which gets slow when that field is far
+    from unique (e.g. ``date`` on timeslots). Here the cursor stores the full
+    ordering tuple of the boundary row and the next page is fetched with a
+    lexicographic ``WHERE`` that a matching composite index can serve, so deep
+    pages cost the same as the first one.
+
+    ``ordering`` must end with a unique field (normally ``id``). Querysets
+    annotated with ``SEARCH_RANK`` are paged by ``(-search_rank, id)``.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', 'id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset()`` for async views; fetches the page with the async ORM."""
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page([obj async for obj in queryset.aiterator()])
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self.reverse, self.current_position = False, None
+        else:
+            self.reverse, self.current_position = self.cursor.reverse, self.cursor.position
+
+        if self.reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self.current_position is not None:
+            values = self._decode_position(queryset, self.current_position)
+            queryset = queryset.filter(self._keyset_filter(values, self.reverse))
+
+        return queryset[:self.page_size + 1]
+
+    def _set_page(self, results):
+        self.page = results[:self.page_size]
+        has_more = len(results) > len(self.page)
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.current_position is not None
+
+        if self.page:
+            self.next_position = self._get_position_from_instance(self.page[-1], self.ordering)
+            self.previous_position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            # An empty page can only be reached through a cursor; step back
+            # over the same boundary in the other direction.
+            self.next_position = self.previous_position = self.current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        if SEARCH_RANK in queryset.query.annotations:
+            return ('-' + SEARCH_RANK, 'id')
+        return super().get_ordering(request, queryset, view)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(str(value))
+        return json.dumps(values)
+
+    def _decode_position(self, queryset, position):
+        try:
+            raw_values = json.loads(position)
+            if not isinstance(raw_values, list) or len(raw_values) != len(self.ordering):
+                raise ValueError
+            return [
+                self._ordering_field(queryset, field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, raw_values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _ordering_field(self, queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    def _keyset_filter(self, values, reverse):
+        # (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        # with the comparison flipped for descending fields and for
+        # backwards pages.
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            ascending = not field.startswith('-')
+            lookup = '__gt' if ascending != reverse else '__lt'
+            condition |= Q(**equal, **{name + lookup: value})
+            equal[name] = value
+        return condition
+
+
+def _reverse_ordering(ordering):
+    return tuple(
+        field[1:] if field.startswith('-') else '-' + field
+        for field in ordering
+    )
+
+
+class AppointmentCursorPagination(KeysetCursorPagination):
+    ordering = ('-created_at', 'id')
+
+
+class TimeSlotCursorPagination(KeysetCursorPagination):
+    ordering = ('date', 'start_time', 'id')
+
@@ -0,0 +1,42 @@
+"""
+JSON parsing with orjson.
+
+``ORJSONParser`` accepts what DRF's ``JSONParser`` accepts with the
+default ``STRICT_JSON``: UTF-8 documents without ``NaN``/``Infinity``.
+Bodies in another charset, and non-strict settings, are parsed by the
+stdlib ``JSONParser`` instead. So are bodies with a run of 19 or more
+digits: orjson reads integers outside the 64-bit range as lossy floats,
+where the stdlib keeps them exact.
+"""
+import codecs
+from io import BytesIO
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import DIGITS_TO_ZERO, ORJSONRenderer
+
+
+# Any integer orjson cannot hold has at least 19 digits
+LONG_NUMBER = b'0' * 19
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not self.strict or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if LONG_NUMBER in body.translate(DIGITS_TO_ZERO):
+            return super().parse(BytesIO(body), media_type, parser_context)
+
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from logging import config
 from decouple import config
 from pathlib import Path
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -90,9 +92,87 @@ DATABASES = {
     }
 }
 
+# Cache
+# Use a shared backend (e.g. django.core.cache.backends.redis.RedisCache) when
+# running several workers, otherwise cache invalidation stays per-process.
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
+}
+
+# Seconds a rendered doctor timeslot listing stays cached
+TIMESLOTS_CACHE_TIMEOUT = config("TIMESLOTS_CACHE_TIMEOUT", default=300, cast=int)
+
+# Seconds a patient's hold on a timeslot lasts (apps.appointments.holds).
+# Holds live in the cache above, so several workers need a shared backend.
+SLOT_HOLD_SECONDS = config("SLOT_HOLD_SECONDS", default=120, cast=int)
+
+# JSON list responses of the hot appointment/timeslot endpoints are built
+# from values() rows by hand-written serializers (RowListMixin); False falls
+# back to the model serializers, which produce the same output.
+FAST_LIST_SERIALIZERS = config("FAST_LIST_SERIALIZERS", default=True, cast=bool)
+
+# Request metrics (query count, DB/serializer time, response size per URL
+# name). Off by default; each worker publishes its histograms to the cache
+# every REQUEST_METRICS_PUBLISH_INTERVAL seconds.
+REQUEST_METRICS_ENABLED = config("REQUEST_METRICS_ENABLED", default=False, cast=bool)
+REQUEST_METRICS_PUBLISH_INTERVAL = config("REQUEST_METRICS_PUBLISH_INTERVAL", default=30, cast=int)
+
+# Schedule maintenance (apps.appointments.maintenance): unbooked slots older
+# than TIMESLOT_RETENTION_DAYS are deleted and finished appointments older than
+# APPOINTMENT_ARCHIVE_MONTHS move to the archive table, MAINTENANCE_BATCH_SIZE
+# rows per transaction with MAINTENANCE_BATCH_PAUSE seconds in between. With
+# MAINTENANCE_INTERVAL > 0 each web worker also runs it in a background thread
+# every that many seconds (one worker at a time, through a cache lock).
+TIMESLOT_RETENTION_DAYS = config("TIMESLOT_RETENTION_DAYS", default=1, cast=int)
+APPOINTMENT_ARCHIVE_MONTHS = config("APPOINTMENT_ARCHIVE_MONTHS", default=6, cast=int)
+MAINTENANCE_BATCH_SIZE = config("MAINTENANCE_BATCH_SIZE", default=500, cast=int)
+MAINTENANCE_BATCH_PAUSE = config("MAINTENANCE_BATCH_PAUSE", default=0.05, cast=float)
+MAINTENANCE_INTERVAL = config("MAINTENANCE_INTERVAL", default=0, cast=int)
+
+# Cached user snapshots for JWT authentication: seconds in the shared cache,
+# and size/seconds of the per-process LRU in front of it (a change made on
+# another worker can take this long to be seen here).
+AUTH_USER_CACHE_TIMEOUT = config("AUTH_USER_CACHE_TIMEOUT", default=300, cast=int)
+AUTH_USER_LOCAL_CACHE_SIZE = config("AUTH_USER_LOCAL_CACHE_SIZE", default=2048, cast=int)
+AUTH_USER_LOCAL_CACHE_TIMEOUT = config("AUTH_USER_LOCAL_CACHE_TIMEOUT", default=10, cast=int)
+
 # Custom User
 AUTH_USER_MODEL = "users.User"
 
+# Password hashing
+# PASSWORD_HASHER_POLICY picks the preferred hasher: pbkdf2, scrypt or argon2
+# (argon2 needs argon2-cffi). The others stay installed, so hashes made under
+# a previous policy or work factor still verify and are upgraded on the next
+# successful login.
+PASSWORD_HASHER_POLICY = config("PASSWORD_HASHER_POLICY", default="pbkdf2")
+PASSWORD_HASHER_POLICIES = {
+    "pbkdf2": "core.hashers.TunedPBKDF2PasswordHasher",
+    "scrypt": "core.hashers.TunedScryptPasswordHasher",
+    "argon2": "core.hashers.TunedArgon2PasswordHasher",
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_POLICIES[PASSWORD_HASHER_POLICY]] + [
+    hasher for policy, hasher in PASSWORD_HASHER_POLICIES.items()
+    if policy != PASSWORD_HASHER_POLICY
+]
+PASSWORD_PBKDF2_ITERATIONS = config("PASSWORD_PBKDF2_ITERATIONS", default=1_000_000, cast=int)
+PASSWORD_SCRYPT_WORK_FACTOR = config("PASSWORD_SCRYPT_WORK_FACTOR", default=2**14, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = config("PASSWORD_SCRYPT_BLOCK_SIZE", default=8, cast=int)
+PASSWORD_SCRYPT_PARALLELISM = config("PASSWORD_SCRYPT_PARALLELISM", default=5, cast=int)
+# OWASP's 19 MiB / 2 passes / 1 lane profile: far cheaper per login than
+# Django's default (100 MiB, 8 lanes) at a comparable security level.
+PASSWORD_ARGON2_TIME_COST = config("PASSWORD_ARGON2_TIME_COST", default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config("PASSWORD_ARGON2_MEMORY_COST", default=19456, cast=int)
+PASSWORD_ARGON2_PARALLELISM = config("PASSWORD_ARGON2_PARALLELISM", default=1, cast=int)
+
+# Threads used by the login and registration views to hash and verify
+# passwords, and how many hashing jobs may wait before new ones are refused
+# (503).
+PASSWORD_HASHING_WORKERS = config("PASSWORD_HASHING_WORKERS", default=os.cpu_count() or 2, cast=int)
+PASSWORD_HASHING_MAX_PENDING = config("PASSWORD_HASHING_MAX_PENDING", default=64, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -115,11 +195,21 @@ AUTH_PASSWORD_VALIDATORS = [
 # REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # orjson-based; same output and accepted input as DRF's JSON classes
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
@@ -0,0 +1,18 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.users.permissions import IsAdmin
+from .metrics import collect, reset_all
+
+
+class RequestMetricsView(APIView):
+    """Per-URL-name request histograms merged across workers (admin only)."""
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        return Response(collect())
+
+    def delete(self, request):
+        reset_all()
+        return Response(status=status.HTTP_204_NO_CONTENT)
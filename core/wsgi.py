@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+from apps.appointments.maintenance import start_maintenance_runner  # noqa: E402
+
+start_maintenance_runner()